@@ -0,0 +1,67 @@
+import os
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from random import Random
+from typing import Iterator, Tuple
+
+from timematic.enums import Weekday
+
+from timeranges import DatetimeRange, DatetimeRanges, TimeRange, TimeRanges, WeekRange
+
+# Sizes above this are skipped, set `TIMERANGES_BENCHMARK_MAX_SIZE=1000000` for all
+MAX_SIZE = int(os.environ.get("TIMERANGES_BENCHMARK_MAX_SIZE", 10_000))
+SIZES = [s for s in (10, 100, 1_000, 10_000, 100_000, 1_000_000) if s <= MAX_SIZE]
+
+START = datetime(2022, 1, 3, tzinfo=timezone.utc)  # A Monday
+US_IN_DAY = 24 * 60 * 60 * 1_000_000
+
+
+def pytest_generate_tests(metafunc) -> None:
+    if "size" in metafunc.fixturenames:
+        metafunc.parametrize("size", SIZES)
+
+
+def _pairs(size: int, span: int, seed: int) -> Iterator[Tuple[int, int]]:
+    # Roughly half of `span` covered, with plenty of overlaps
+    rng = Random(seed)
+    for _ in range(size):
+        start = rng.randrange(span)
+        yield start, min(span - 1, start + rng.randrange(span // size + 1))
+
+
+def _time(us: int) -> time:
+    return (datetime.min + timedelta(microseconds=us)).time()
+
+
+# Cached, so these must not be modified by the benchmarks
+
+
+@lru_cache(maxsize=None)
+def time_ranges(size: int, seed: int = 0) -> TimeRanges:
+    return TimeRanges(
+        [TimeRange(_time(s), _time(e)) for s, e in _pairs(size, US_IN_DAY, seed)]
+    )
+
+
+@lru_cache(maxsize=None)
+def datetime_ranges(size: int, seed: int = 0) -> DatetimeRanges:
+    # Spread over a year
+    us = timedelta(microseconds=1)
+    return DatetimeRanges(
+        [
+            DatetimeRange(START + s * us, START + e * us)
+            for s, e in _pairs(size, 365 * US_IN_DAY, seed)
+        ]
+    )
+
+
+@lru_cache(maxsize=None)
+def week_range(size: int, seed: int = 0) -> WeekRange:
+    per_day = max(1, size // 7)
+    return WeekRange(
+        {
+            weekday: time_ranges(per_day, seed + weekday.value).merged()
+            for weekday in Weekday
+        },
+        timezone=timezone.utc,
+    )
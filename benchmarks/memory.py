@@ -0,0 +1,72 @@
+"""Per-instance memory of range objects.
+
+Run with `python benchmarks/memory.py [count]`.
+"""
+
+import sys
+import tracemalloc
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Callable, List
+
+from timeranges import CompactDatetimeRanges, DatetimeRange, DatetimeRanges, TimeRange
+
+_START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+def bytes_per_instance(factory: Callable[[int], object], count: int) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    instances: List[object] = [factory(i) for i in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Don't count the list holding the instances
+    return (after - before - sys.getsizeof(instances)) / count
+
+
+def _time(i: int) -> time:
+    return time(i // 3600 % 24, i // 60 % 60, i % 60)
+
+
+def _with_keys(instance: Any) -> Any:
+    # Collection operations look up the keys of each range, which mustn't keep them
+    instance._keys()
+    return instance
+
+
+FACTORIES = {
+    "TimeRange": lambda i: TimeRange(_time(i), time.max),
+    "TimeRange._trusted": lambda i: TimeRange._trusted(_time(i), time.max),
+    "DatetimeRange": lambda i: DatetimeRange(
+        _START + timedelta(seconds=i), _START + timedelta(seconds=i + 1)
+    ),
+    "DatetimeRange._trusted": lambda i: DatetimeRange._trusted(
+        _START + timedelta(seconds=i), _START + timedelta(seconds=i + 1)
+    ),
+    "TimeRange._keys": lambda i: _with_keys(TimeRange(_time(i), time.max)),
+    "DatetimeRange._keys": lambda i: _with_keys(
+        DatetimeRange(_START + timedelta(seconds=i), _START + timedelta(seconds=i + 1))
+    ),
+}
+
+
+def bytes_per_compact_range(count: int) -> float:
+    datetime_ranges = DatetimeRanges(
+        [FACTORIES["DatetimeRange._trusted"](2 * i) for i in range(count)]
+    )
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    compact = CompactDatetimeRanges.from_datetime_ranges(datetime_ranges)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(compact) == count
+    return (after - before) / count
+
+
+def main(count: int = 100_000) -> None:
+    for name, factory in FACTORIES.items():
+        print(f"{name:<24} {bytes_per_instance(factory, count):8.1f} B")
+    print(f"{'CompactDatetimeRanges':<24} {bytes_per_compact_range(count):8.1f} B")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
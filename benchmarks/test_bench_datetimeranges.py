@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from conftest import START, datetime_ranges, week_range
+
+from timeranges import CompactDatetimeRanges, DatetimeRange, DatetimeRanges, WeekRange
+
+
+def _probes(count: int = 100):
+    return [START + timedelta(hours=89 * i) for i in range(count)]
+
+
+def test_merge(benchmark, size):
+    base = datetime_ranges(size)
+    benchmark.pedantic(
+        lambda datetime_ranges: datetime_ranges.merge(),
+        setup=lambda: ((DatetimeRanges(list(base.datetime_ranges)),), {}),
+        rounds=5,
+    )
+
+
+def test_contains_datetime(benchmark, size):
+    target = datetime_ranges(size)
+    probes = _probes()
+    benchmark(lambda: [dt in target for dt in probes])
+
+
+def test_contains_datetime_range(benchmark, size):
+    target = datetime_ranges(size)
+    probes = [DatetimeRange(dt, dt + timedelta(minutes=1)) for dt in _probes()]
+    benchmark(lambda: [dr in target for dr in probes])
+
+
+def test_contains_datetime_ranges(benchmark, size):
+    target = datetime_ranges(size)
+    other = datetime_ranges(max(1, size // 10), seed=1)
+    benchmark(target.contains, other)
+
+
+def test_compact_contains_datetime(benchmark, size):
+    target = CompactDatetimeRanges.from_datetime_ranges(datetime_ranges(size))
+    probes = _probes()
+    benchmark(lambda: [dt in target for dt in probes])
+
+
+def test_compact_intersection(benchmark, size):
+    a = CompactDatetimeRanges.from_datetime_ranges(datetime_ranges(size, seed=1))
+    b = CompactDatetimeRanges.from_datetime_ranges(datetime_ranges(size, seed=2))
+    benchmark(a.intersection, b)
+
+
+def test_week_range_from_datetime_ranges(benchmark, size):
+    benchmark(WeekRange.from_datetime_ranges, datetime_ranges(size))
+
+
+def test_week_range_has_transition(benchmark, size):
+    target = week_range(100)
+    benchmark(target.has_transition, datetime_ranges(size))
+
+
+def test_week_range_has_transition_long_range(benchmark):
+    target = week_range(100)
+    long_range = DatetimeRange(START, START + timedelta(days=3650))
+    benchmark(target.has_transition, long_range)
@@ -0,0 +1,30 @@
+import pytest
+from memory import FACTORIES, bytes_per_compact_range, bytes_per_instance
+
+# Upper bounds, in bytes, so that regressions fail loudly
+LIMITS = {
+    "TimeRange": 100,
+    "TimeRange._trusted": 100,
+    "DatetimeRange": 170,
+    "DatetimeRange._trusted": 170,
+    # After a collection operation, which mustn't grow them
+    "TimeRange._keys": 100,
+    "DatetimeRange._keys": 170,
+}
+
+
+@pytest.mark.parametrize("name", sorted(FACTORIES))
+def test_memory_per_instance(benchmark, name):
+    size = benchmark.pedantic(
+        bytes_per_instance, args=(FACTORIES[name], 10_000), rounds=1, iterations=1
+    )
+    benchmark.extra_info["bytes_per_instance"] = size
+    assert size <= LIMITS[name]
+
+
+def test_memory_per_compact_range(benchmark):
+    size = benchmark.pedantic(
+        bytes_per_compact_range, args=(10_000,), rounds=1, iterations=1
+    )
+    benchmark.extra_info["bytes_per_range"] = size
+    assert size <= 32
@@ -0,0 +1,51 @@
+from datetime import timedelta
+from threading import Event, Thread
+
+import pytest
+from conftest import START, week_range
+
+from timeranges import SharedWeekRange
+
+_READERS = 4
+_READS = 1_000
+
+
+def _probes(count: int = 100):
+    return [START + timedelta(minutes=101 * i) for i in range(count)]
+
+
+@pytest.mark.parametrize("writer", [False, True], ids=["idle", "writing"])
+def test_shared_week_range_reads(benchmark, size, writer):
+    shared = SharedWeekRange(week_range(size))
+    probes = _probes()
+    stop = Event()
+
+    def write() -> None:
+        # Alternates between two week ranges, publishing as fast as possible
+        seed = 0
+        while not stop.is_set():
+            seed ^= 1
+            shared.publish(week_range(size, seed=seed))
+
+    def read() -> None:
+        for _ in range(_READS // len(probes)):
+            for dt in probes:
+                dt in shared
+
+    def reads() -> None:
+        threads = [Thread(target=read) for _ in range(_READERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    writer_thread = Thread(target=write)
+    if writer:
+        writer_thread.start()
+    try:
+        benchmark(reads)
+    finally:
+        stop.set()
+        if writer:
+            writer_thread.join()
+    benchmark.extra_info["reads"] = _READERS * _READS
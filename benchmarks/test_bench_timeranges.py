@@ -0,0 +1,80 @@
+from datetime import time, timedelta
+from functools import reduce
+from operator import or_
+
+import pytest
+from conftest import START, time_ranges, week_range
+
+from timeranges import TimeRange, TimeRanges, WeekRange
+
+
+def _probes(count: int = 100):
+    return [time(h % 24, (7 * h) % 60, (13 * h) % 60) for h in range(count)]
+
+
+def test_merge(benchmark, size):
+    base = time_ranges(size)
+    benchmark.pedantic(
+        lambda time_ranges: time_ranges.merge(),
+        setup=lambda: ((TimeRanges(list(base.time_ranges)),), {}),
+        rounds=5,
+    )
+
+
+def test_merged(benchmark, size):
+    benchmark(time_ranges(size).merged)
+
+
+@pytest.mark.parametrize("operation", ["union", "intersection", "difference"])
+def test_set_operation(benchmark, size, operation):
+    a, b = time_ranges(size, seed=1), time_ranges(size, seed=2)
+    benchmark(getattr(a, operation), b)
+
+
+def test_contains_time(benchmark, size):
+    target = time_ranges(size)
+    probes = _probes()
+    benchmark(lambda: [t in target for t in probes])
+
+
+def test_contains_time_range(benchmark, size):
+    target = time_ranges(size)
+    probes = [TimeRange(t, t) for t in _probes()]
+    benchmark(lambda: [tr in target for tr in probes])
+
+
+def test_contains_time_ranges(benchmark, size):
+    target = time_ranges(size)
+    other = time_ranges(max(1, size // 10), seed=1)
+    benchmark(target.contains, other)
+
+
+def test_week_range_contains_datetime(benchmark, size):
+    target = week_range(size)
+    probes = [
+        START + timedelta(days=d, hours=h) for d in range(7) for h in range(0, 24, 2)
+    ]
+    benchmark(lambda: [dt in target for dt in probes])
+
+
+def test_week_range_union(benchmark, size):
+    benchmark(week_range(size, seed=1).union, week_range(size, seed=2))
+
+
+def test_week_range_intersection(benchmark, size):
+    benchmark(week_range(size, seed=1).intersection, week_range(size, seed=2))
+
+
+@pytest.mark.parametrize("operation", ["union_all", "at_least"])
+def test_week_range_many(benchmark, size, operation):
+    # Many small schedules, as many of them as ranges in the others
+    week_ranges = [week_range(10, seed=seed) for seed in range(size // 10 or 1)]
+    if operation == "at_least":
+        benchmark(WeekRange.at_least, week_ranges, k=2)
+    else:
+        benchmark(WeekRange.union_all, week_ranges)
+
+
+def test_week_range_union_reduce(benchmark, size):
+    week_ranges = [week_range(10, seed=seed) for seed in range(size // 10 or 1)]
+    benchmark(reduce, or_, week_ranges)
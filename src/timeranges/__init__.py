@@ -2,8 +2,80 @@
 
 __version__ = "1.0.2"
 
-from ._datetimeranges import DatetimeRange, DatetimeRanges
-from ._timeranges import TimeRange, TimeRanges, WeekRange
+# Submodules are only imported when one of their names is first accessed, so that
+# importing the package stays cheap, see `__getattr__`
+# `typing` itself is slow to import, type checkers treat this name specially
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from ._async import AsyncSchedule
+    from ._compact import CompactDatetimeRanges
+    from ._compiled import CompiledWeekRange
+    from ._datetimeranges import DatetimeRange, DatetimeRanges
+    from ._frozen import FrozenTimeRanges, FrozenWeekRange
+    from ._instrumentation import Instrumentation
+    from ._shared import SharedWeekRange
+    from ._streaming import intersection_iter, merge_iter, union_iter
+    from ._timeranges import TimeRange, TimeRanges, WeekRange
+    from ._tree import DatetimeRangesTree
+    from ._tz import set_offset_table_cache_size
+    from ._weekrangeset import WeekRangeSet
+
+_SUBMODULES = {
+    "TimeRange": "_timeranges",
+    "TimeRanges": "_timeranges",
+    "WeekRange": "_timeranges",
+    "FrozenTimeRanges": "_frozen",
+    "FrozenWeekRange": "_frozen",
+    "WeekRangeSet": "_weekrangeset",
+    "SharedWeekRange": "_shared",
+    "AsyncSchedule": "_async",
+    "DatetimeRange": "_datetimeranges",
+    "DatetimeRanges": "_datetimeranges",
+    "CompactDatetimeRanges": "_compact",
+    "CompiledWeekRange": "_compiled",
+    "DatetimeRangesTree": "_tree",
+    "Instrumentation": "_instrumentation",
+    "merge_iter": "_streaming",
+    "union_iter": "_streaming",
+    "intersection_iter": "_streaming",
+    "set_offset_table_cache_size": "_tz",
+}
 
 # TODO Maybe generate it programmatically?
-__all__ = ["TimeRange", "TimeRanges", "WeekRange", "DatetimeRange", "DatetimeRanges"]
+__all__ = [
+    "TimeRange",
+    "TimeRanges",
+    "WeekRange",
+    "FrozenTimeRanges",
+    "FrozenWeekRange",
+    "WeekRangeSet",
+    "SharedWeekRange",
+    "AsyncSchedule",
+    "DatetimeRange",
+    "DatetimeRanges",
+    "CompactDatetimeRanges",
+    "CompiledWeekRange",
+    "DatetimeRangesTree",
+    "Instrumentation",
+    "merge_iter",
+    "union_iter",
+    "intersection_iter",
+    "set_offset_table_cache_size",
+]
+
+
+def __getattr__(name: str) -> object:
+    try:
+        submodule = _SUBMODULES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    from importlib import import_module
+
+    value = getattr(import_module(f"{__name__}.{submodule}"), name)
+    # Cached, so that this is only called once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,145 @@
+import asyncio
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import attr
+
+from ._compiled import CompiledWeekRange
+from ._datetimeranges import DatetimeRanges
+from ._keys import datetime_to_key
+from ._numpy import import_numpy
+from ._timeranges import WeekRange
+
+Schedule = Union[WeekRange, DatetimeRanges]
+# Never modified once built, so that the executor can build them safely
+_Snapshot = Union[CompiledWeekRange, DatetimeRanges]
+_Query = Tuple[datetime, "asyncio.Future[bool]"]
+
+
+def _snapshot(schedule: Schedule, /) -> _Snapshot:
+    if isinstance(schedule, WeekRange):
+        compiled = schedule.compile()
+        compiled.warm_up()
+        return compiled
+    elif isinstance(schedule, DatetimeRanges):
+        # A merged copy, with its index already built
+        return schedule.merged()
+    else:
+        raise TypeError
+
+
+def _build_snapshot(
+    build: Callable[..., Schedule], /, *args: Any
+) -> Tuple[Schedule, _Snapshot]:
+    schedule = build(*args)
+    return schedule, _snapshot(schedule)
+
+
+def _batchable(snapshot: _Snapshot, dt: datetime, /) -> bool:
+    # Batches are looked up by epoch keys, naive wall times go one by one
+    if dt.tzinfo is None:
+        return False
+    return not isinstance(snapshot, CompiledWeekRange) or snapshot.timezone is not None
+
+
+def _contains_batch(snapshot: _Snapshot, pending: List[_Query], /) -> List[bool]:
+    try:
+        np = import_numpy()
+    except ImportError:
+        return [snapshot.contains(dt) for dt, _ in pending]
+    keys = np.array([datetime_to_key(dt) for dt, _ in pending], dtype=np.int64)
+    return snapshot.contains_many(keys).tolist()
+
+
+@attr.define
+class AsyncSchedule:
+    """Membership checks against a `WeekRange` or `DatetimeRanges`, from asyncio.
+
+    The schedule is snapshotted, compiled and indexed, so later changes to it aren't
+    seen. `reload` builds a new snapshot in `executor`, the loop's default one if
+    `None`, and swaps it in once ready, queries keep using the previous one until
+    then. Concurrent `contains` calls are coalesced into batches, looked up together
+    with `contains_many` when NumPy is installed.
+    """
+
+    # The schedule of the current snapshot
+    schedule: Schedule = attr.ib(eq=False)
+    executor: Optional[Executor] = attr.ib(default=None, eq=False)
+    max_batch_size: int = attr.ib(default=1024, eq=False)
+    # Seconds to wait for more queries before looking up a batch, `0` to only wait
+    # for the other tasks that are ready to run
+    batch_delay: float = attr.ib(default=0.0, eq=False)
+    _snapshot: _Snapshot = attr.ib(init=False, eq=False, repr=False)
+    # Reloads started and published, only newer snapshots replace the current one
+    _started: int = attr.ib(default=0, init=False, eq=False, repr=False)
+    _published: int = attr.ib(default=0, init=False, eq=False, repr=False)
+    # Along with the snapshot they were deemed batchable against
+    _pending: List[Tuple[_Snapshot, datetime, "asyncio.Future[bool]"]] = attr.ib(
+        init=False, factory=list, eq=False, repr=False
+    )
+    _handle: Optional[asyncio.Handle] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+
+    def __attrs_post_init__(self) -> None:
+        self._snapshot = _snapshot(self.schedule)
+
+    async def reload(self, build: Callable[..., Schedule], /, *args: Any) -> None:
+        """Call `build(*args)` in the executor, and swap its result in.
+
+        `build` can be `WeekRange.from_datetime_ranges`, or return a schedule that
+        still needs merging or compiling, which also happen in the executor.
+        """
+        self._started += 1
+        number = self._started
+        loop = asyncio.get_running_loop()
+        schedule, snapshot = await loop.run_in_executor(
+            self.executor, _build_snapshot, build, *args
+        )
+        # A reload that started later may have finished first
+        if number > self._published:
+            self.schedule = schedule
+            self._snapshot = snapshot
+            self._published = number
+
+    async def contains(self, dt: datetime, /) -> bool:
+        snapshot = self._snapshot
+        if not _batchable(snapshot, dt):
+            return snapshot.contains(dt)
+
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[bool]" = loop.create_future()
+        self._pending.append((snapshot, dt, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._handle is None:
+            if self.batch_delay > 0:
+                self._handle = loop.call_later(self.batch_delay, self._flush)
+            else:
+                self._handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        pending, self._pending = self._pending, []
+
+        # A reload may have swapped the snapshot since, which may not be batchable
+        batches: Dict[int, Tuple[_Snapshot, List[_Query]]] = {}
+        for snapshot, dt, future in pending:
+            batches.setdefault(id(snapshot), (snapshot, []))[1].append((dt, future))
+
+        for snapshot, batch in batches.values():
+            try:
+                results = _contains_batch(snapshot, batch)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                # Cancelled queries have nobody waiting for them
+                if not future.done():
+                    future.set_result(result)
@@ -2,4 +2,5 @@ from abc import ABC
 
 
 class BaseRange(ABC):
-    pass
+    # Keep subclasses free of `__dict__`, as attrs gives them `__slots__`
+    __slots__ = ()
@@ -0,0 +1,142 @@
+import struct
+import sys
+from array import array
+from datetime import timedelta, timezone, tzinfo
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+from ._intervals import Pair, PairView
+
+# Compact binary format of range collections:
+# - An 8 bytes header, with the magic, format version, kind of collection, and the
+#   length of the timezone key
+# - The timezone key, in UTF-8, padded to a multiple of 8 bytes
+# - Little-endian signed 64-bit keys, laid out by each collection
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+_MAGIC = b"TR"
+_VERSION = 1
+_HEADER = struct.Struct("<2sBBH2x")
+
+# Kinds of collections
+TIME_RANGES = 1
+DATETIME_RANGES = 2
+WEEK_RANGE = 3
+COMPACT_DATETIME_RANGES = 4
+
+_US = timedelta(microseconds=1)
+
+
+def timezone_key(tz: Optional[tzinfo], /) -> str:
+    """`""` without a timezone, the offset in microseconds for fixed offsets, such
+    as `"+3600000000"`, and the IANA key for `zoneinfo` timezones."""
+    if tz is None:
+        return ""
+    elif tz is timezone.utc:
+        return "UTC"
+    elif isinstance(tz, timezone):
+        return f"{tz.utcoffset(None) // _US:+d}"
+    key = getattr(tz, "key", None)
+    if not isinstance(key, str):
+        raise ValueError(f"Timezone {tz} can't be serialized")
+    return key
+
+
+def key_timezone(key: str, /) -> Optional[tzinfo]:
+    if not key:
+        return None
+    elif key == "UTC":
+        return timezone.utc
+    elif key[0] in "+-":
+        return timezone(int(key) * _US)
+    from zoneinfo import ZoneInfo
+
+    return ZoneInfo(key)
+
+
+def lossless_timezone_key(tzinfos: Iterable[Optional[tzinfo]], /) -> Optional[str]:
+    """The key shared by all `tzinfos`, if they can be loaded back as they are.
+
+    `None` for timezones without a key, fixed offsets with a custom name, or
+    different timezones, which pickling keeps as they are instead.
+    """
+    key = ""
+    last: Optional[tzinfo] = None
+    for i, tz in enumerate(tzinfos):
+        if i and tz is last:
+            continue
+        try:
+            tz_key = timezone_key(tz)
+        except ValueError:
+            return None
+        if isinstance(tz, timezone) and tz.tzname(None) != timezone(
+            tz.utcoffset(None)
+        ).tzname(None):
+            return None
+        if i and tz_key != key:
+            return None
+        key, last = tz_key, tz
+    return key
+
+
+def encode(kind: int, tz: Optional[tzinfo], keys: "array[int]", /) -> bytes:
+    key = timezone_key(tz).encode()
+    if sys.byteorder == "big":  # pragma: no cover
+        keys = array("q", keys)
+        keys.byteswap()
+    return b"".join(
+        (
+            _HEADER.pack(_MAGIC, _VERSION, kind, len(key)),
+            key,
+            bytes(-len(key) % 8),
+            keys.tobytes(),
+        )
+    )
+
+
+def decode(data: Buffer, kind: int, /) -> Tuple[Optional[tzinfo], memoryview]:
+    """The timezone and keys of `data`, which are a view over it when possible."""
+    view = memoryview(data).cast("B")
+    try:
+        magic, version, data_kind, length = _HEADER.unpack_from(view)
+    except struct.error as e:
+        raise ValueError("Data is too short") from e
+    if magic != _MAGIC:
+        raise ValueError("Data isn't in the timeranges format")
+    elif version != _VERSION:
+        raise ValueError(f"Unsupported format version {version}")
+    elif data_kind != kind:
+        raise ValueError(f"Expected kind {kind} but got {data_kind}")
+
+    start = _HEADER.size + length
+    tz = key_timezone(bytes(view[_HEADER.size : start]).decode())
+    body = view[start + -length % 8 :]
+    if len(body) % 8:
+        raise ValueError("Data is truncated")
+    keys = body.cast("q")
+    if sys.byteorder == "big":  # pragma: no cover
+        swapped = array("q", keys)
+        swapped.byteswap()
+        keys = memoryview(swapped)
+    return tz, keys
+
+
+def encode_pairs(
+    kind: int,
+    tz: Optional[tzinfo],
+    pairs: Sequence[Pair],
+    /,
+    prefix: Iterable[int] = (),
+) -> bytes:
+    # All starts, then all ends, so that they can be loaded as two views
+    keys = array("q", prefix)
+    keys.extend(start for start, _ in pairs)
+    keys.extend(end for _, end in pairs)
+    return encode(kind, tz, keys)
+
+
+def decode_pairs(keys: memoryview, /) -> PairView:
+    if len(keys) % 2:
+        raise ValueError("Data is truncated")
+    n = len(keys) // 2
+    return PairView(keys[:n], keys[n:])
@@ -0,0 +1,282 @@
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone, tzinfo
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    SupportsIndex,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+import attr
+
+from ._base import BaseRange
+from ._binary import (
+    COMPACT_DATETIME_RANGES,
+    Buffer,
+    decode,
+    encode,
+    lossless_timezone_key,
+)
+from ._datetimeranges import DatetimeRange, DatetimeRanges
+from ._intervals import (
+    Pair,
+    PairView,
+    intersect_pairs,
+    merge_pairs,
+    pairs_of,
+    subtract_pairs,
+    symmetric_difference_pairs,
+    union_pairs,
+)
+from ._keys import datetime_to_key, key_to_datetime
+from ._numpy import as_epoch_keys, import_numpy, not_a_time
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_T_CompactDatetimeRanges = TypeVar(
+    "_T_CompactDatetimeRanges", bound="CompactDatetimeRanges"
+)
+
+# Signed 64-bit microseconds since the UTC epoch
+Keys = Union["array[int]", memoryview]
+
+_US = timedelta(microseconds=1)
+_UTC = timezone.utc
+
+
+def _as_keys(values: Iterable[int]) -> Keys:
+    if isinstance(values, (array, memoryview)):
+        code = values.typecode if isinstance(values, array) else values.format
+        if values.itemsize != 8 or code not in ("q", "l"):
+            raise TypeError("Keys must be signed 64-bit integers")
+        return values
+    return array("q", values)
+
+
+@attr.define(on_setattr=attr.setters.frozen)
+class CompactDatetimeRanges(BaseRange):
+    """Datetime ranges stored as two arrays of UTC epoch microseconds.
+
+    Ranges are always kept sorted and merged, and `DatetimeRange` objects are only
+    created, in `timezone`, when iterating.
+    """
+
+    starts: Keys = attr.ib(converter=_as_keys)
+    ends: Keys = attr.ib(converter=_as_keys)
+    timezone: tzinfo = attr.ib(default=_UTC, eq=False)
+
+    def validate(self) -> None:
+        if len(self.starts) != len(self.ends):
+            raise ValueError("Starts and ends must have the same length")
+        for start, end in zip(self.starts, self.ends):
+            if start > end:
+                raise ValueError(f"Start key {start} is after end key {end}")
+
+    def _is_normalized(self) -> bool:
+        return all(
+            start > end for start, end in zip(islice(self.starts, 1, None), self.ends)
+        )
+
+    def __attrs_post_init__(self) -> None:
+        self.validate()
+        if not self._is_normalized():
+            pairs = merge_pairs(sorted(PairView(self.starts, self.ends)))
+            starts, ends = self._columns(pairs)
+            object.__setattr__(self, "starts", starts)
+            object.__setattr__(self, "ends", ends)
+
+    @staticmethod
+    def _columns(pairs: List[Pair], /) -> Tuple["array[int]", "array[int]"]:
+        return array("q", [s for s, _ in pairs]), array("q", [e for _, e in pairs])
+
+    @classmethod
+    def _trusted(
+        cls: Type[_T_CompactDatetimeRanges],
+        starts: Keys,
+        ends: Keys,
+        timezone: tzinfo = _UTC,
+    ) -> _T_CompactDatetimeRanges:
+        # Skips validation and normalization, for keys that are valid by construction
+        compact = object.__new__(cls)
+        object.__setattr__(compact, "starts", starts)
+        object.__setattr__(compact, "ends", ends)
+        object.__setattr__(compact, "timezone", timezone)
+        return compact
+
+    def _from_pairs(
+        self: _T_CompactDatetimeRanges, pairs: List[Pair], /
+    ) -> _T_CompactDatetimeRanges:
+        return self._trusted(*self._columns(pairs), timezone=self.timezone)
+
+    def _pairs(self) -> PairView:
+        return PairView(self.starts, self.ends)
+
+    @classmethod
+    def from_datetime_ranges(
+        cls: Type[_T_CompactDatetimeRanges],
+        datetime_ranges: DatetimeRanges,
+        /,
+        timezone: tzinfo = _UTC,
+    ) -> _T_CompactDatetimeRanges:
+        datetime_ranges.validate()
+        pairs = merge_pairs(sorted(pairs_of(datetime_ranges.datetime_ranges)))
+        return cls._trusted(*cls._columns(pairs), timezone=timezone)
+
+    def to_datetime_ranges(self) -> DatetimeRanges:
+        datetime_ranges = DatetimeRanges()
+        datetime_ranges._set_ranges(list(self), list(self._pairs()))
+        return datetime_ranges
+
+    def to_bytes(self) -> bytes:
+        """Compact binary form, see `from_bytes`."""
+        keys = array("q", self.starts)
+        keys.extend(self.ends)
+        return encode(COMPACT_DATETIME_RANGES, self.timezone, keys)
+
+    @classmethod
+    def from_bytes(
+        cls: Type[_T_CompactDatetimeRanges], data: Buffer, /
+    ) -> _T_CompactDatetimeRanges:
+        """Load the output of `to_bytes` without validating it.
+
+        Keys are views over `data` rather than copies, so it must not be modified.
+        """
+        tz, keys = decode(data, COMPACT_DATETIME_RANGES)
+        if len(keys) % 2:
+            raise ValueError("Data is truncated")
+        n = len(keys) // 2
+        return cls._trusted(keys[:n], keys[n:], timezone=_UTC if tz is None else tz)
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Tuple[Any, ...]:
+        # Only through `to_bytes` when it keeps the timezone as it is
+        if lossless_timezone_key([self.timezone]) is None:
+            return type(self)._trusted, (
+                array("q", self.starts),
+                array("q", self.ends),
+                self.timezone,
+            )
+        return type(self).from_bytes, (self.to_bytes(),)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __bool__(self) -> bool:
+        return bool(len(self.starts))
+
+    def __iter__(self) -> Iterator[DatetimeRange]:
+        tz = self.timezone
+        for start, end in zip(self.starts, self.ends):
+            yield DatetimeRange._trusted(
+                key_to_datetime(start, tz), key_to_datetime(end, tz)
+            )
+
+    def merged(self, interpolate: timedelta = timedelta(0)) -> "CompactDatetimeRanges":
+        assert interpolate >= timedelta(0), "Interpolation must be positive"
+        if not interpolate:
+            return self
+        return self._from_pairs(merge_pairs(self._pairs(), gap=interpolate // _US))
+
+    def _contains_keys(self, start: int, end: int, /) -> bool:
+        i = bisect_right(self.starts, start)
+        return bool(i) and self.ends[i - 1] >= end
+
+    def _contains_datetime(self, other: datetime, /) -> bool:
+        key = datetime_to_key(other)
+        return self._contains_keys(key, key)
+
+    def _contains_datetime_range(self, other: DatetimeRange, /) -> bool:
+        return self._contains_keys(*other._keys())
+
+    def _contains_datetime_ranges(self, other: DatetimeRanges, /) -> bool:
+        return all(self._contains_keys(*r._keys()) for r in other.datetime_ranges)
+
+    def _contains_compact_datetime_ranges(
+        self, other: "CompactDatetimeRanges", /
+    ) -> bool:
+        return all(self._contains_keys(*pair) for pair in other._pairs())
+
+    _contains_types = Union[
+        datetime, DatetimeRange, DatetimeRanges, "CompactDatetimeRanges"
+    ]
+
+    def contains(self, other: _contains_types, /) -> bool:
+        if isinstance(other, datetime):
+            return self._contains_datetime(other)
+        elif isinstance(other, DatetimeRange):
+            return self._contains_datetime_range(other)
+        elif isinstance(other, DatetimeRanges):
+            return self._contains_datetime_ranges(other)
+        elif isinstance(other, CompactDatetimeRanges):
+            return self._contains_compact_datetime_ranges(other)
+        else:
+            raise TypeError
+
+    def __contains__(self, other: _contains_types) -> bool:
+        return self.contains(other)
+
+    def contains_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `contains`, see `DatetimeRange.contains_many`."""
+        np = import_numpy()
+        keys = as_epoch_keys(datetimes)
+        # Views over the same memory, no copies
+        starts = np.frombuffer(self.starts, dtype=np.int64)
+        ends = np.frombuffer(self.ends, dtype=np.int64)
+        i = np.searchsorted(starts, keys, side="right")
+        mask = i > 0
+        mask[mask] = ends[i[mask] - 1] >= keys[mask]
+        return mask & ~not_a_time(datetimes)
+
+    def union(self, other: "CompactDatetimeRanges", /) -> "CompactDatetimeRanges":
+        return self._from_pairs(union_pairs(self._pairs(), other._pairs()))
+
+    def __or__(self, other: "CompactDatetimeRanges") -> "CompactDatetimeRanges":
+        return (
+            self.union(other)
+            if isinstance(other, CompactDatetimeRanges)
+            else NotImplemented
+        )
+
+    def intersection(
+        self, other: "CompactDatetimeRanges", /
+    ) -> "CompactDatetimeRanges":
+        return self._from_pairs(intersect_pairs(self._pairs(), other._pairs()))
+
+    def __and__(self, other: "CompactDatetimeRanges") -> "CompactDatetimeRanges":
+        return (
+            self.intersection(other)
+            if isinstance(other, CompactDatetimeRanges)
+            else NotImplemented
+        )
+
+    def difference(self, other: "CompactDatetimeRanges", /) -> "CompactDatetimeRanges":
+        return self._from_pairs(subtract_pairs(self._pairs(), other._pairs()))
+
+    def __sub__(self, other: "CompactDatetimeRanges") -> "CompactDatetimeRanges":
+        return (
+            self.difference(other)
+            if isinstance(other, CompactDatetimeRanges)
+            else NotImplemented
+        )
+
+    def symmetric_difference(
+        self, other: "CompactDatetimeRanges", /
+    ) -> "CompactDatetimeRanges":
+        return self._from_pairs(
+            symmetric_difference_pairs(self._pairs(), other._pairs())
+        )
+
+    def __xor__(self, other: "CompactDatetimeRanges") -> "CompactDatetimeRanges":
+        return (
+            self.symmetric_difference(other)
+            if isinstance(other, CompactDatetimeRanges)
+            else NotImplemented
+        )
@@ -0,0 +1,283 @@
+from bisect import bisect_right
+from datetime import datetime, timezone, tzinfo
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple, Union
+
+import attr
+
+from ._datetimeranges import DatetimeRange
+from ._intervals import IntervalIndex, Pair, merge_pairs
+from ._keys import (
+    EPOCH_WEEKDAY,
+    US_IN_DAY,
+    US_IN_WEEK,
+    datetime_to_key,
+    key_to_datetime,
+)
+from ._numpy import as_epoch_keys, import_numpy, not_a_time
+from ._tz import DEFAULT_HORIZON, OffsetTable, offset_table
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_LAST_WEEK_KEY = US_IN_WEEK - 1
+
+
+def local_key(dt: datetime, /) -> int:
+    """Microseconds since the epoch, from the wall time of `dt`."""
+    return datetime_to_key(dt.replace(tzinfo=timezone.utc))
+
+
+@attr.frozen
+class CompiledWeekRange:
+    """A `WeekRange` flattened into a single sorted list of week keys.
+
+    Week keys count microseconds since Monday 00:00, so a lookup is a single bisect.
+    Contiguous days are merged together, including Sunday into Monday.
+    """
+
+    index: IntervalIndex
+    timezone: Optional[tzinfo]
+    # Years covered by the UTC offset table of `timezone`
+    horizon: Tuple[int, int] = attr.ib(default=DEFAULT_HORIZON, eq=False)
+    # Built on the first lookup that needs it
+    _offsets: Optional[OffsetTable] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+    _boundaries: Optional[List[int]] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+
+    @classmethod
+    def from_pairs(
+        cls,
+        pairs: List[Pair],
+        /,
+        timezone: Optional[tzinfo],
+        horizon: Tuple[int, int] = DEFAULT_HORIZON,
+    ) -> "CompiledWeekRange":
+        return cls(
+            IntervalIndex.from_pairs(merge_pairs(pairs, gap=1)), timezone, horizon
+        )
+
+    @property
+    def full(self) -> bool:
+        starts, ends = self.index.starts, self.index.ends
+        return len(starts) == 1 and starts[0] == 0 and ends[0] == _LAST_WEEK_KEY
+
+    def _offset_table(self, tz: tzinfo, /) -> OffsetTable:
+        offsets = self._offsets
+        if offsets is None:
+            offsets = offset_table(tz, self.horizon)
+            object.__setattr__(self, "_offsets", offsets)
+        return offsets
+
+    def warm_up(self) -> None:
+        """Build what lookups build on first use, such as the UTC offset table.
+
+        Useful before sharing it, so that no lookup pays for it.
+        """
+        if self.timezone is not None:
+            # Loads the transitions of the current year
+            self._offset_table(self.timezone).local_key(datetime.now(timezone.utc))
+        self._get_boundaries()
+
+    def _local_key(self, dt: datetime, /) -> int:
+        # Wall time in `timezone`, as microseconds since the epoch
+        tz = self.timezone
+        if tz is None:
+            return local_key(dt)
+        elif dt.tzinfo is None:
+            # Naive datetimes are in system local time for `astimezone`
+            return local_key(dt.astimezone(tz))
+        return self._offset_table(tz).local_key(dt)
+
+    def _contains_local_keys(self, start: int, end: int, /) -> bool:
+        # `start` and `end` are local epoch keys, and may wrap around the week
+        if end - start >= _LAST_WEEK_KEY:
+            return self.full
+        index = self.index
+        week_start = (start + EPOCH_WEEKDAY * US_IN_DAY) % US_IN_WEEK
+        week_end = week_start + (end - start)
+        if week_end < US_IN_WEEK:
+            return index.contains_pair(week_start, week_end)
+        return index.contains_pair(week_start, _LAST_WEEK_KEY) and index.contains_pair(
+            0, week_end - US_IN_WEEK
+        )
+
+    def _contains_datetime(self, other: datetime, /) -> bool:
+        key = self._local_key(other)
+        return self.index.contains_point((key + EPOCH_WEEKDAY * US_IN_DAY) % US_IN_WEEK)
+
+    def _contains_datetime_range(self, other: DatetimeRange, /) -> bool:
+        return self._contains_local_keys(
+            self._local_key(other.start), self._local_key(other.end)
+        )
+
+    _contains_types = Union[datetime, DatetimeRange]
+
+    def contains(self, other: _contains_types, /) -> bool:
+        if isinstance(other, datetime):
+            return self._contains_datetime(other)
+        elif isinstance(other, DatetimeRange):
+            return self._contains_datetime_range(other)
+        else:
+            raise TypeError
+
+    def __contains__(self, other: _contains_types) -> bool:
+        return self.contains(other)
+
+    def contains_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `contains`, see `WeekRange.contains_many`."""
+        np = import_numpy()
+        nat = not_a_time(datetimes)
+        keys = np.where(nat, 0, as_epoch_keys(datetimes))
+        return self.index.contains_many(self.week_keys(keys)) & ~nat
+
+    def week_keys(self, keys: "np.ndarray", /) -> "np.ndarray":
+        """Week keys of epoch keys, in `timezone`, the same for equal timezones."""
+        tz = self.timezone
+        if tz is not None:
+            keys = keys + self._offset_table(tz).offsets_many(keys)
+        return (keys + EPOCH_WEEKDAY * US_IN_DAY) % US_IN_WEEK
+
+    def _get_boundaries(self) -> List[int]:
+        # Week keys at which containment changes, entering at starts and leaving
+        # right after ends
+        boundaries = self._boundaries
+        if boundaries is None:
+            keys = set()
+            for start, end in self.index.pairs():
+                keys.add(start)
+                keys.add((end + 1) % US_IN_WEEK)
+            # Nothing changes when wrapping around from Sunday into Monday
+            if self.index.contains_point(0) and self.index.contains_point(
+                _LAST_WEEK_KEY
+            ):
+                keys.discard(0)
+            boundaries = sorted(keys)
+            object.__setattr__(self, "_boundaries", boundaries)
+        return boundaries
+
+    def _transition_keys(
+        self, dt: datetime, /
+    ) -> Tuple[int, int, Optional[OffsetTable], Optional[tzinfo]]:
+        # Epoch key, local key, offset table and timezone of the result
+        tz = self.timezone
+        if tz is not None:
+            if dt.tzinfo is None:
+                # Naive datetimes are in system local time for `astimezone`
+                dt = dt.astimezone(tz)
+            offsets = self._offset_table(tz)
+        elif dt.tzinfo is not None:
+            offsets = offset_table(dt.tzinfo, self.horizon)
+        else:
+            # Naive wall times all the way through
+            key = local_key(dt)
+            return key, key, None, None
+        key = datetime_to_key(dt)
+        return key, key + offsets.offset(key), offsets, dt.tzinfo
+
+    @staticmethod
+    def _to_datetime(key: int, tz: Optional[tzinfo], /) -> datetime:
+        if tz is None:
+            return key_to_datetime(key).replace(tzinfo=None)
+        return key_to_datetime(key, tz)
+
+    def _next_transition_key(
+        self, key: int, local: int, offsets: Optional[OffsetTable], /
+    ) -> Optional[int]:
+        boundaries = self._get_boundaries()
+        if not boundaries:
+            return None
+        week_key = (local + EPOCH_WEEKDAY * US_IN_DAY) % US_IN_WEEK
+        base = local - week_key
+        i = bisect_right(boundaries, week_key)
+        # More than one step only when a transition moves the wall clock back
+        while True:
+            if i == len(boundaries):
+                i = 0
+                base += US_IN_WEEK
+            local = base + boundaries[i]
+            utc = local if offsets is None else offsets.utc_key(local)
+            if utc > key:
+                return utc
+            i += 1
+
+    def _previous_transition_key(
+        self, key: int, local: int, offsets: Optional[OffsetTable], /
+    ) -> Optional[int]:
+        boundaries = self._get_boundaries()
+        if not boundaries:
+            return None
+        week_key = (local + EPOCH_WEEKDAY * US_IN_DAY) % US_IN_WEEK
+        base = local - week_key
+        i = bisect_right(boundaries, week_key) - 1
+        while True:
+            if i < 0:
+                i = len(boundaries) - 1
+                base -= US_IN_WEEK
+            local = base + boundaries[i]
+            utc = local if offsets is None else offsets.utc_key(local)
+            if utc <= key:
+                return utc
+            i -= 1
+
+    def next_transition(self, dt: datetime, /) -> Optional[datetime]:
+        """See `WeekRange.next_transition`."""
+        key, local, offsets, tz = self._transition_keys(dt)
+        utc = self._next_transition_key(key, local, offsets)
+        return None if utc is None else self._to_datetime(utc, tz)
+
+    def previous_transition(self, dt: datetime, /) -> Optional[datetime]:
+        """See `WeekRange.previous_transition`."""
+        key, local, offsets, tz = self._transition_keys(dt)
+        utc = self._previous_transition_key(key, local, offsets)
+        return None if utc is None else self._to_datetime(utc, tz)
+
+    def _transitions_many(self, datetimes: Any, /, after: bool) -> "np.ndarray":
+        np = import_numpy()
+        nat = not_a_time(datetimes)
+        keys = np.where(nat, 0, as_epoch_keys(datetimes))
+        result = np.full(keys.shape, np.datetime64("NaT", "us"))
+        boundaries = np.array(self._get_boundaries(), dtype=np.int64)
+        if not len(boundaries):
+            return result
+
+        tz = self.timezone
+        offsets = None if tz is None else self._offset_table(tz)
+        local = keys if offsets is None else keys + offsets.offsets_many(keys)
+        week_keys = (local + EPOCH_WEEKDAY * US_IN_DAY) % US_IN_WEEK
+        base = local - week_keys
+        i = np.searchsorted(boundaries, week_keys, side="right")
+        if after:
+            wrap = i == len(boundaries)
+            candidates = np.where(
+                wrap, US_IN_WEEK + boundaries[0], boundaries[np.where(wrap, 0, i)]
+            )
+        else:
+            wrap = i == 0
+            candidates = np.where(
+                wrap, boundaries[-1] - US_IN_WEEK, boundaries[np.where(wrap, 0, i - 1)]
+            )
+        candidates = candidates + base
+        utc = candidates if offsets is None else offsets.utc_keys_many(candidates)
+
+        # Transitions moving the wall clock back can skip past the key, those are
+        # looked up one by one
+        transition_key = (
+            self._next_transition_key if after else self._previous_transition_key
+        )
+        wrong = ((utc <= keys) if after else (utc > keys)) & ~nat
+        for j in np.flatnonzero(wrong):
+            utc[j] = transition_key(int(keys[j]), int(local[j]), offsets)
+
+        result[~nat] = utc[~nat].view("datetime64[us]")
+        return result
+
+    def next_transition_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `next_transition`, see `WeekRange.next_transition_many`."""
+        return self._transitions_many(datetimes, after=True)
+
+    def previous_transition_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `previous_transition`, see `WeekRange.next_transition_many`."""
+        return self._transitions_many(datetimes, after=False)
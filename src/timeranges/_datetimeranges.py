@@ -1,13 +1,53 @@
-from copy import deepcopy
-from datetime import datetime, time, timedelta, timezone
-from typing import List, TypeVar, Union
+from datetime import datetime, timedelta, timezone, tzinfo
+from operator import itemgetter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    List,
+    Optional,
+    SupportsIndex,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import attr
 
 from ._base import BaseRange
+from ._binary import (
+    DATETIME_RANGES,
+    Buffer,
+    decode,
+    decode_pairs,
+    encode_pairs,
+    lossless_timezone_key,
+)
+from ._intervals import (
+    IntervalIndex,
+    Pair,
+    RangeList,
+    as_range_list,
+    at_least_pairs,
+    intersect_pairs,
+    measure,
+    measure_many,
+    merge_pairs,
+    pairs_of,
+    subtract_pairs,
+    union_all_pairs,
+)
+from ._keys import datetime_to_key, key_to_datetime
+from ._numpy import as_epoch_keys, import_numpy, not_a_time
+
+if TYPE_CHECKING:
+    import numpy as np
 
 _T_DatetimeRange = TypeVar("_T_DatetimeRange", bound="DatetimeRange")
 
+_US = timedelta(microseconds=1)
+
 
 @attr.define(order=True, on_setattr=attr.setters.validate)
 class DatetimeRange(BaseRange):
@@ -48,8 +88,20 @@ class DatetimeRange(BaseRange):
 
         self._validate_range(self.start, self.end)
 
-    def __attrs_post_init__(self) -> None:
-        self.validate()
+    # The field validators already run on `__init__`, no need to validate again
+
+    @classmethod
+    def _trusted(
+        cls: Type[_T_DatetimeRange], start: datetime, end: datetime
+    ) -> _T_DatetimeRange:
+        # Skips validation entirely, only for ranges that are valid by construction
+        datetime_range = object.__new__(cls)
+        _set_datetime_range_start(datetime_range, start)
+        _set_datetime_range_end(datetime_range, end)
+        return datetime_range
+
+    def _keys(self) -> Tuple[int, int]:
+        return datetime_to_key(self.start), datetime_to_key(self.end)
 
     def _contains_datetime(self, other: datetime, /) -> bool:
         return self.start <= other <= self.end
@@ -71,10 +123,45 @@ class DatetimeRange(BaseRange):
     def __contains__(self, other: _contains_types) -> bool:
         return self.contains(other)
 
+    def contains_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `contains` over an array of datetimes.
+
+        Accepts `datetime64` or integer microseconds since the epoch, in UTC, and
+        requires NumPy.
+        """
+        keys = as_epoch_keys(datetimes)
+        start, end = self._keys()
+        return (start <= keys) & (keys <= end) & ~not_a_time(datetimes)
+
+
+# Bypass the validating `__setattr__`, straight to the slots
+_set_datetime_range_start = DatetimeRange.__dict__["start"].__set__
+_set_datetime_range_end = DatetimeRange.__dict__["end"].__set__
+
+
+def _reset_index(
+    instance: "DatetimeRanges",
+    attribute: attr.Attribute,
+    value: RangeList[DatetimeRange],
+) -> RangeList[DatetimeRange]:
+    instance._index = None
+    return value
+
 
 @attr.define
 class DatetimeRanges(BaseRange):
-    datetime_ranges: List[DatetimeRange] = attr.Factory(list)
+    def _convert_datetime_ranges(datetime_ranges: Iterable[DatetimeRange]) -> RangeList[DatetimeRange]:  # type: ignore
+        return as_range_list(datetime_ranges)
+
+    # Always a `RangeList`, so that the index can tell when it's modified
+    datetime_ranges: RangeList[DatetimeRange] = attr.ib(
+        factory=RangeList,
+        converter=_convert_datetime_ranges,
+        on_setattr=[attr.setters.convert, _reset_index],
+    )
+    _index: Optional[IntervalIndex] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
 
     def validate(self) -> None:
         for datetime_range in self.datetime_ranges:
@@ -83,29 +170,54 @@ class DatetimeRanges(BaseRange):
     def sort(self) -> None:
         self.validate()
         self.datetime_ranges.sort()
-
-    def merge(self, interpolate: timedelta = timedelta(0)) -> None:
-        assert interpolate >= timedelta(0), "Interpolation must be positive"
-        self.sort()
-        datetime_ranges = deepcopy(self.datetime_ranges)
-        aux: List[DatetimeRange] = []
-
-        # Merge overlapping time ranges
-        for datetime_range in datetime_ranges:
-            if not aux:
-                aux.append(datetime_range)
+        self._index = None
+
+    def _merge_ranges(
+        self, interpolate: timedelta = timedelta(0)
+    ) -> Tuple[List[DatetimeRange], List[Pair]]:
+        gap = interpolate // _US
+        pairs: List[Pair] = []
+        # Keep the original datetimes, along with their timezones
+        bounds: List[Tuple[datetime, datetime]] = []
+
+        # Merge overlapping datetime ranges
+        keyed = sorted(
+            ((r._keys(), r) for r in self.datetime_ranges), key=itemgetter(0)
+        )
+        for (start, end), datetime_range in keyed:
+            if pairs and start - pairs[-1][1] <= gap:
+                if end > pairs[-1][1]:
+                    pairs[-1] = (pairs[-1][0], end)
+                    bounds[-1] = (bounds[-1][0], datetime_range.end)
                 continue
-            aux_last = aux[-1]
-            if (datetime_range.start - aux_last.end) <= interpolate:
-                if datetime_range.end > aux_last.end:
-                    aux_last.end = datetime_range.end
-            else:
-                aux.append(datetime_range)
+            pairs.append((start, end))
+            bounds.append((datetime_range.start, datetime_range.end))
 
         # TODO Interpolate to `time.max`
 
-        self.datetime_ranges = aux
-        self.sort()
+        return (
+            RangeList(DatetimeRange._trusted(start, end) for start, end in bounds),
+            pairs,
+        )
+
+    def _set_ranges(
+        self, datetime_ranges: List[DatetimeRange], pairs: List[Pair]
+    ) -> None:
+        source = self.datetime_ranges = as_range_list(datetime_ranges)
+        self._index = IntervalIndex.from_pairs(pairs, source=source)
+
+    def merge(self, interpolate: timedelta = timedelta(0)) -> None:
+        assert interpolate >= timedelta(0), "Interpolation must be positive"
+        self.validate()
+        self._set_ranges(*self._merge_ranges(interpolate))
+
+    def merged(self, interpolate: timedelta = timedelta(0)) -> "DatetimeRanges":
+        """Like `merge`, but returns a new instance instead of modifying this one."""
+        assert interpolate >= timedelta(0), "Interpolation must be positive"
+        self.validate()
+        datetime_ranges = DatetimeRanges()
+        datetime_ranges._set_ranges(*self._merge_ranges(interpolate))
+        return datetime_ranges
 
     def __attrs_post_init__(self) -> None:
         self.validate()
@@ -113,11 +225,138 @@ class DatetimeRanges(BaseRange):
     def __bool__(self) -> bool:
         return bool(self.datetime_ranges)
 
+    def to_bytes(self) -> bytes:
+        """Compact binary form, as integer keys, see `from_bytes`.
+
+        Only the timezone of the first range is kept, for all of them.
+        """
+        datetime_ranges = self.datetime_ranges
+        tz = datetime_ranges[0].start.tzinfo if datetime_ranges else None
+        return encode_pairs(DATETIME_RANGES, tz, pairs_of(datetime_ranges))
+
+    @classmethod
+    def from_bytes(cls, data: Buffer, /) -> "DatetimeRanges":
+        """Load the output of `to_bytes`, trusting it without validating each range."""
+        tz, keys = decode(data, DATETIME_RANGES)
+        tz = timezone.utc if tz is None else tz
+        pairs = list(decode_pairs(keys))
+        datetime_ranges = cls()
+        datetime_ranges._set_ranges(
+            [
+                DatetimeRange._trusted(key_to_datetime(s, tz), key_to_datetime(e, tz))
+                for s, e in pairs
+            ],
+            pairs,
+        )
+        return datetime_ranges
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Union[str, Tuple[Any, ...]]:
+        # Only through `to_bytes` when it keeps the timezones as they are
+        tzinfos = (
+            dt.tzinfo
+            for datetime_range in self.datetime_ranges
+            for dt in (datetime_range.start, datetime_range.end)
+        )
+        if lossless_timezone_key(tzinfos) is None:
+            return super().__reduce_ex__(protocol)
+        return type(self).from_bytes, (self.to_bytes(),)
+
+    def _get_index(self) -> IntervalIndex:
+        # Rebuilt lazily whenever the list is replaced, sorted, merged or resized
+        index = self._index
+        datetime_ranges = self.datetime_ranges
+        if index is None or not index.matches(datetime_ranges):
+            index = IntervalIndex.from_pairs(
+                pairs_of(datetime_ranges), source=datetime_ranges
+            )
+            self._index = index
+        return index
+
+    @property
+    def is_normalized(self) -> bool:
+        """Whether the ranges are sorted and don't overlap."""
+        return self._get_index().normalized
+
+    def normalize(self) -> None:
+        """Sort and merge the ranges, and index them for fast lookups.
+
+        Also call it after editing ranges in place, by assigning their `start` or
+        `end`, which the index doesn't see otherwise.
+        """
+        self.datetime_ranges.touch()
+        if not self.is_normalized:
+            self.merge()
+        self._get_index()
+
+    def _splice(
+        self, i: int, j: int, datetime_ranges: List[DatetimeRange], pairs: List[Pair], /
+    ) -> None:
+        index = self._get_index()
+        source = self.datetime_ranges
+        source[i:j] = datetime_ranges
+        self._index = index.splice(i, j, pairs, source=source)
+
+    def add(self, datetime_range: DatetimeRange, /) -> None:
+        """Add a range, merging it with the ones it overlaps, in O(log n + k).
+
+        Normalizes first, if needed.
+        """
+        if not isinstance(datetime_range, DatetimeRange):
+            raise TypeError
+        datetime_range.validate()
+        self.normalize()
+        index = self._get_index()
+        start, end = datetime_range._keys()
+        first, last = datetime_range.start, datetime_range.end
+        i, j = index.overlapping(start, end)
+        if i < j:
+            # Keep the original datetimes, along with their timezones
+            if index.starts[i] < start:
+                start, first = index.starts[i], self.datetime_ranges[i].start
+            if index.ends[j - 1] > end:
+                end, last = index.ends[j - 1], self.datetime_ranges[j - 1].end
+        self._splice(i, j, [DatetimeRange._trusted(first, last)], [(start, end)])
+
+    def discard(self, datetime_range: DatetimeRange, /) -> None:
+        """Remove a range, trimming the ones it overlaps, in O(log n + k).
+
+        Normalizes first, if needed.
+        """
+        if not isinstance(datetime_range, DatetimeRange):
+            raise TypeError
+        datetime_range.validate()
+        self.normalize()
+        index = self._get_index()
+        start, end = datetime_range._keys()
+        i, j = index.overlapping(start, end)
+        if i == j:
+            return
+        # Keys are discrete, so what's left is `[..., start - 1]` and `[end + 1, ...]`
+        datetime_ranges: List[DatetimeRange] = []
+        pairs: List[Pair] = []
+        if index.starts[i] < start:
+            first = self.datetime_ranges[i].start
+            datetime_ranges.append(
+                DatetimeRange._trusted(
+                    first, key_to_datetime(start - 1, first.tzinfo or timezone.utc)
+                )
+            )
+            pairs.append((index.starts[i], start - 1))
+        if index.ends[j - 1] > end:
+            last = self.datetime_ranges[j - 1].end
+            datetime_ranges.append(
+                DatetimeRange._trusted(
+                    key_to_datetime(end + 1, last.tzinfo or timezone.utc), last
+                )
+            )
+            pairs.append((end + 1, index.ends[j - 1]))
+        self._splice(i, j, datetime_ranges, pairs)
+
     def _contains_datetime(self, other: datetime, /) -> bool:
-        return any(other in datetime_range for datetime_range in self.datetime_ranges)
+        return self._get_index().contains_point(datetime_to_key(other))
 
     def _contains_datetime_range(self, other: DatetimeRange, /) -> bool:
-        return any(other in datetime_range for datetime_range in self.datetime_ranges)
+        return self._get_index().contains_pair(*other._keys())
 
     def _contains_datetime_ranges(self, other: "DatetimeRanges", /) -> bool:
         return all(
@@ -125,7 +364,7 @@ class DatetimeRanges(BaseRange):
             for datetime_range in other.datetime_ranges
         )
 
-    _contains_types = Union[time, DatetimeRange, "DatetimeRanges"]
+    _contains_types = Union[datetime, DatetimeRange, "DatetimeRanges"]
 
     def contains(self, other: _contains_types, /) -> bool:
         if isinstance(other, datetime):
@@ -139,3 +378,120 @@ class DatetimeRanges(BaseRange):
 
     def __contains__(self, other: _contains_types) -> bool:
         return self.contains(other)
+
+    def contains_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `contains`, see `DatetimeRange.contains_many`."""
+        keys = as_epoch_keys(datetimes)
+        return self._get_index().contains_many(keys) & ~not_a_time(datetimes)
+
+    def _merged_pairs(self) -> List[Pair]:
+        index = self._get_index()
+        if index.normalized:
+            return index.pairs()
+        # Running maximums of ends, from the index, merge like the original ends
+        return merge_pairs(zip(index.starts, index.ends))
+
+    @classmethod
+    def _from_pairs(
+        cls, pairs: List[Pair], /, tz: Optional[tzinfo]
+    ) -> "DatetimeRanges":
+        tz = timezone.utc if tz is None else tz
+        datetime_ranges = cls()
+        datetime_ranges._set_ranges(
+            [
+                DatetimeRange._trusted(key_to_datetime(s, tz), key_to_datetime(e, tz))
+                for s, e in pairs
+            ],
+            pairs,
+        )
+        return datetime_ranges
+
+    @staticmethod
+    def _sources(
+        datetime_ranges: Iterable["DatetimeRanges"], /
+    ) -> Tuple[Optional[tzinfo], List[List[Pair]]]:
+        # Timezone of the first range, and the merged pairs of each
+        tz = None
+        sources: List[List[Pair]] = []
+        for ranges in datetime_ranges:
+            if tz is None and ranges.datetime_ranges:
+                tz = ranges.datetime_ranges[0].start.tzinfo
+            sources.append(ranges._merged_pairs())
+        return tz, sources
+
+    @classmethod
+    def union_all(
+        cls, datetime_ranges: Iterable["DatetimeRanges"], /
+    ) -> "DatetimeRanges":
+        """Union of all `datetime_ranges`, in a single k-way merge.
+
+        Results are in the timezone of the first range, like `to_bytes`.
+        """
+        tz, sources = cls._sources(datetime_ranges)
+        return cls._from_pairs(union_all_pairs(sources), tz)
+
+    @classmethod
+    def intersection_all(
+        cls, datetime_ranges: Iterable["DatetimeRanges"], /
+    ) -> "DatetimeRanges":
+        """Intersection of all `datetime_ranges`, in a single sweep, see `at_least`."""
+        tz, sources = cls._sources(datetime_ranges)
+        if not sources:
+            raise ValueError("At least one `DatetimeRanges` is required")
+        return cls._from_pairs(at_least_pairs(sources, k=len(sources)), tz)
+
+    @classmethod
+    def at_least(
+        cls, datetime_ranges: Iterable["DatetimeRanges"], /, k: int
+    ) -> "DatetimeRanges":
+        """Instants covered by at least `k` of `datetime_ranges`, in a single sweep."""
+        tz, sources = cls._sources(datetime_ranges)
+        return cls._from_pairs(at_least_pairs(sources, k=k), tz)
+
+    def duration(self) -> timedelta:
+        """Total time covered, overlaps counted once."""
+        return measure(self._merged_pairs()) * _US
+
+    def gaps(self, window: Optional[DatetimeRange] = None, /) -> "DatetimeRanges":
+        """What's not covered in `window`, by default from the first start to the
+        last end, what `difference` would give."""
+        pairs = self._merged_pairs()
+        if window is not None:
+            bounds = window._keys()
+            tz = window.start.tzinfo
+        elif pairs:
+            bounds = (pairs[0][0], pairs[-1][1])
+            tz = self.datetime_ranges[0].start.tzinfo
+        else:
+            return DatetimeRanges()
+
+        return self._from_pairs(subtract_pairs([bounds], pairs), tz)
+
+    def coverage(self, window: DatetimeRange, /) -> float:
+        """Fraction of `window` that is covered, in a single pass.
+
+        For an empty window, whether its single instant is covered.
+        """
+        start, end = window._keys()
+        if start == end:
+            return float(self._get_index().contains_point(start))
+        pairs = intersect_pairs(self._merged_pairs(), [(start, end)])
+        return measure(pairs) / (end - start)
+
+    def coverage_many(self, starts: Any, ends: Any, /) -> "np.ndarray":
+        """Vectorized `coverage` of the windows from `starts` to `ends`.
+
+        Takes the same arrays as `contains_many`, and uses prefix sums, so it's
+        O((n + w) log n) for `w` windows.
+        """
+        np = import_numpy()
+        start_keys, end_keys = as_epoch_keys(starts), as_epoch_keys(ends)
+        lengths = end_keys - start_keys
+        if (lengths < 0).any():
+            raise ValueError("Windows must not end before they start")
+        covered = measure_many(self._merged_pairs(), start_keys, end_keys)
+        return np.where(
+            lengths > 0,
+            covered / np.where(lengths > 0, lengths, 1),
+            self._get_index().contains_many(start_keys),
+        )
@@ -0,0 +1,277 @@
+from datetime import datetime, time, tzinfo
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Optional, Tuple, TypeVar, Union
+from weakref import WeakValueDictionary
+
+import attr
+from timematic.enums import Weekday
+
+from ._compiled import CompiledWeekRange
+from ._datetimeranges import DatetimeRange, DatetimeRanges
+from ._intervals import IntervalIndex, Pair, intersect_pairs, union_pairs
+from ._keys import US_IN_DAY, time_to_key
+from ._timeranges import TimeRange, TimeRanges, WeekRange
+
+# How many results of operations between frozen ranges are kept around, least
+# recently used first out
+MEMO_SIZE = 4096
+
+_T = TypeVar("_T")
+
+# Instances by content, so that equal ones are the same object while one is alive
+_interned: "WeakValueDictionary[Any, Any]" = WeakValueDictionary()
+_interned_lock = Lock()
+
+
+def _intern(instance: _T, /, key: Tuple[Any, ...]) -> _T:
+    # `key` mustn't refer to `instance`, or it would never be dropped
+    with _interned_lock:
+        return _interned.setdefault((type(instance), *key), instance)
+
+
+@attr.frozen(cache_hash=True)
+class FrozenTimeRanges:
+    """Immutable and hashable form of `TimeRanges`, merged, and interned by content.
+
+    Create them with `from_time_ranges` or `from_pairs`, so that equal ranges share
+    the same object and, through it, the memoized results of operations on them.
+    """
+
+    pairs: Tuple[Pair, ...]
+    _index: Optional[IntervalIndex] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+
+    @classmethod
+    def from_pairs(cls, pairs: Tuple[Pair, ...], /) -> "FrozenTimeRanges":
+        """Interned instance, from merged pairs of keys."""
+        return _intern(cls(pairs), key=(pairs,))
+
+    @classmethod
+    def from_time_ranges(cls, time_ranges: TimeRanges, /) -> "FrozenTimeRanges":
+        time_ranges.validate()
+        return cls.from_pairs(tuple(time_ranges._merged_pairs()))
+
+    def to_time_ranges(self) -> TimeRanges:
+        return TimeRanges._from_pairs(list(self.pairs))
+
+    def __reduce__(self) -> Tuple[Any, Tuple[Tuple[Pair, ...]]]:
+        return type(self).from_pairs, (self.pairs,)
+
+    def __bool__(self) -> bool:
+        return bool(self.pairs)
+
+    def _get_index(self) -> IntervalIndex:
+        index = self._index
+        if index is None:
+            index = IntervalIndex.from_pairs(list(self.pairs))
+            object.__setattr__(self, "_index", index)
+        return index
+
+    def _contains_frozen_time_ranges(self, other: "FrozenTimeRanges", /) -> bool:
+        return _contains_time_ranges(self, other)
+
+    _contains_types = Union[time, TimeRange, "FrozenTimeRanges"]
+
+    def contains(self, other: _contains_types, /) -> bool:
+        if isinstance(other, time):
+            return self._get_index().contains_point(time_to_key(other))
+        elif isinstance(other, TimeRange):
+            return self._get_index().contains_pair(*other._keys())
+        elif isinstance(other, FrozenTimeRanges):
+            return self._contains_frozen_time_ranges(other)
+        else:
+            raise TypeError
+
+    def __contains__(self, other: _contains_types) -> bool:
+        return self.contains(other)
+
+    def union(self, other: "FrozenTimeRanges", /) -> "FrozenTimeRanges":
+        return _union_time_ranges(self, other)
+
+    def __or__(self, other: "FrozenTimeRanges") -> "FrozenTimeRanges":
+        return (
+            self.union(other) if isinstance(other, FrozenTimeRanges) else NotImplemented
+        )
+
+    def intersection(self, other: "FrozenTimeRanges", /) -> "FrozenTimeRanges":
+        return _intersection_time_ranges(self, other)
+
+    def __and__(self, other: "FrozenTimeRanges") -> "FrozenTimeRanges":
+        return (
+            self.intersection(other)
+            if isinstance(other, FrozenTimeRanges)
+            else NotImplemented
+        )
+
+
+# Memoized by content, cheap to look up, as hashes are cached and equal instances
+# are usually the same object
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _union_time_ranges(a: FrozenTimeRanges, b: FrozenTimeRanges, /) -> FrozenTimeRanges:
+    return FrozenTimeRanges.from_pairs(tuple(union_pairs(a.pairs, b.pairs)))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _intersection_time_ranges(
+    a: FrozenTimeRanges, b: FrozenTimeRanges, /
+) -> FrozenTimeRanges:
+    return FrozenTimeRanges.from_pairs(tuple(intersect_pairs(a.pairs, b.pairs)))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _contains_time_ranges(a: FrozenTimeRanges, b: FrozenTimeRanges, /) -> bool:
+    index = a._get_index()
+    return all(index.contains_pair(start, end) for start, end in b.pairs)
+
+
+_EMPTY = FrozenTimeRanges.from_pairs(())
+
+
+@attr.frozen(cache_hash=True)
+class FrozenWeekRange:
+    """Immutable and hashable form of `WeekRange`, interned by content.
+
+    Days are `FrozenTimeRanges`, from Monday to Sunday, so equal days are shared
+    between week ranges too. See `FrozenTimeRanges`.
+    """
+
+    days: Tuple[FrozenTimeRanges, ...]
+    timezone: Optional[tzinfo] = None
+    _compiled: Optional[CompiledWeekRange] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+
+    @classmethod
+    def from_days(
+        cls, days: Tuple[FrozenTimeRanges, ...], /, timezone: Optional[tzinfo] = None
+    ) -> "FrozenWeekRange":
+        """Interned instance, from the ranges of all 7 days."""
+        assert len(days) == 7, "There must be a range for each day of the week"
+        return _intern(cls(days, timezone), key=(days, timezone))
+
+    @classmethod
+    def from_week_range(cls, week_range: WeekRange, /) -> "FrozenWeekRange":
+        week_range.validate()
+        day_ranges = week_range.day_ranges
+        return cls.from_days(
+            tuple(
+                FrozenTimeRanges.from_time_ranges(day_ranges[weekday])
+                if weekday in day_ranges
+                else _EMPTY
+                for weekday in Weekday
+            ),
+            timezone=week_range.timezone,
+        )
+
+    def to_week_range(self) -> WeekRange:
+        return WeekRange(
+            {
+                weekday: day.to_time_ranges()
+                for weekday, day in zip(Weekday, self.days)
+                if day
+            },
+            timezone=self.timezone,
+        )
+
+    def __reduce__(self) -> Tuple[Any, Tuple[Any, ...]]:
+        return type(self).from_days, (self.days, self.timezone)
+
+    def __bool__(self) -> bool:
+        return any(self.days)
+
+    def compile(self) -> CompiledWeekRange:
+        """Flattened into a single index, see `WeekRange.compile`."""
+        compiled = self._compiled
+        if compiled is None:
+            compiled = CompiledWeekRange.from_pairs(
+                [
+                    (weekday * US_IN_DAY + start, weekday * US_IN_DAY + end)
+                    for weekday, day in enumerate(self.days)
+                    for start, end in day.pairs
+                ],
+                timezone=self.timezone,
+            )
+            object.__setattr__(self, "_compiled", compiled)
+        return compiled
+
+    def _assert_timezone(self, other: "FrozenWeekRange", /) -> None:
+        WeekRange._assert_timezones(self.timezone, other.timezone)
+
+    _contains_types = Union[datetime, DatetimeRange, "FrozenWeekRange"]
+
+    def contains(self, other: _contains_types, /) -> bool:
+        if isinstance(other, (datetime, DatetimeRange)):
+            return self.compile().contains(other)
+        elif isinstance(other, FrozenWeekRange):
+            self._assert_timezone(other)
+            return _contains_week_range(self, other)
+        else:
+            raise TypeError
+
+    def __contains__(self, other: _contains_types) -> bool:
+        return self.contains(other)
+
+    def union(self, other: "FrozenWeekRange", /) -> "FrozenWeekRange":
+        self._assert_timezone(other)
+        return _union_week_range(self, other)
+
+    def __or__(self, other: "FrozenWeekRange") -> "FrozenWeekRange":
+        return (
+            self.union(other) if isinstance(other, FrozenWeekRange) else NotImplemented
+        )
+
+    def intersection(self, other: "FrozenWeekRange", /) -> "FrozenWeekRange":
+        self._assert_timezone(other)
+        return _intersection_week_range(self, other)
+
+    def __and__(self, other: "FrozenWeekRange") -> "FrozenWeekRange":
+        return (
+            self.intersection(other)
+            if isinstance(other, FrozenWeekRange)
+            else NotImplemented
+        )
+
+    _has_transition_types = Union["FrozenWeekRange", DatetimeRange, DatetimeRanges]
+
+    def has_transition(self, other: _has_transition_types) -> bool:
+        """See `WeekRange.has_transition`, memoized for frozen week ranges."""
+        if isinstance(other, DatetimeRange):
+            other = FrozenWeekRange.from_week_range(
+                WeekRange.from_datetime_range(other, replace_timezone=self.timezone)
+            )
+        elif isinstance(other, DatetimeRanges):
+            other = FrozenWeekRange.from_week_range(
+                WeekRange.from_datetime_ranges(other, replace_timezone=self.timezone)
+            )
+        elif not isinstance(other, FrozenWeekRange):
+            raise TypeError
+        self._assert_timezone(other)
+        return _has_transition(self, other)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _union_week_range(a: FrozenWeekRange, b: FrozenWeekRange, /) -> FrozenWeekRange:
+    days = tuple(x | y for x, y in zip(a.days, b.days))
+    return FrozenWeekRange.from_days(days, timezone=a.timezone)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _intersection_week_range(
+    a: FrozenWeekRange, b: FrozenWeekRange, /
+) -> FrozenWeekRange:
+    days = tuple(x & y for x, y in zip(a.days, b.days))
+    return FrozenWeekRange.from_days(days, timezone=a.timezone)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _contains_week_range(a: FrozenWeekRange, b: FrozenWeekRange, /) -> bool:
+    return all(y in x for x, y in zip(a.days, b.days))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _has_transition(a: FrozenWeekRange, b: FrozenWeekRange, /) -> bool:
+    return not _contains_week_range(a, b) and bool(_intersection_week_range(a, b))
@@ -0,0 +1,167 @@
+import sys
+from functools import wraps
+from importlib import import_module
+from time import perf_counter_ns
+from types import TracebackType
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple, Type
+
+import attr
+
+# Instrumented functions, as `(module, class, name)`, with `class` empty for module
+# level functions
+_TARGETS: List[Tuple[str, str, str]] = [
+    ("_timeranges", "TimeRange", "contains"),
+    ("_timeranges", "TimeRange", "intersection"),
+    ("_timeranges", "TimeRanges", "merge"),
+    ("_timeranges", "TimeRanges", "merged"),
+    ("_timeranges", "TimeRanges", "contains"),
+    ("_timeranges", "TimeRanges", "intersection"),
+    ("_timeranges", "WeekRange", "merge"),
+    ("_timeranges", "WeekRange", "contains"),
+    ("_timeranges", "WeekRange", "intersection"),
+    ("_timeranges", "WeekRange", "has_transition"),
+    ("_timeranges", "WeekRange", "from_datetime_range"),
+    ("_timeranges", "WeekRange", "from_datetime_ranges"),
+    ("_timeranges", "WeekRange", "compile"),
+    ("_datetimeranges", "DatetimeRange", "contains"),
+    ("_datetimeranges", "DatetimeRanges", "merge"),
+    ("_datetimeranges", "DatetimeRanges", "merged"),
+    ("_datetimeranges", "DatetimeRanges", "contains"),
+    ("_compact", "CompactDatetimeRanges", "merged"),
+    ("_compact", "CompactDatetimeRanges", "contains"),
+    ("_compact", "CompactDatetimeRanges", "intersection"),
+    # Cache misses, `WeekRange.compile` and `offset_table` only build on those
+    ("_compiled", "CompiledWeekRange", "from_pairs"),
+    ("_tz", "OffsetTable", "build"),
+    # Offset tables loading more years, which is what costs calls into `tzinfo`
+    ("_tz", "OffsetTable", "_extend"),
+    # Timezone conversions through `tzinfo`, outside of offset tables
+    ("_tz", "", "utc_offset_key"),
+]
+
+
+def _size(value: Any, /) -> int:
+    # Elements of a collection, 0 for anything else
+    from ._compact import CompactDatetimeRanges
+    from ._datetimeranges import DatetimeRanges
+    from ._timeranges import TimeRanges, WeekRange
+
+    if isinstance(value, TimeRanges):
+        return len(value.time_ranges)
+    elif isinstance(value, DatetimeRanges):
+        return len(value.datetime_ranges)
+    elif isinstance(value, WeekRange):
+        return sum(len(ranges.time_ranges) for ranges in value.day_ranges.values())
+    elif isinstance(value, (CompactDatetimeRanges, list)):
+        return len(value)
+    return 0
+
+
+@attr.define
+class Counters:
+    calls: int = 0
+    # Sum of the sizes of the collections passed in, including `self`
+    elements: int = 0
+    # Net number of memory blocks allocated, see `sys.getallocatedblocks`
+    allocated_blocks: int = 0
+    time_ns: int = 0
+
+
+@attr.define
+class Instrumentation:
+    """Opt-in counters for the hot paths of range operations.
+
+    Functions are only wrapped while enabled, so there's no cost at all otherwise.
+    Only one instance can be enabled at a time, either with `enable` and `disable`,
+    or as a context manager. Times include nested instrumented calls, and counters
+    aren't locked across threads.
+    """
+
+    counters: Dict[str, Counters] = attr.ib(factory=dict)
+    _originals: Dict[Tuple[str, str, str], Any] = attr.ib(
+        init=False, factory=dict, eq=False, repr=False
+    )
+
+    # The enabled instance, if any
+    _enabled: ClassVar[Optional["Instrumentation"]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return Instrumentation._enabled is self
+
+    def _wrap(self, function: Callable[..., Any], name: str, /) -> Callable[..., Any]:
+        counters = self.counters.setdefault(name, Counters())
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            counters.calls += 1
+            counters.elements += sum(map(_size, args))
+            blocks = sys.getallocatedblocks()
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                counters.time_ns += perf_counter_ns() - start
+                counters.allocated_blocks += sys.getallocatedblocks() - blocks
+
+        return wrapper
+
+    def enable(self) -> None:
+        if Instrumentation._enabled is not None:
+            raise RuntimeError("Instrumentation is already enabled")
+        for target in _TARGETS:
+            module_name, class_name, name = target
+            module = import_module(f"{__package__}.{module_name}")
+            if class_name:
+                owner = getattr(module, class_name)
+                original = owner.__dict__[name]
+                if isinstance(original, classmethod):
+                    wrapped: Any = classmethod(
+                        self._wrap(original.__func__, f"{class_name}.{name}")
+                    )
+                else:
+                    wrapped = self._wrap(original, f"{class_name}.{name}")
+            else:
+                owner = module
+                original = getattr(module, name)
+                wrapped = self._wrap(original, name)
+            self._originals[target] = original
+            setattr(owner, name, wrapped)
+        Instrumentation._enabled = self
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        for target, original in self._originals.items():
+            module_name, class_name, name = target
+            owner = import_module(f"{__package__}.{module_name}")
+            if class_name:
+                owner = getattr(owner, class_name)
+            setattr(owner, name, original)
+        self._originals.clear()
+        Instrumentation._enabled = None
+
+    def reset(self) -> None:
+        for counters in self.counters.values():
+            counters.calls = counters.elements = 0
+            counters.allocated_blocks = counters.time_ns = 0
+
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        """Counters of the functions called at least once, by qualified name."""
+        return {
+            name: attr.asdict(counters)
+            for name, counters in self.counters.items()
+            if counters.calls
+        }
+
+    def __enter__(self) -> "Instrumentation":
+        self.enable()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.disable()
@@ -0,0 +1,368 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import count, groupby
+from operator import itemgetter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    SupportsIndex,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
+
+import attr
+
+from ._numpy import import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Closed intervals over integer keys, as `(start, end)` pairs
+Pair = Tuple[int, int]
+
+_T = TypeVar("_T")
+
+# Stamps of the states of `RangeList`s, unique across all of them, so that a new list
+# can't be mistaken for the one an index was built from
+_stamps = count()
+
+
+class RangeList(List[_T]):
+    """A `list` that gets a new stamp whenever it's modified, see `IntervalIndex`.
+
+    Ranges edited in place, by assigning their `start` or `end`, don't change the
+    list, `touch` it afterwards.
+    """
+
+    __slots__ = ("stamp",)
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.stamp = next(_stamps)
+
+    def __reduce__(self) -> Tuple[Any, Tuple[List[_T]]]:
+        # Stamps are only unique within a process
+        return type(self), (list(self),)
+
+    def touch(self) -> None:
+        """Get a new stamp, for changes the list can't see."""
+        self.stamp = next(_stamps)
+
+    def __setitem__(self, i: Any, value: Any) -> None:
+        super().__setitem__(i, value)
+        self.stamp = next(_stamps)
+
+    def __delitem__(self, i: Any) -> None:
+        super().__delitem__(i)
+        self.stamp = next(_stamps)
+
+    def __iadd__(self, values: Iterable[_T]) -> "RangeList[_T]":  # type: ignore[override, misc]
+        super().__iadd__(values)
+        self.stamp = next(_stamps)
+        return self
+
+    def __imul__(self, n: SupportsIndex) -> "RangeList[_T]":
+        super().__imul__(n)
+        self.stamp = next(_stamps)
+        return self
+
+    def append(self, value: _T) -> None:
+        super().append(value)
+        self.stamp = next(_stamps)
+
+    def extend(self, values: Iterable[_T]) -> None:
+        super().extend(values)
+        self.stamp = next(_stamps)
+
+    def insert(self, i: SupportsIndex, value: _T) -> None:
+        super().insert(i, value)
+        self.stamp = next(_stamps)
+
+    def pop(self, i: SupportsIndex = -1) -> _T:
+        self.stamp = next(_stamps)
+        return super().pop(i)
+
+    def remove(self, value: _T) -> None:
+        super().remove(value)
+        self.stamp = next(_stamps)
+
+    def clear(self) -> None:
+        super().clear()
+        self.stamp = next(_stamps)
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        super().sort(*args, **kwargs)
+        self.stamp = next(_stamps)
+
+    def reverse(self) -> None:
+        super().reverse()
+        self.stamp = next(_stamps)
+
+
+def as_range_list(ranges: Iterable[_T], /) -> RangeList[_T]:
+    """Converter of the lists of collections, so that their indexes can track them."""
+    return ranges if isinstance(ranges, RangeList) else RangeList(ranges)
+
+
+@attr.frozen
+class IntervalIndex:
+    """Sorted start keys with the running maximum of end keys.
+
+    `ends[i]` is the largest end among the first `i + 1` intervals, so a key is
+    contained in some interval iff the last interval starting before it reaches
+    it, which is a single bisect regardless of overlaps.
+    """
+
+    starts: List[int]
+    ends: List[int]
+    # Whether the intervals were already sorted and non-overlapping
+    normalized: bool
+    # Stamp of the list the index was built from
+    _stamp: Optional[int] = attr.ib(eq=False, repr=False)
+    # NumPy copies of `starts` and `ends`, built on the first batch lookup
+    _arrays: Optional[Tuple["np.ndarray", "np.ndarray"]] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+
+    @classmethod
+    def from_pairs(
+        cls, pairs: List[Pair], /, source: Optional[RangeList[Any]] = None
+    ) -> "IntervalIndex":
+        starts: List[int] = []
+        ends: List[int] = []
+        normalized = True
+        for start, end in pairs:
+            if ends and start <= ends[-1]:
+                normalized = False
+                break
+            starts.append(start)
+            ends.append(end)
+
+        if not normalized:
+            starts.clear()
+            ends.clear()
+            for start, end in sorted(pairs):
+                starts.append(start)
+                ends.append(max(end, ends[-1]) if ends else end)
+
+        stamp = None if source is None else source.stamp
+        return cls(starts, ends, normalized, stamp)
+
+    def matches(self, source: RangeList[Any], /) -> bool:
+        """Whether `source` is as it was when indexing it, see `RangeList`."""
+        return self._stamp == source.stamp
+
+    def contains_point(self, key: int, /) -> bool:
+        i = bisect_right(self.starts, key)
+        return bool(i) and self.ends[i - 1] >= key
+
+    def contains_pair(self, start: int, end: int, /) -> bool:
+        i = bisect_right(self.starts, start)
+        return bool(i) and self.ends[i - 1] >= end
+
+    def contains_many(self, keys: "np.ndarray", /) -> "np.ndarray":
+        np = import_numpy()
+        arrays = self._arrays
+        if arrays is None:
+            # Pad `ends` so that keys before the first start look up a sentinel
+            sentinel = np.iinfo(np.int64).min
+            arrays = (
+                np.array(self.starts, dtype=np.int64),
+                np.array([sentinel, *self.ends], dtype=np.int64),
+            )
+            object.__setattr__(self, "_arrays", arrays)
+        starts, ends = arrays
+        return ends[np.searchsorted(starts, keys, side="right")] >= keys
+
+    def pairs(self) -> List[Pair]:
+        assert self.normalized, "Only normalized indexes map back to their pairs"
+        return list(zip(self.starts, self.ends))
+
+    def overlapping(self, start: int, end: int, /) -> Tuple[int, int]:
+        """Slice of the intervals overlapping `[start, end]`."""
+        assert self.normalized, "Only normalized indexes have sorted ends"
+        return bisect_left(self.ends, start), bisect_right(self.starts, end)
+
+    def splice(
+        self, i: int, j: int, pairs: List[Pair], /, source: RangeList[Any]
+    ) -> "IntervalIndex":
+        """Replace the intervals `[i:j]`, along with `source`, keeping it merged.
+
+        Takes over the lists of this index, which mustn't be used anymore.
+        """
+        assert self.normalized, "Only normalized indexes can be spliced"
+        self.starts[i:j] = [start for start, _ in pairs]
+        self.ends[i:j] = [end for _, end in pairs]
+        return type(self)(self.starts, self.ends, True, source.stamp)
+
+
+def pairs_of(ranges: Iterable[Any], /) -> List[Pair]:
+    return [r._keys() for r in ranges]
+
+
+class PairView(Sequence[Pair]):
+    """Read-only pairs over two parallel sequences of keys, without copying them."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, starts: Sequence[int], ends: Sequence[int]) -> None:
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @overload
+    def __getitem__(self, i: int) -> Pair:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> "PairView":
+        ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Pair, "PairView"]:
+        if isinstance(i, slice):
+            return PairView(self.starts[i], self.ends[i])
+        return self.starts[i], self.ends[i]
+
+    def __iter__(self) -> Iterator[Pair]:
+        return zip(self.starts, self.ends)
+
+
+# The following operate on sorted lists of pairs, and all but `merge_pairs` expect
+# them to be merged already (sorted, non-overlapping), which makes them O(n + m)
+
+
+def merge_pairs(pairs: Iterable[Pair], /, gap: int = 0) -> List[Pair]:
+    merged: List[Pair] = []
+    for start, end in pairs:
+        if merged:
+            last_start, last_end = merged[-1]
+            if start - last_end <= gap:
+                if end > last_end:
+                    merged[-1] = (last_start, end)
+                continue
+        merged.append((start, end))
+    return merged
+
+
+def union_pairs(a: Sequence[Pair], b: Sequence[Pair], /) -> List[Pair]:
+    return merge_pairs(heapq.merge(a, b))
+
+
+def intersect_pairs(a: Sequence[Pair], b: Sequence[Pair], /) -> List[Pair]:
+    result: List[Pair] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        a_start, a_end = a[i]
+        b_start, b_end = b[j]
+        start = max(a_start, b_start)
+        end = min(a_end, b_end)
+        if start <= end:
+            result.append((start, end))
+        # Advance whichever finishes first, the other may still overlap
+        if a_end < b_end:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def subtract_pairs(a: Sequence[Pair], b: Sequence[Pair], /) -> List[Pair]:
+    # Keys are discrete, so removing `[s, e]` leaves `[..., s - 1]` and `[e + 1, ...]`
+    result: List[Pair] = []
+    j = 0
+    for start, end in a:
+        while j < len(b) and b[j][1] < start:
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] <= end and start <= end:
+            b_start, b_end = b[k]
+            if b_start > start:
+                result.append((start, b_start - 1))
+            start = max(start, b_end + 1)
+            k += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def symmetric_difference_pairs(a: Sequence[Pair], b: Sequence[Pair], /) -> List[Pair]:
+    return list(heapq.merge(subtract_pairs(a, b), subtract_pairs(b, a)))
+
+
+def union_all_pairs(sources: Iterable[Sequence[Pair]], /) -> List[Pair]:
+    # A single k-way merge, O(n log k) for `n` pairs from `k` sources
+    return merge_pairs(heapq.merge(*sources))
+
+
+def _depth_events(pairs: Sequence[Pair], /) -> Iterator[Tuple[int, int]]:
+    # Entering at starts and leaving right after ends, in order for merged pairs
+    for start, end in pairs:
+        yield start, 1
+        yield end + 1, -1
+
+
+def at_least_pairs(sources: Iterable[Sequence[Pair]], /, k: int) -> List[Pair]:
+    """Keys covered by at least `k` of `sources`, in O(n log m) for `n` pairs from
+    `m` sources, with a single sweep over their depth."""
+    assert k > 0, "At least one source must cover each key"
+    result: List[Pair] = []
+    depth = 0
+    start = 0
+    events = heapq.merge(*map(_depth_events, sources))
+    for key, deltas in groupby(events, key=itemgetter(0)):
+        before = depth
+        depth += sum(delta for _, delta in deltas)
+        if before < k <= depth:
+            start = key
+        elif depth < k <= before:
+            result.append((start, key - 1))
+    return result
+
+
+def measure(pairs: Iterable[Pair], /) -> int:
+    # Lengths as `end - start`, so that single keys don't count
+    return sum(end - start for start, end in pairs)
+
+
+def _covered_until(
+    pair_starts: "np.ndarray",
+    lengths: "np.ndarray",
+    before: "np.ndarray",
+    keys: "np.ndarray",
+    /,
+) -> "np.ndarray":
+    np = import_numpy()
+    # Every pair but the last one starting before a key is entirely before it
+    i = np.searchsorted(pair_starts, keys, side="right") - 1
+    last = np.maximum(i, 0)
+    partial = np.clip(keys - pair_starts[last], 0, lengths[last])
+    return np.where(i >= 0, before[last] + partial, 0)
+
+
+def measure_many(
+    pairs: Sequence[Pair], starts: "np.ndarray", ends: "np.ndarray", /
+) -> "np.ndarray":
+    """Length of each `[starts[i], ends[i]]` covered by merged `pairs`.
+
+    Uses prefix sums of the lengths of `pairs`, so it's O((n + w) log n) for `w`
+    windows.
+    """
+    np = import_numpy()
+    if not pairs:
+        return np.zeros(np.shape(starts), dtype=np.int64)
+    pair_starts = np.array([start for start, _ in pairs], dtype=np.int64)
+    lengths = np.array([end - start for start, end in pairs], dtype=np.int64)
+    # Covered length before each pair
+    before = np.concatenate(([0], np.cumsum(lengths)))
+    return _covered_until(pair_starts, lengths, before, ends) - _covered_until(
+        pair_starts, lengths, before, starts
+    )
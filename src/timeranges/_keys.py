@@ -0,0 +1,41 @@
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from typing import Optional, Union
+
+from timematic.constants import MIN_IN_H, S_IN_MIN, US_IN_S
+
+# Ranges are compared internally through integer keys:
+# - `time` -> microseconds since midnight
+# - `datetime` -> microseconds since the UTC epoch
+
+US_IN_MIN = S_IN_MIN * US_IN_S
+US_IN_DAY = 24 * MIN_IN_H * US_IN_MIN
+US_IN_WEEK = 7 * US_IN_DAY
+
+# The epoch fell on a Thursday
+EPOCH_WEEKDAY = 3
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+
+def time_to_key(t: Union[time, datetime], /) -> int:
+    # Only the wall time of datetimes is used
+    return (
+        (t.hour * MIN_IN_H + t.minute) * S_IN_MIN + t.second
+    ) * US_IN_S + t.microsecond
+
+
+def key_to_time(key: int, /, tz: Optional[tzinfo] = None) -> time:
+    s, us = divmod(key, US_IN_S)
+    m, s = divmod(s, S_IN_MIN)
+    h, m = divmod(m, MIN_IN_H)
+    return time(h, m, s, us, tz)
+
+
+def datetime_to_key(dt: datetime, /) -> int:
+    return (dt - _EPOCH) // _US
+
+
+def key_to_datetime(key: int, /, tz: tzinfo = timezone.utc) -> datetime:
+    dt = _EPOCH + timedelta(microseconds=key)
+    return dt if tz is timezone.utc else dt.astimezone(tz)
@@ -0,0 +1,54 @@
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
+
+from ._keys import US_IN_DAY
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# NumPy is an optional dependency, only imported when a batch API is used
+
+
+def import_numpy() -> ModuleType:
+    try:
+        import numpy
+    except ImportError as e:  # pragma: no cover
+        raise ImportError(
+            "NumPy is required for batch operations, "
+            "install it with `pip install timeranges[numpy]`"
+        ) from e
+    return numpy
+
+
+def as_epoch_keys(values: Any, /) -> "np.ndarray":
+    """Microseconds since the epoch from `datetime64` or integer arrays."""
+    np = import_numpy()
+    values = np.asarray(values)
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[us]").view(np.int64)
+    elif values.dtype.kind in "iu":
+        return values.astype(np.int64, copy=False)
+    else:
+        raise TypeError(f"Unsupported array type {values.dtype}")
+
+
+def as_time_keys(values: Any, /) -> "np.ndarray":
+    """Microseconds since midnight from `datetime64`, `timedelta64` or integer arrays."""
+    np = import_numpy()
+    values = np.asarray(values)
+    if values.dtype.kind == "M":
+        return as_epoch_keys(values) % US_IN_DAY
+    elif values.dtype.kind == "m":
+        return values.astype("timedelta64[us]").view(np.int64)
+    elif values.dtype.kind in "iu":
+        return values.astype(np.int64, copy=False)
+    else:
+        raise TypeError(f"Unsupported array type {values.dtype}")
+
+
+def not_a_time(values: Any, /) -> "np.ndarray":
+    np = import_numpy()
+    values = np.asarray(values)
+    if values.dtype.kind in "mM":
+        return np.isnat(values)
+    return np.zeros(values.shape, dtype=bool)
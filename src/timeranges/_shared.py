@@ -0,0 +1,80 @@
+from datetime import datetime
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
+
+import attr
+
+from ._datetimeranges import DatetimeRange, DatetimeRanges
+from ._frozen import FrozenWeekRange
+from ._timeranges import WeekRange
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def _snapshot(week_range: WeekRange, /) -> FrozenWeekRange:
+    snapshot = FrozenWeekRange.from_week_range(week_range)
+    # Built before publishing, so that readers don't have to
+    snapshot.compile().warm_up()
+    return snapshot
+
+
+@attr.define(init=False)
+class SharedWeekRange:
+    """A `WeekRange` that threads can read while another one edits it.
+
+    Readers look up the current snapshot, an immutable `FrozenWeekRange`, without
+    locking. Writers edit a private copy, and publish a new snapshot by replacing a
+    single reference, which is atomic, so readers see either the previous snapshot
+    or the new one, never one in between. Writers are serialized with a lock.
+    """
+
+    _snapshot: FrozenWeekRange
+    _lock: Lock = attr.ib(eq=False, repr=False)
+
+    def __init__(self, week_range: Optional[WeekRange] = None, /) -> None:
+        self._snapshot = _snapshot(WeekRange() if week_range is None else week_range)
+        self._lock = Lock()
+
+    @property
+    def snapshot(self) -> FrozenWeekRange:
+        """The current snapshot, keep it to run several lookups against the same one."""
+        return self._snapshot
+
+    def to_week_range(self) -> WeekRange:
+        """A mutable copy of the current snapshot."""
+        return self._snapshot.to_week_range()
+
+    def publish(self, week_range: WeekRange, /) -> None:
+        """Replace the whole week range, later changes to `week_range` aren't seen."""
+        snapshot = _snapshot(week_range)
+        with self._lock:
+            self._snapshot = snapshot
+
+    def update(self, edit: Callable[[WeekRange], Optional[WeekRange]], /) -> None:
+        """Call `edit` with a copy of the current week range, and publish the result.
+
+        `edit` can change the copy in place, or return a new week range. Concurrent
+        updates run one after the other, so that none of them is lost.
+        """
+        with self._lock:
+            week_range = self._snapshot.to_week_range()
+            result = edit(week_range)
+            self._snapshot = _snapshot(week_range if result is None else result)
+
+    _contains_types = Union[datetime, DatetimeRange, FrozenWeekRange]
+
+    def contains(self, other: _contains_types, /) -> bool:
+        return self._snapshot.contains(other)
+
+    def __contains__(self, other: _contains_types) -> bool:
+        return self.contains(other)
+
+    def contains_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `contains`, see `WeekRange.contains_many`."""
+        return self._snapshot.compile().contains_many(datetimes)
+
+    def has_transition(
+        self, other: Union[FrozenWeekRange, DatetimeRange, DatetimeRanges]
+    ) -> bool:
+        return self._snapshot.has_transition(other)
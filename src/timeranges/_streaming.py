@@ -0,0 +1,102 @@
+import heapq
+from datetime import time, timedelta
+from typing import Iterable, Iterator, Optional, Tuple, TypeVar
+
+from ._datetimeranges import DatetimeRange
+from ._intervals import Pair
+from ._timeranges import _TIME_MAX_KEY, TimeRange
+
+# Generators over ranges sorted by start, each holding a single range at a time
+
+_Range = TypeVar("_Range", TimeRange, DatetimeRange)
+
+_US = timedelta(microseconds=1)
+
+
+def _keyed(ranges: Iterable[_Range], /) -> Iterator[Tuple[Pair, _Range]]:
+    range_type: Optional[type] = None
+    last_start: Optional[int] = None
+    for r in ranges:
+        if range_type is None:
+            if not isinstance(r, (TimeRange, DatetimeRange)):
+                raise TypeError
+            range_type = type(r)
+        elif not isinstance(r, range_type):
+            raise TypeError
+        keys = r._keys()
+        if last_start is not None and keys[0] < last_start:
+            raise ValueError(f"Ranges must be sorted by start, {r} is out of order")
+        last_start = keys[0]
+        yield keys, r
+
+
+def merge_iter(
+    ranges: Iterable[_Range], /, interpolate: timedelta = timedelta(0)
+) -> Iterator[_Range]:
+    """Lazily merge ranges sorted by start, like `merge` but in constant memory.
+
+    Raises `ValueError` when a range starts before the previous one.
+    """
+    assert interpolate >= timedelta(0), "Interpolation must be positive"
+    gap = interpolate // _US
+    current: Optional[Tuple[_Range, _Range]] = None
+    current_end = 0
+    for (start, end), r in _keyed(ranges):
+        if current is not None:
+            if start - current_end <= gap:
+                if end > current_end:
+                    current = (current[0], r)
+                    current_end = end
+                continue
+            yield type(r)._trusted(current[0].start, current[1].end)
+        current = (r, r)
+        current_end = end
+
+    if current is not None:
+        first, last = current
+        if (
+            interpolate
+            and isinstance(last, TimeRange)
+            and _TIME_MAX_KEY - current_end <= gap
+        ):
+            yield type(last)._trusted(first.start, time.max)
+        else:
+            yield type(last)._trusted(first.start, last.end)
+
+
+def union_iter(
+    *sources: Iterable[_Range], interpolate: timedelta = timedelta(0)
+) -> Iterator[_Range]:
+    """Lazily merge several streams of ranges, each sorted by start."""
+    return merge_iter(
+        heapq.merge(*sources, key=lambda r: r._keys()[0]), interpolate=interpolate
+    )
+
+
+def _intersect_iter(a: Iterable[_Range], b: Iterable[_Range], /) -> Iterator[_Range]:
+    # Both are merged already, so this is `intersect_pairs` over streams
+    a_keyed, b_keyed = _keyed(a), _keyed(b)
+    a_item, b_item = next(a_keyed, None), next(b_keyed, None)
+    while a_item is not None and b_item is not None:
+        (a_start, a_end), a_range = a_item
+        (b_start, b_end), b_range = b_item
+        if max(a_start, b_start) <= min(a_end, b_end):
+            yield type(a_range)._trusted(
+                a_range.start if a_start >= b_start else b_range.start,
+                a_range.end if a_end <= b_end else b_range.end,
+            )
+        # Advance whichever finishes first, the other may still overlap
+        if a_end < b_end:
+            a_item = next(a_keyed, None)
+        else:
+            b_item = next(b_keyed, None)
+
+
+def intersection_iter(*sources: Iterable[_Range]) -> Iterator[_Range]:
+    """Lazily intersect several streams of ranges, each sorted by start."""
+    if not sources:
+        raise ValueError("At least one source is required")
+    result = merge_iter(sources[0])
+    for source in sources[1:]:
+        result = _intersect_iter(result, merge_iter(source))
+    return result
@@ -1,19 +1,73 @@
 from collections import defaultdict
-from copy import copy, deepcopy
+from copy import copy
 from datetime import datetime, time, timedelta, tzinfo
-from functools import reduce
-from itertools import product
-from typing import DefaultDict, Dict, List, Optional, Type, TypeVar, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    SupportsIndex,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import attr
 from timematic.enums import Weekday
-from timematic.utils import subtract_times
 
 from ._base import BaseRange
+from ._binary import (
+    TIME_RANGES,
+    WEEK_RANGE,
+    Buffer,
+    decode,
+    decode_pairs,
+    encode_pairs,
+    lossless_timezone_key,
+)
+from ._compiled import CompiledWeekRange
 from ._datetimeranges import DatetimeRange, DatetimeRanges
+from ._intervals import (
+    IntervalIndex,
+    Pair,
+    RangeList,
+    as_range_list,
+    at_least_pairs,
+    intersect_pairs,
+    measure,
+    merge_pairs,
+    pairs_of,
+    subtract_pairs,
+    symmetric_difference_pairs,
+    union_all_pairs,
+    union_pairs,
+)
+from ._keys import (
+    EPOCH_WEEKDAY,
+    US_IN_DAY,
+    US_IN_WEEK,
+    datetime_to_key,
+    key_to_datetime,
+    key_to_time,
+    time_to_key,
+)
+from ._numpy import as_time_keys, not_a_time
+from ._tz import DEFAULT_HORIZON, offset_table
+
+if TYPE_CHECKING:
+    import numpy as np
 
 _T_TimeRange = TypeVar("_T_TimeRange", bound="TimeRange")
 
+_US = timedelta(microseconds=1)
+_TIME_MAX_KEY = time_to_key(time.max)
+_TIMEZONE_REF = datetime(2000, 1, 1)
+
 
 @attr.define(order=True, on_setattr=attr.setters.validate)
 class TimeRange(BaseRange):
@@ -49,10 +103,23 @@ class TimeRange(BaseRange):
 
         self._validate_range(self.start, self.end)
 
-    def __attrs_post_init__(self) -> None:
-        self.validate()
+    # The field validators already run on `__init__`, no need to validate again
+
+    @classmethod
+    def _trusted(cls: Type[_T_TimeRange], start: time, end: time) -> _T_TimeRange:
+        # Skips validation entirely, only for ranges that are valid by construction
+        time_range = object.__new__(cls)
+        _set_time_range_start(time_range, start)
+        _set_time_range_end(time_range, end)
+        return time_range
+
+    def _keys(self) -> Tuple[int, int]:
+        # Not cached, collections keep the keys of their ranges in their index, and a
+        # tuple per range would more than double its size
+        return time_to_key(self.start), time_to_key(self.end)
 
     def _contains_time(self, other: time, /) -> bool:
+        # Comparing times is faster than converting `other` to a key
         return self.start <= other <= self.end
 
     def _contains_time_range(self, other: "TimeRange", /) -> bool:
@@ -72,18 +139,56 @@ class TimeRange(BaseRange):
     def __contains__(self, other: _contains_types) -> bool:
         return self.contains(other)
 
+    def contains_many(self, times: Any, /) -> "np.ndarray":
+        """Vectorized `contains` over an array of times of day.
+
+        Accepts `datetime64` (only their time of day is used), `timedelta64` since
+        midnight or integer microseconds since midnight, and requires NumPy.
+        """
+        keys = as_time_keys(times)
+        start, end = self._keys()
+        return (start <= keys) & (keys <= end) & ~not_a_time(times)
+
     def intersection(self, other: "TimeRange", /) -> Optional["TimeRange"]:
         start = max(self.start, other.start)
         end = min(self.end, other.end)
-        return TimeRange(start, end) if start <= end else None
+        return TimeRange._trusted(start, end) if start <= end else None
 
     def __and__(self, other: "TimeRange") -> Optional["TimeRange"]:
         return self.intersection(other)
 
 
+# Bypass the validating `__setattr__`, straight to the slots
+_set_time_range_start = TimeRange.__dict__["start"].__set__
+_set_time_range_end = TimeRange.__dict__["end"].__set__
+
+
+def _day_measure(pairs: List[Pair], /) -> int:
+    # Like `measure`, with `time.max` being the end of the day rather than just before
+    return measure(pairs) + sum(1 for _, end in pairs if end == _TIME_MAX_KEY)
+
+
+def _reset_index(
+    instance: "TimeRanges", attribute: attr.Attribute, value: RangeList[TimeRange]
+) -> RangeList[TimeRange]:
+    instance._index = None
+    return value
+
+
 @attr.define
 class TimeRanges(BaseRange):
-    time_ranges: List[TimeRange] = attr.Factory(list)
+    def _convert_time_ranges(time_ranges: Iterable[TimeRange]) -> RangeList[TimeRange]:  # type: ignore
+        return as_range_list(time_ranges)
+
+    # Always a `RangeList`, so that the index can tell when it's modified
+    time_ranges: RangeList[TimeRange] = attr.ib(
+        factory=RangeList,
+        converter=_convert_time_ranges,
+        on_setattr=[attr.setters.convert, _reset_index],
+    )
+    _index: Optional[IntervalIndex] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
 
     def validate(self) -> None:
         for time_range in self.time_ranges:
@@ -92,31 +197,50 @@ class TimeRanges(BaseRange):
     def sort(self) -> None:
         self.validate()
         self.time_ranges.sort()
+        self._index = None
+
+    def _merged_pairs(self, interpolate: timedelta = timedelta(0)) -> List[Pair]:
+        index = self._index
+        if (
+            not interpolate
+            and index is not None
+            and index.normalized
+            and index.matches(self.time_ranges)
+        ):
+            return index.pairs()
 
-    def merge(self, interpolate: timedelta = timedelta(0)) -> None:
-        assert interpolate >= timedelta(0), "Interpolation must be positive"
-        self.sort()
-        time_ranges = deepcopy(self.time_ranges)
-        aux: List[TimeRange] = []
-
-        # Merge overlapping time ranges
-        for time_range in time_ranges:
-            if not aux:
-                aux.append(time_range)
-                continue
-            aux_last = aux[-1]
-            if subtract_times(time_range.start, aux_last.end) <= interpolate:
-                if time_range.end > aux_last.end:
-                    aux_last.end = time_range.end
-            else:
-                aux.append(time_range)
+        gap = interpolate // _US
+        pairs = merge_pairs(sorted(pairs_of(self.time_ranges)), gap=gap)
 
         # Interpolate to `time.max`
-        if interpolate and subtract_times(time.max, aux[-1].end) <= interpolate:
-            aux[-1].end = time.max
+        if interpolate and pairs and _TIME_MAX_KEY - pairs[-1][1] <= gap:
+            pairs[-1] = (pairs[-1][0], _TIME_MAX_KEY)
 
-        self.time_ranges = aux
-        self.sort()
+        return pairs
+
+    def _set_pairs(self, pairs: List[Pair], /, tz: Optional[tzinfo] = None) -> None:
+        time_ranges: RangeList[TimeRange] = RangeList(
+            TimeRange._trusted(key_to_time(s, tz), key_to_time(e, tz)) for s, e in pairs
+        )
+        self.time_ranges = time_ranges
+        self._index = IntervalIndex.from_pairs(pairs, source=time_ranges)
+
+    @classmethod
+    def _from_pairs(cls, pairs: List[Pair], /) -> "TimeRanges":
+        time_ranges = cls()
+        time_ranges._set_pairs(pairs)
+        return time_ranges
+
+    def merge(self, interpolate: timedelta = timedelta(0)) -> None:
+        assert interpolate >= timedelta(0), "Interpolation must be positive"
+        self.validate()
+        self._set_pairs(self._merged_pairs(interpolate))
+
+    def merged(self, interpolate: timedelta = timedelta(0)) -> "TimeRanges":
+        """Like `merge`, but returns a new instance instead of modifying this one."""
+        assert interpolate >= timedelta(0), "Interpolation must be positive"
+        self.validate()
+        return self._from_pairs(self._merged_pairs(interpolate))
 
     def __attrs_post_init__(self) -> None:
         self.validate()
@@ -124,11 +248,100 @@ class TimeRanges(BaseRange):
     def __bool__(self) -> bool:
         return bool(self.time_ranges)
 
+    def to_bytes(self) -> bytes:
+        """Compact binary form, as integer keys, see `from_bytes`."""
+        return encode_pairs(TIME_RANGES, None, pairs_of(self.time_ranges))
+
+    @classmethod
+    def from_bytes(cls, data: Buffer, /) -> "TimeRanges":
+        """Load the output of `to_bytes`, trusting it without validating each range."""
+        tz, keys = decode(data, TIME_RANGES)
+        time_ranges = cls()
+        time_ranges._set_pairs(list(decode_pairs(keys)), tz)
+        return time_ranges
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Tuple[Any, Tuple[bytes]]:
+        return type(self).from_bytes, (self.to_bytes(),)
+
+    def _get_index(self) -> IntervalIndex:
+        # Rebuilt lazily whenever the list is replaced, sorted, merged or resized
+        index = self._index
+        time_ranges = self.time_ranges
+        if index is None or not index.matches(time_ranges):
+            index = IntervalIndex.from_pairs(pairs_of(time_ranges), source=time_ranges)
+            self._index = index
+        return index
+
+    @property
+    def is_normalized(self) -> bool:
+        """Whether the ranges are sorted and don't overlap."""
+        return self._get_index().normalized
+
+    def normalize(self) -> None:
+        """Sort and merge the ranges, and index them for fast lookups.
+
+        Also call it after editing ranges in place, by assigning their `start` or
+        `end`, which the index doesn't see otherwise.
+        """
+        self.time_ranges.touch()
+        if not self.is_normalized:
+            self.merge()
+        self._get_index()
+
+    def _splice(self, i: int, j: int, pairs: List[Pair], /) -> None:
+        index = self._get_index()
+        time_ranges = self.time_ranges
+        time_ranges[i:j] = [
+            TimeRange._trusted(key_to_time(s), key_to_time(e)) for s, e in pairs
+        ]
+        self._index = index.splice(i, j, pairs, source=time_ranges)
+
+    def add(self, time_range: TimeRange, /) -> None:
+        """Add a range, merging it with the ones it overlaps, in O(log n + k).
+
+        Normalizes first, if needed.
+        """
+        if not isinstance(time_range, TimeRange):
+            raise TypeError
+        time_range.validate()
+        self.normalize()
+        index = self._get_index()
+        start, end = time_range._keys()
+        i, j = index.overlapping(start, end)
+        if i < j:
+            start = min(start, index.starts[i])
+            end = max(end, index.ends[j - 1])
+        self._splice(i, j, [(start, end)])
+
+    def discard(self, time_range: TimeRange, /) -> None:
+        """Remove a range, trimming the ones it overlaps, in O(log n + k).
+
+        Normalizes first, if needed.
+        """
+        if not isinstance(time_range, TimeRange):
+            raise TypeError
+        time_range.validate()
+        self.normalize()
+        index = self._get_index()
+        start, end = time_range._keys()
+        i, j = index.overlapping(start, end)
+        if i == j:
+            return
+        # Keys are discrete, so what's left is `[..., start - 1]` and `[end + 1, ...]`
+        pairs: List[Pair] = []
+        if index.starts[i] < start:
+            pairs.append((index.starts[i], start - 1))
+        if index.ends[j - 1] > end:
+            pairs.append((end + 1, index.ends[j - 1]))
+        self._splice(i, j, pairs)
+
     def _contains_time(self, other: time, /) -> bool:
-        return any(other in time_range for time_range in self.time_ranges)
+        if other.tzinfo is not None:
+            raise TypeError(f"Time {other} has timezone info")
+        return self._get_index().contains_point(time_to_key(other))
 
     def _contains_time_range(self, other: TimeRange, /) -> bool:
-        return any(other in time_range for time_range in self.time_ranges)
+        return self._get_index().contains_pair(*other._keys())
 
     def _contains_time_ranges(self, other: "TimeRanges", /) -> bool:
         return all(
@@ -150,37 +363,153 @@ class TimeRanges(BaseRange):
     def __contains__(self, other: _contains_types) -> bool:
         return self.contains(other)
 
+    def contains_many(self, times: Any, /) -> "np.ndarray":
+        """Vectorized `contains`, see `TimeRange.contains_many`."""
+        keys = as_time_keys(times)
+        return self._get_index().contains_many(keys) & ~not_a_time(times)
+
     def union(self, other: "TimeRanges", /) -> "TimeRanges":
-        time_ranges_list = self.time_ranges + other.time_ranges
-        time_ranges = TimeRanges(time_ranges_list)
-        time_ranges.merge()
-        return time_ranges
+        return self._from_pairs(
+            union_pairs(self._merged_pairs(), other._merged_pairs())
+        )
 
     def __or__(self, other: "TimeRanges") -> "TimeRanges":
         return self.union(other) if isinstance(other, TimeRanges) else NotImplemented
 
     def intersection(self, other: "TimeRanges", /) -> "TimeRanges":
-        time_ranges_list: List[Optional[TimeRange]] = [
-            a & b for a, b in product(self.time_ranges, other.time_ranges)
-        ]
-
-        time_ranges = TimeRanges([tr for tr in time_ranges_list if tr is not None])
-        time_ranges.merge()
-        return time_ranges
+        return self._from_pairs(
+            intersect_pairs(self._merged_pairs(), other._merged_pairs())
+        )
 
     def __and__(self, other: "TimeRanges") -> "TimeRanges":
         return self.intersection(other)
 
+    def difference(self, other: "TimeRanges", /) -> "TimeRanges":
+        return self._from_pairs(
+            subtract_pairs(self._merged_pairs(), other._merged_pairs())
+        )
+
+    def __sub__(self, other: "TimeRanges") -> "TimeRanges":
+        return (
+            self.difference(other) if isinstance(other, TimeRanges) else NotImplemented
+        )
+
+    def symmetric_difference(self, other: "TimeRanges", /) -> "TimeRanges":
+        return self._from_pairs(
+            symmetric_difference_pairs(self._merged_pairs(), other._merged_pairs())
+        )
+
+    def __xor__(self, other: "TimeRanges") -> "TimeRanges":
+        return (
+            self.symmetric_difference(other)
+            if isinstance(other, TimeRanges)
+            else NotImplemented
+        )
+
+    # Combining many at once, rather than reducing them pairwise, which re-merges
+    # the accumulated result every time
+
+    @classmethod
+    def union_all(cls, time_ranges: Iterable["TimeRanges"], /) -> "TimeRanges":
+        """Union of all `time_ranges`, in a single k-way merge."""
+        return cls._from_pairs(
+            union_all_pairs([ranges._merged_pairs() for ranges in time_ranges])
+        )
+
+    @classmethod
+    def intersection_all(cls, time_ranges: Iterable["TimeRanges"], /) -> "TimeRanges":
+        """Intersection of all `time_ranges`, in a single sweep, see `at_least`."""
+        sources = [ranges._merged_pairs() for ranges in time_ranges]
+        if not sources:
+            raise ValueError("At least one `TimeRanges` is required")
+        return cls._from_pairs(at_least_pairs(sources, k=len(sources)))
+
+    @classmethod
+    def at_least(cls, time_ranges: Iterable["TimeRanges"], /, k: int) -> "TimeRanges":
+        """Times covered by at least `k` of `time_ranges`, in a single sweep."""
+        return cls._from_pairs(
+            at_least_pairs([ranges._merged_pairs() for ranges in time_ranges], k=k)
+        )
+
+    def duration(self) -> timedelta:
+        """Total time covered, with `time.max` counting as the end of the day."""
+        return _day_measure(self._merged_pairs()) * _US
+
+    def gaps(self) -> "TimeRanges":
+        """The rest of the day, what `difference` from a full day would give."""
+        return self._from_pairs(
+            subtract_pairs([(0, _TIME_MAX_KEY)], self._merged_pairs())
+        )
+
+    def coverage(self, window: Optional[TimeRange] = None, /) -> float:
+        """Fraction of `window`, the whole day by default, that is covered."""
+        pair = (0, _TIME_MAX_KEY) if window is None else window._keys()
+        length = _day_measure([pair])
+        if not length:
+            return float(self._get_index().contains_point(pair[0]))
+        return _day_measure(intersect_pairs(self._merged_pairs(), [pair])) / length
+
+
+class DayRanges(DefaultDict[Weekday, TimeRanges]):
+    """A `defaultdict` of `TimeRanges` that counts its own modifications."""
+
+    __slots__ = ("version",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key: Weekday, value: TimeRanges) -> None:
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key: Weekday) -> None:
+        super().__delitem__(key)
+        self.version += 1
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+
+    def pop(self, *args: Any) -> Any:
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self) -> Tuple[Weekday, TimeRanges]:
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, *args: Any) -> Any:
+        self.version += 1
+        return super().setdefault(*args)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        super().update(*args, **kwargs)
+        self.version += 1
+
+
+def _reset_compiled(
+    instance: "WeekRange", attribute: attr.Attribute, value: Any
+) -> Any:
+    instance._compiled = None
+    return value
+
 
 @attr.define(on_setattr=attr.setters.convert)
 class WeekRange(BaseRange):
-    def _convert_day_ranges(day_ranges: Dict[Weekday, TimeRanges]) -> DefaultDict[Weekday, TimeRanges]:  # type: ignore
-        return defaultdict(TimeRanges, day_ranges)
+    def _convert_day_ranges(day_ranges: Dict[Weekday, TimeRanges]) -> DayRanges:  # type: ignore
+        return DayRanges(TimeRanges, day_ranges)
 
-    day_ranges: DefaultDict[Weekday, TimeRanges] = attr.ib(
-        factory=dict, converter=_convert_day_ranges
+    day_ranges: DayRanges = attr.ib(
+        factory=DayRanges,
+        converter=_convert_day_ranges,
+        on_setattr=[attr.setters.convert, _reset_compiled],
+    )
+    timezone: Optional[tzinfo] = attr.ib(default=None, on_setattr=_reset_compiled)
+    # Compiled form, along with the versions of the days it was compiled from
+    _compiled: Optional[Tuple[Tuple[int, ...], CompiledWeekRange]] = attr.ib(
+        default=None, init=False, eq=False, repr=False
     )
-    timezone: Optional[tzinfo] = None
 
     def validate(self) -> None:
         for day_range in self.day_ranges.values():
@@ -190,6 +519,42 @@ class WeekRange(BaseRange):
         for day_range in self.day_ranges.values():
             day_range.merge(interpolate=interpolate)
 
+    def to_bytes(self) -> bytes:
+        """Compact binary form, as integer keys, see `TimeRanges.from_bytes`."""
+        # How many ranges each weekday has, or -1 for missing weekdays
+        counts = [-1] * 7
+        pairs: List[Pair] = []
+        for weekday in sorted(self.day_ranges, key=lambda weekday: weekday.value):
+            day_pairs = pairs_of(self.day_ranges[weekday].time_ranges)
+            counts[weekday.value] = len(day_pairs)
+            pairs.extend(day_pairs)
+        return encode_pairs(WEEK_RANGE, self.timezone, pairs, prefix=counts)
+
+    @classmethod
+    def from_bytes(cls, data: Buffer, /) -> "WeekRange":
+        """See `TimeRanges.from_bytes`."""
+        tz, keys = decode(data, WEEK_RANGE)
+        counts = keys[:7]
+        pairs = decode_pairs(keys[7:])
+        if len(counts) != 7 or sum(max(count, 0) for count in counts) != len(pairs):
+            raise ValueError("Data is truncated")
+
+        week_range = cls(timezone=tz)
+        i = 0
+        for weekday, count in zip(Weekday, counts):
+            if count >= 0:
+                week_range.day_ranges[weekday] = TimeRanges._from_pairs(
+                    list(pairs[i : i + count])
+                )
+                i += count
+        return week_range
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Union[str, Tuple[Any, ...]]:
+        # Only through `to_bytes` when it keeps the timezone as it is
+        if lossless_timezone_key([self.timezone]) is None:
+            return super().__reduce_ex__(protocol)
+        return type(self).from_bytes, (self.to_bytes(),)
+
     def __attrs_post_init__(self) -> None:
         self.validate()
 
@@ -197,9 +562,11 @@ class WeekRange(BaseRange):
         return any(self.day_ranges.values())
 
     def _assert_timezone(self, other: "WeekRange", /) -> None:
-        tz = self.timezone
-        otz = other.timezone
-        ref = datetime(2000, 1, 1)
+        self._assert_timezones(self.timezone, other.timezone)
+
+    @staticmethod
+    def _assert_timezones(tz: Optional[tzinfo], otz: Optional[tzinfo], /) -> None:
+        ref = _TIMEZONE_REF
         # FIXME This isn't the best way to do it, but `pytz` is pain
         if tz == otz:
             return
@@ -211,26 +578,72 @@ class WeekRange(BaseRange):
             return
         raise ValueError(f"Incompatible timezones ({tz} and {otz})")
 
+    def compile(self, horizon: Tuple[int, int] = DEFAULT_HORIZON) -> CompiledWeekRange:
+        """Flatten all days into a single index, cached until they change.
+
+        Ranges edited in place aren't seen until their day is normalized, see
+        `TimeRanges.normalize`.
+
+        UTC offsets of `timezone` are looked up from a table of its transitions
+        between the years in `horizon`, and from `timezone` itself outside of it.
+        """
+        compiled = self._compiled
+        versions = self._versions()
+        if (
+            compiled is None
+            or compiled[0] != versions
+            or compiled[1].horizon != horizon
+        ):
+            compiled = (
+                versions,
+                CompiledWeekRange.from_pairs(
+                    self._week_pairs(), timezone=self.timezone, horizon=horizon
+                ),
+            )
+            self._compiled = compiled
+        return compiled[1]
+
+    def _versions(self) -> Tuple[int, ...]:
+        # Change whenever days are added, removed or replaced, or their lists
+        # modified, see `RangeList`
+        day_ranges = self.day_ranges
+        return (
+            day_ranges.version,
+            *(day_range.time_ranges.stamp for day_range in day_ranges.values()),
+        )
+
+    def _week_pairs(self) -> List[Pair]:
+        # All days flattened into microseconds since Monday 00:00
+        pairs: List[Pair] = []
+        for weekday, day_range in sorted(
+            self.day_ranges.items(), key=lambda item: item[0].value
+        ):
+            offset = weekday.value * US_IN_DAY
+            pairs.extend((s + offset, e + offset) for s, e in day_range._merged_pairs())
+        return pairs
+
     def _contains_datetime(self, other: datetime, /) -> bool:
-        tz = self.timezone
-        if tz is not None:
-            other = other.astimezone(tz)
-        weekday = Weekday.from_datetime(other)
-        return other.time() in self.day_ranges[weekday]
+        return self.compile()._contains_datetime(other)
+
+    def _contains_datetime_range(self, other: DatetimeRange, /) -> bool:
+        return self.compile()._contains_datetime_range(other)
 
     def _contains_week_range(self, other: "WeekRange", /) -> bool:
         self._assert_timezone(other)
 
+        # `get`, as looking up a missing day would insert it
         return all(
-            day_range in self.day_ranges[weekday]
+            day_range in self.day_ranges.get(weekday, TimeRanges())
             for weekday, day_range in other.day_ranges.items()
         )
 
-    _contains_types = Union[datetime, "WeekRange"]
+    _contains_types = Union[datetime, DatetimeRange, "WeekRange"]
 
     def contains(self, other: _contains_types, /) -> bool:
         if isinstance(other, datetime):
             return self._contains_datetime(other)
+        elif isinstance(other, DatetimeRange):
+            return self._contains_datetime_range(other)
         elif isinstance(other, WeekRange):
             return self._contains_week_range(other)
         else:
@@ -239,6 +652,37 @@ class WeekRange(BaseRange):
     def __contains__(self, other: _contains_types) -> bool:
         return self.contains(other)
 
+    def contains_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `contains` over an array of datetimes.
+
+        Accepts `datetime64` or integer microseconds since the epoch, in UTC, and
+        requires NumPy. Without a `timezone`, they're taken as local times instead.
+        """
+        return self.compile().contains_many(datetimes)
+
+    def next_transition(self, dt: datetime, /) -> Optional[datetime]:
+        """The first instant after `dt` at which containment changes, if any.
+
+        That's the start of a range, or right after its end, in the timezone of `dt`.
+        """
+        return self.compile().next_transition(dt)
+
+    def previous_transition(self, dt: datetime, /) -> Optional[datetime]:
+        """Like `next_transition`, but the last instant up to and including `dt`."""
+        return self.compile().previous_transition(dt)
+
+    def next_transition_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `next_transition` over an array of datetimes.
+
+        Takes the same arrays as `contains_many`, and returns `datetime64[us]` with
+        `NaT` where there's no transition.
+        """
+        return self.compile().next_transition_many(datetimes)
+
+    def previous_transition_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Vectorized `previous_transition`, see `next_transition_many`."""
+        return self.compile().previous_transition_many(datetimes)
+
     def union(self, other: "WeekRange", /) -> "WeekRange":
         self._assert_timezone(other)
 
@@ -256,13 +700,107 @@ class WeekRange(BaseRange):
 
         week_range = WeekRange(timezone=self.timezone)
         for weekday, day_range in self.day_ranges.items():
-            week_range.day_ranges[weekday] = day_range & other.day_ranges[weekday]
+            other_day_range = other.day_ranges.get(weekday, TimeRanges())
+            week_range.day_ranges[weekday] = day_range & other_day_range
 
         return week_range
 
     def __and__(self, other: "WeekRange") -> "WeekRange":
         return self.intersection(other)
 
+    def difference(self, other: "WeekRange", /) -> "WeekRange":
+        self._assert_timezone(other)
+
+        week_range = WeekRange(timezone=self.timezone)
+        for weekday, day_range in self.day_ranges.items():
+            other_day_range = other.day_ranges.get(weekday, TimeRanges())
+            week_range.day_ranges[weekday] = day_range - other_day_range
+
+        return week_range
+
+    def __sub__(self, other: "WeekRange") -> "WeekRange":
+        return (
+            self.difference(other) if isinstance(other, WeekRange) else NotImplemented
+        )
+
+    def symmetric_difference(self, other: "WeekRange", /) -> "WeekRange":
+        self._assert_timezone(other)
+
+        week_range = WeekRange(timezone=self.timezone)
+        for weekday in self.day_ranges.keys() | other.day_ranges.keys():
+            day_range = self.day_ranges.get(weekday, TimeRanges())
+            other_day_range = other.day_ranges.get(weekday, TimeRanges())
+            week_range.day_ranges[weekday] = day_range ^ other_day_range
+
+        return week_range
+
+    def __xor__(self, other: "WeekRange") -> "WeekRange":
+        return (
+            self.symmetric_difference(other)
+            if isinstance(other, WeekRange)
+            else NotImplemented
+        )
+
+    @classmethod
+    def _day_sources(
+        cls, week_ranges: Iterable["WeekRange"], /
+    ) -> Tuple[Optional[tzinfo], int, DefaultDict[Weekday, List[List[Pair]]]]:
+        # Common timezone, how many week ranges, and their merged pairs by weekday
+        timezone = None
+        count = 0
+        sources: DefaultDict[Weekday, List[List[Pair]]] = defaultdict(list)
+        for week_range in week_ranges:
+            if count:
+                cls._assert_timezones(timezone, week_range.timezone)
+            else:
+                timezone = week_range.timezone
+            count += 1
+            for weekday, day_range in week_range.day_ranges.items():
+                sources[weekday].append(day_range._merged_pairs())
+        return timezone, count, sources
+
+    @classmethod
+    def union_all(cls, week_ranges: Iterable["WeekRange"], /) -> "WeekRange":
+        """Union of all `week_ranges`, see `TimeRanges.union_all`."""
+        timezone, _, sources = cls._day_sources(week_ranges)
+        week_range = cls(timezone=timezone)
+        for weekday, day_sources in sources.items():
+            week_range.day_ranges[weekday] = TimeRanges._from_pairs(
+                union_all_pairs(day_sources)
+            )
+        return week_range
+
+    @classmethod
+    def intersection_all(cls, week_ranges: Iterable["WeekRange"], /) -> "WeekRange":
+        """Intersection of all `week_ranges`, see `TimeRanges.intersection_all`."""
+        timezone, count, sources = cls._day_sources(week_ranges)
+        if not count:
+            raise ValueError("At least one `WeekRange` is required")
+        return cls._at_least(timezone, sources, count)
+
+    @classmethod
+    def at_least(cls, week_ranges: Iterable["WeekRange"], /, k: int) -> "WeekRange":
+        """Times covered by at least `k` of `week_ranges`, see `TimeRanges.at_least`."""
+        timezone, _, sources = cls._day_sources(week_ranges)
+        return cls._at_least(timezone, sources, k)
+
+    @classmethod
+    def _at_least(
+        cls,
+        timezone: Optional[tzinfo],
+        sources: DefaultDict[Weekday, List[List[Pair]]],
+        k: int,
+        /,
+    ) -> "WeekRange":
+        week_range = cls(timezone=timezone)
+        for weekday, day_sources in sources.items():
+            # Days that too few week ranges have can't be covered enough
+            if len(day_sources) >= k:
+                week_range.day_ranges[weekday] = TimeRanges._from_pairs(
+                    at_least_pairs(day_sources, k=k)
+                )
+        return week_range
+
     _has_transition_types = Union["WeekRange", DatetimeRange, DatetimeRanges]
 
     def _has_transition_week_range(self, other: "WeekRange") -> bool:
@@ -290,51 +828,166 @@ class WeekRange(BaseRange):
         else:
             raise TypeError
 
+    @staticmethod
+    def _day_pairs(
+        datetime_range: DatetimeRange, /, replace_timezone: Optional[tzinfo] = None
+    ) -> Tuple[Optional[tzinfo], List[Tuple[int, Pair]]]:
+        start = datetime_range.start
+        tz = start.tzinfo if replace_timezone is None else replace_timezone
+        assert tz is not None, "Datetime ranges are always timezone aware"
+
+        # Wall times in `tz`, as microseconds since the epoch
+        offsets = offset_table(tz)
+        start_day, start_key = divmod(offsets.local_key(start), US_IN_DAY)
+        end_day, end_key = divmod(offsets.local_key(datetime_range.end), US_IN_DAY)
+
+        days = end_day - start_day
+        if days > 7:
+            # Every weekday has at least one full day in between
+            return tz, [(weekday, (0, _TIME_MAX_KEY)) for weekday in range(7)]
+
+        # At most 8 days, the first and last of which may be partial
+        first_weekday = (start_day + EPOCH_WEEKDAY) % 7
+        return tz, [
+            (
+                (first_weekday + day) % 7,
+                (
+                    start_key if day == 0 else 0,
+                    end_key if day == days else _TIME_MAX_KEY,
+                ),
+            )
+            for day in range(days + 1)
+        ]
+
+    @classmethod
+    def _from_day_pairs(
+        cls, day_pairs: List[Tuple[int, Pair]], /, timezone: Optional[tzinfo]
+    ) -> "WeekRange":
+        pairs_by_weekday: DefaultDict[int, List[Pair]] = defaultdict(list)
+        for weekday, pair in day_pairs:
+            pairs_by_weekday[weekday].append(pair)
+
+        week_range = cls(timezone=timezone)
+        for weekday, pairs in sorted(pairs_by_weekday.items()):
+            pairs.sort()
+            week_range.day_ranges[Weekday(weekday)] = TimeRanges._from_pairs(
+                merge_pairs(pairs)
+            )
+        return week_range
+
     @classmethod
     def from_datetime_range(
         cls, datetime_range: DatetimeRange, /, replace_timezone: Optional[tzinfo] = None
     ) -> "WeekRange":
-        start = datetime_range.start
-        if replace_timezone is not None:
-            start = start.astimezone(replace_timezone)
-
-        tz = start.tzinfo
-        end = datetime_range.end.astimezone(tz)
-
-        date_start = start.date()
-        date_end = end.date()
-
-        week_range = cls(timezone=tz)
+        tz, day_pairs = cls._day_pairs(
+            datetime_range, replace_timezone=replace_timezone
+        )
+        return cls._from_day_pairs(day_pairs, timezone=tz)
 
-        d = date_start
-        while d <= date_end:
-            # TODO Skip unnecessary iterations if week is already full
-            tr_start: Optional[time] = None
-            tr_end: Optional[time] = None
-            if d == date_start:
-                tr_start = start.time()
-            if d == date_end:
-                tr_end = end.time()
+    @classmethod
+    def from_datetime_ranges(
+        cls, datetime_ranges: DatetimeRanges, replace_timezone: Optional[tzinfo] = None
+    ) -> "WeekRange":
+        # Gather every day of every range first, then merge each weekday only once
+        timezone = replace_timezone
+        day_pairs: List[Tuple[int, Pair]] = []
+        for i, datetime_range in enumerate(datetime_ranges.datetime_ranges):
+            tz, pairs = cls._day_pairs(
+                datetime_range, replace_timezone=replace_timezone
+            )
+            if i == 0:
+                timezone = tz
+            else:
+                cls._assert_timezones(timezone, tz)
+            day_pairs.extend(pairs)
 
-            time_range = TimeRange()
-            if tr_start is not None:
-                time_range.start = tr_start
-            if tr_end is not None:
-                time_range.end = tr_end
+        return cls._from_day_pairs(day_pairs, timezone=timezone)
 
-            week_range.day_ranges[Weekday(d.weekday())] = TimeRanges([time_range])
+    def _expanded_pairs(self, start: datetime, end: datetime, /) -> Iterator[Pair]:
+        if start > end:
+            raise ValueError(f"Start {start} is after end {end}")
+        compiled = self.compile()
+        template = compiled.index.pairs()
+        if not template:
+            return
+        tz = self.timezone if self.timezone is not None else start.tzinfo
+        assert tz is not None, "Datetimes must be timezone aware"
+        offsets = offset_table(tz, compiled.horizon)
+        start_key, end_key = datetime_to_key(start), datetime_to_key(end)
+
+        # Local Monday 00:00 of the week before `start`, as a local epoch key
+        week = (offsets.local_key(start) + EPOCH_WEEKDAY * US_IN_DAY) // US_IN_WEEK
+        base = (week - 1) * US_IN_WEEK - EPOCH_WEEKDAY * US_IN_DAY
+
+        pending: Optional[Pair] = None
+        # Offsets are at most a day, so every later week would be after `end`
+        while base - US_IN_DAY <= end_key:
+            # Shift the whole template at once, unless there's a transition
+            offset = offsets.constant_offset(
+                base - US_IN_DAY, base + US_IN_WEEK + US_IN_DAY
+            )
+            for s, e in template:
+                if offset is None:
+                    s, e = offsets.utc_key(base + s), offsets.utc_key(base + e)
+                else:
+                    s, e = base + s - offset, base + e - offset
+                if e < start_key:
+                    continue
+                elif s > end_key:
+                    break
+                s, e = max(s, start_key), min(e, end_key)
+                # Merge ranges wrapping around weeks, and overlaps from transitions
+                if pending is not None and s <= pending[1] + 1:
+                    pending = (pending[0], max(e, pending[1]))
+                    continue
+                if pending is not None:
+                    yield pending
+                pending = (s, e)
+            base += US_IN_WEEK
+
+        if pending is not None:
+            yield pending
+
+    def iter_datetime_ranges(
+        self, start: datetime, end: datetime, /
+    ) -> Iterator[DatetimeRange]:
+        """Lazily expand into UTC datetime ranges between `start` and `end`.
+
+        Without a timezone, days are taken in the timezone of `start`.
+        """
+        for s, e in self._expanded_pairs(start, end):
+            yield DatetimeRange._trusted(key_to_datetime(s), key_to_datetime(e))
+
+    def to_datetime_ranges(self, start: datetime, end: datetime, /) -> DatetimeRanges:
+        """Like `iter_datetime_ranges`, but all at once."""
+        pairs = list(self._expanded_pairs(start, end))
+        datetime_ranges = DatetimeRanges()
+        datetime_ranges._set_ranges(
+            [
+                DatetimeRange._trusted(key_to_datetime(s), key_to_datetime(e))
+                for s, e in pairs
+            ],
+            pairs,
+        )
+        return datetime_ranges
 
-            d += timedelta(days=1)
+    def duration(self) -> timedelta:
+        """Total time covered in a week, see `TimeRanges.duration`."""
+        return sum(
+            (day_range.duration() for day_range in self.day_ranges.values()),
+            timedelta(0),
+        )
 
+    def gaps(self) -> "WeekRange":
+        """The rest of the week, see `TimeRanges.gaps`."""
+        week_range = WeekRange(timezone=self.timezone)
+        for weekday in Weekday:
+            day_range = self.day_ranges.get(weekday)
+            week_range.day_ranges[weekday] = (
+                TimeRanges([TimeRange()]) if day_range is None else day_range.gaps()
+            )
         return week_range
 
-    @classmethod
-    def from_datetime_ranges(
-        cls, datetime_ranges: DatetimeRanges, replace_timezone: Optional[tzinfo] = None
-    ) -> "WeekRange":
-        week_ranges: list["WeekRange"] = [
-            cls.from_datetime_range(datetime_range, replace_timezone=replace_timezone)
-            for datetime_range in datetime_ranges.datetime_ranges
-        ]
-
-        return reduce(lambda a, b: a | b, week_ranges)
+    def coverage(self, window: DatetimeRange, /) -> float:
+        """Fraction of `window` that is covered, DST transitions included."""
+        return self.to_datetime_ranges(window.start, window.end).coverage(window)
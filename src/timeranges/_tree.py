@@ -0,0 +1,182 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import attr
+
+from ._datetimeranges import DatetimeRange, DatetimeRanges
+from ._keys import datetime_to_key
+
+# `(start, end, id)`, with integer keys
+_Entry = Tuple[int, int, int]
+
+
+@attr.define
+class _Node:
+    center: int
+    # Entries overlapping `center`, sorted by ascending start and descending end
+    by_start: List[_Entry]
+    by_end: List[_Entry]
+    left: Optional["_Node"] = None
+    right: Optional["_Node"] = None
+
+    @classmethod
+    def build(cls, entries: List[_Entry], /) -> Optional["_Node"]:
+        if not entries:
+            return None
+        endpoints = sorted(key for start, end, _ in entries for key in (start, end))
+        center = endpoints[len(endpoints) // 2]
+
+        here: List[_Entry] = []
+        left: List[_Entry] = []
+        right: List[_Entry] = []
+        for entry in entries:
+            start, end, _ = entry
+            if end < center:
+                left.append(entry)
+            elif start > center:
+                right.append(entry)
+            else:
+                here.append(entry)
+
+        return cls(
+            center,
+            sorted(here),
+            sorted(here, key=lambda entry: entry[1], reverse=True),
+            cls.build(left),
+            cls.build(right),
+        )
+
+
+@attr.define
+class DatetimeRangesTree:
+    """Centered interval tree over possibly overlapping datetime ranges.
+
+    Unlike `DatetimeRanges.merge`, ranges keep their identities: every range gets an
+    integer id, its position for the ranges the tree was built from, and queries
+    return the ids of the matching ranges in O(log n + k).
+    """
+
+    _ranges: Dict[int, DatetimeRange] = attr.ib(factory=dict)
+    _entries: Dict[int, _Entry] = attr.ib(
+        init=False, factory=dict, eq=False, repr=False
+    )
+    _next_id: int = attr.ib(init=False, default=0, eq=False, repr=False)
+    # Rebuilt lazily on the first query after a bulk update
+    _root: Optional[_Node] = attr.ib(init=False, default=None, eq=False, repr=False)
+    _starts: List[int] = attr.ib(init=False, factory=list, eq=False, repr=False)
+    _ends: List[int] = attr.ib(init=False, factory=list, eq=False, repr=False)
+    _dirty: bool = attr.ib(init=False, default=False, eq=False, repr=False)
+
+    def __attrs_post_init__(self) -> None:
+        ranges = self._ranges
+        self._ranges = {}
+        for id_, datetime_range in ranges.items():
+            self._add(id_, datetime_range)
+        self._next_id = max(self._ranges, default=-1) + 1
+
+    @classmethod
+    def from_datetime_ranges(
+        cls, datetime_ranges: DatetimeRanges, /
+    ) -> "DatetimeRangesTree":
+        return cls(dict(enumerate(datetime_ranges.datetime_ranges)))
+
+    def _add(self, id_: int, datetime_range: DatetimeRange, /) -> None:
+        datetime_range.validate()
+        self._ranges[id_] = datetime_range
+        self._entries[id_] = (*datetime_range._keys(), id_)
+        self._dirty = True
+
+    def _build(self) -> None:
+        entries = list(self._entries.values())
+        self._root = _Node.build(entries)
+        self._starts = sorted(start for start, _, _ in entries)
+        self._ends = sorted(end for _, end, _ in entries)
+        self._dirty = False
+
+    def _get_root(self) -> Optional[_Node]:
+        if self._dirty:
+            self._build()
+        return self._root
+
+    def insert(self, datetime_ranges: Iterable[DatetimeRange], /) -> List[int]:
+        """Add ranges, returning their new ids."""
+        ids: List[int] = []
+        for datetime_range in datetime_ranges:
+            id_ = self._next_id
+            self._next_id += 1
+            self._add(id_, datetime_range)
+            ids.append(id_)
+        return ids
+
+    def remove(self, ids: Iterable[int], /) -> None:
+        """Remove ranges by their ids."""
+        for id_ in ids:
+            del self._ranges[id_]
+            del self._entries[id_]
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def __getitem__(self, id_: int) -> DatetimeRange:
+        return self._ranges[id_]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ranges)
+
+    def covering(self, dt: datetime, /) -> List[int]:
+        """Ids of the ranges that contain `dt`."""
+        key = datetime_to_key(dt)
+        ids: List[int] = []
+        node = self._get_root()
+        while node is not None:
+            if key < node.center:
+                for start, _, id_ in node.by_start:
+                    if start > key:
+                        break
+                    ids.append(id_)
+                node = node.left
+            elif key > node.center:
+                for _, end, id_ in node.by_end:
+                    if end < key:
+                        break
+                    ids.append(id_)
+                node = node.right
+            else:
+                ids.extend(id_ for _, _, id_ in node.by_start)
+                break
+        return ids
+
+    def overlapping(self, window: DatetimeRange, /) -> List[int]:
+        """Ids of the ranges that share at least an instant with `window`."""
+        window_start, window_end = window._keys()
+        ids: List[int] = []
+        nodes = [self._get_root()]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            if window_end < node.center:
+                for start, _, id_ in node.by_start:
+                    if start > window_end:
+                        break
+                    ids.append(id_)
+                nodes.append(node.left)
+            elif window_start > node.center:
+                for _, end, id_ in node.by_end:
+                    if end < window_start:
+                        break
+                    ids.append(id_)
+                nodes.append(node.right)
+            else:
+                ids.extend(id_ for _, _, id_ in node.by_start)
+                nodes.append(node.left)
+                nodes.append(node.right)
+        return ids
+
+    def count(self, dt: datetime, /) -> int:
+        """How many ranges contain `dt`, in O(log n)."""
+        self._get_root()
+        key = datetime_to_key(dt)
+        return bisect_right(self._starts, key) - bisect_left(self._ends, key)
@@ -0,0 +1,274 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from threading import Lock
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import attr
+
+from ._keys import US_IN_DAY, US_IN_MIN, datetime_to_key, key_to_datetime
+from ._numpy import import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_US = timedelta(microseconds=1)
+
+# Years covered by offset tables, as `[first, last)`, keys outside fall back to `tzinfo`
+DEFAULT_HORIZON = (2000, 2050)
+# How many tables are kept around by default, least recently used first out
+OFFSET_TABLE_CACHE_SIZE = 64
+
+_KEY_MIN = -(2**63)
+_KEY_MAX = 2**63 - 1
+
+
+def utc_offset_key(tz: tzinfo, key: int, /) -> int:
+    """UTC offset of `tz`, in microseconds, at the epoch key `key`."""
+    offset = key_to_datetime(key).astimezone(tz).utcoffset()
+    return 0 if offset is None else offset // _US
+
+
+def _transition(tz: tzinfo, low: int, high: int, offset: int, /) -> int:
+    # First whole minute in `(low, high]` with `offset`, the offset at `high`
+    low //= US_IN_MIN
+    high //= US_IN_MIN
+    while high - low > 1:
+        middle = (low + high) // 2
+        if utc_offset_key(tz, middle * US_IN_MIN) == offset:
+            high = middle
+        else:
+            low = middle
+    return high * US_IN_MIN
+
+
+def _year_key(year: int, /) -> int:
+    return datetime_to_key(datetime(year, 1, 1, tzinfo=timezone.utc))
+
+
+def _transitions(
+    tz: tzinfo, start: int, end: int, offset: int, /
+) -> Tuple[List[int], List[int]]:
+    # Transitions in `(start, end]`, from `offset` at `start`, sampled daily, assuming
+    # no more than one transition per day
+    keys: List[int] = []
+    offsets: List[int] = []
+    for key in range(start + US_IN_DAY, end + US_IN_DAY, US_IN_DAY):
+        next_offset = utc_offset_key(tz, key)
+        if next_offset != offset:
+            keys.append(_transition(tz, key - US_IN_DAY, key, next_offset))
+            offsets.append(next_offset)
+            offset = next_offset
+    return keys, offsets
+
+
+@attr.frozen
+class _Loaded:
+    # Transitions over `[low, high]`, `keys[0]` being `low`, never modified, so that
+    # lookups can go on while another thread loads more
+    low: int
+    high: int
+    keys: List[int]
+    offsets: List[int]
+    # NumPy copies of `keys` and `offsets`, built on the first batch lookup
+    _arrays: Optional[Tuple["np.ndarray", "np.ndarray"]] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+
+    def arrays(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        np = import_numpy()
+        arrays = self._arrays
+        if arrays is None:
+            arrays = (
+                np.array(self.keys, dtype=np.int64),
+                np.array(self.offsets, dtype=np.int64),
+            )
+            object.__setattr__(self, "_arrays", arrays)
+        return arrays
+
+
+# Serializes loading, which is rare, lookups don't take it
+_load_lock = Lock()
+
+
+@attr.frozen
+class OffsetTable:
+    """UTC offsets of a timezone as sorted transitions, between `start` and `end`.
+
+    Each offset applies from its transition until the next one, so a lookup is a
+    single bisect instead of a call into `tzinfo`. Finding transitions takes a call
+    into `tzinfo` per day, so they're loaded a year at a time, around the keys looked
+    up, into a single span that grows as needed.
+    """
+
+    tz: tzinfo
+    start: int
+    end: int
+    _loaded: Optional[_Loaded] = attr.ib(default=None, eq=False, repr=False)
+
+    @classmethod
+    def build(cls, tz: tzinfo, /, horizon: Tuple[int, int]) -> "OffsetTable":
+        if isinstance(tz, timezone):
+            # Fixed offset, for any key
+            offset = utc_offset_key(tz, 0)
+            return cls(
+                tz,
+                _KEY_MIN,
+                _KEY_MAX,
+                _Loaded(_KEY_MIN, _KEY_MAX, [_KEY_MIN], [offset]),
+            )
+        first_year, last_year = horizon
+        return cls(tz, _year_key(first_year), _year_key(last_year))
+
+    def _load(self, low: int, high: int, /) -> _Loaded:
+        # Transitions covering `[low, high]`, which must be within `[start, end)`
+        loaded = self._loaded
+        if loaded is None or low < loaded.low or high > loaded.high:
+            with _load_lock:
+                loaded = self._extend(low, high)
+        return loaded
+
+    def _extend(self, low: int, high: int, /) -> _Loaded:
+        loaded = self._loaded
+        # Another thread may have loaded them meanwhile
+        if loaded is not None and loaded.low <= low and high <= loaded.high:
+            return loaded
+
+        # Whole years, and everything in between with what's already loaded
+        tz = self.tz
+        low = max(self.start, _year_key(key_to_datetime(low).year))
+        high = min(self.end, _year_key(key_to_datetime(high).year + 1))
+        if loaded is None:
+            offset = utc_offset_key(tz, low)
+            keys, offsets = _transitions(tz, low, high, offset)
+            keys.insert(0, low)
+            offsets.insert(0, offset)
+            loaded = _Loaded(low, high, keys, offsets)
+        else:
+            keys, offsets = loaded.keys, loaded.offsets
+            if low < loaded.low:
+                offset = utc_offset_key(tz, low)
+                before, before_offsets = _transitions(tz, low, loaded.low, offset)
+                # Those already include the offset at `loaded.low`
+                keys = [low, *before, *keys[1:]]
+                offsets = [offset, *before_offsets, *offsets[1:]]
+            else:
+                low = loaded.low
+            if high > loaded.high:
+                after, after_offsets = _transitions(tz, loaded.high, high, offsets[-1])
+                keys = [*keys, *after]
+                offsets = [*offsets, *after_offsets]
+            else:
+                high = loaded.high
+            loaded = _Loaded(low, high, keys, offsets)
+        object.__setattr__(self, "_loaded", loaded)
+        return loaded
+
+    def offset(self, key: int, /) -> int:
+        if self.start <= key < self.end:
+            loaded = self._load(key, key)
+            return loaded.offsets[bisect_right(loaded.keys, key) - 1]
+        return utc_offset_key(self.tz, key)
+
+    def constant_offset(self, start: int, end: int, /) -> Optional[int]:
+        """The offset between two keys, if there's no transition in between."""
+        if self.start <= start and end < self.end:
+            loaded = self._load(start, end)
+            i = bisect_right(loaded.keys, start)
+            if i == bisect_right(loaded.keys, end):
+                return loaded.offsets[i - 1]
+        return None
+
+    def utc_key(self, local: int, /) -> int:
+        """Epoch key at which the wall clock first reaches the local key `local`.
+
+        That's the earlier one when the wall time is repeated, and the transition
+        itself when it's skipped.
+        """
+        before = self.offset(local - US_IN_DAY)
+        after = self.offset(local + US_IN_DAY)
+        keys = [
+            key
+            for key in (local - before, local - after)
+            if self.offset(key) == local - key
+        ]
+        if keys:
+            return min(keys)
+        # Assuming at most one transition within a day, between both candidates
+        key = local - before
+        if self.start <= key < self.end:
+            loaded = self._load(max(self.start, key - US_IN_DAY), key)
+            return loaded.keys[bisect_right(loaded.keys, key) - 1]
+        return _transition(self.tz, local - after, local - before, after)
+
+    def utc_keys_many(self, local: "np.ndarray", /) -> "np.ndarray":
+        np = import_numpy()
+        before = self.offsets_many(local - US_IN_DAY)
+        after = self.offsets_many(local + US_IN_DAY)
+        first, second = local - before, local - after
+        first_valid = self.offsets_many(first) == before
+        second_valid = self.offsets_many(second) == after
+        keys = np.where(
+            first_valid & second_valid,
+            np.minimum(first, second),
+            np.where(first_valid, first, second),
+        )
+        # Skipped wall times are rare, those are looked up one by one
+        for i in np.flatnonzero(~first_valid & ~second_valid):
+            keys[i] = self.utc_key(int(local[i]))
+        return keys
+
+    def local_key(self, dt: datetime, /) -> int:
+        """Wall time of `dt` in this timezone, as microseconds since the epoch."""
+        key = datetime_to_key(dt)
+        return key + self.offset(key)
+
+    def offsets_many(self, keys: "np.ndarray", /) -> "np.ndarray":
+        np = import_numpy()
+        inside = (keys >= self.start) & (keys < self.end)
+        if not inside.any():
+            return _utc_offsets_by_minute(self.tz, keys)
+        loaded = self._load(int(keys[inside].min()), int(keys[inside].max()))
+        table_keys, table_offsets = loaded.arrays()
+        # Keys before the first transition wrap around, they're outside anyway
+        offsets = table_offsets[np.searchsorted(table_keys, keys, side="right") - 1]
+        outside = ~inside
+        if outside.any():
+            offsets[outside] = _utc_offsets_by_minute(self.tz, keys[outside])
+        return offsets
+
+
+def _build(tz: tzinfo, horizon: Tuple[int, int], /) -> OffsetTable:
+    return OffsetTable.build(tz, horizon=horizon)
+
+
+_offset_tables = lru_cache(maxsize=OFFSET_TABLE_CACHE_SIZE)(_build)
+
+
+def offset_table(
+    tz: tzinfo, /, horizon: Tuple[int, int] = DEFAULT_HORIZON
+) -> OffsetTable:
+    """Offset table of `tz`, cached, see `set_offset_table_cache_size`."""
+    return _offset_tables(tz, horizon)
+
+
+def set_offset_table_cache_size(maxsize: Optional[int], /) -> None:
+    """Change how many offset tables are cached, `None` for no limit.
+
+    Tables are cached by timezone and horizon, and drop the least recently used one
+    when full. Tables already cached are dropped too. Defaults to
+    `OFFSET_TABLE_CACHE_SIZE`.
+    """
+    global _offset_tables
+    _offset_tables = lru_cache(maxsize=maxsize)(_build)
+
+
+def _utc_offsets_by_minute(tz: tzinfo, keys: "np.ndarray", /) -> "np.ndarray":
+    np = import_numpy()
+    # Offsets only change at transitions, which fall on whole minutes in practice
+    minutes, inverse = np.unique(keys // US_IN_MIN, return_inverse=True)
+    offsets = np.array(
+        [utc_offset_key(tz, int(minute) * US_IN_MIN) for minute in minutes],
+        dtype=np.int64,
+    )
+    return offsets[inverse].reshape(keys.shape)
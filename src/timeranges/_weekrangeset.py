@@ -0,0 +1,178 @@
+import os
+from datetime import tzinfo
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import attr
+
+from ._compiled import CompiledWeekRange
+from ._numpy import as_epoch_keys, import_numpy, not_a_time
+from ._timeranges import WeekRange
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+    import numpy as np
+
+# Shards per worker, so that slower shards don't hold up the others
+_SHARDS_PER_WORKER = 4
+
+# Compiled week ranges of a worker process, set once by `_init_worker`
+_worker_compiled: List[CompiledWeekRange] = []
+
+
+def _init_worker(week_ranges: Tuple[WeekRange, ...]) -> None:
+    global _worker_compiled
+    _worker_compiled = [week_range.compile() for week_range in week_ranges]
+
+
+def _matrix(
+    compiled: List[CompiledWeekRange], keys: "np.ndarray", nat: "np.ndarray", /
+) -> "np.ndarray":
+    matrix = import_numpy().zeros((len(compiled), len(keys)), dtype=bool)
+    # Week keys only depend on the timezone, so most ranges share them
+    week_keys: Dict[Optional[tzinfo], "np.ndarray"] = {}
+    for row, compiled_week_range in enumerate(compiled):
+        tz = compiled_week_range.timezone
+        if tz not in week_keys:
+            week_keys[tz] = compiled_week_range.week_keys(keys)
+        matrix[row] = compiled_week_range.index.contains_many(week_keys[tz])
+    matrix[:, nat] = False
+    return matrix
+
+
+def _matrix_shard(
+    start: int, stop: int, keys: "np.ndarray", nat: "np.ndarray", /
+) -> "np.ndarray":
+    # Packed to bits, to send an eighth of the data back
+    np = import_numpy()
+    return np.packbits(_matrix(_worker_compiled[start:stop], keys, nat), axis=1)
+
+
+def _hits_shard(
+    start: int, stop: int, keys: "np.ndarray", nat: "np.ndarray", /
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    rows, columns = _matrix(_worker_compiled[start:stop], keys, nat).nonzero()
+    return rows + start, columns
+
+
+@attr.define
+class WeekRangeSet:
+    """Many week ranges, evaluated together against the same datetimes.
+
+    The week ranges are compiled once, when the set is created, so later changes to
+    them aren't seen. Large batches are sharded across a process pool, started on
+    first use and kept until `close`, whose workers compile the week ranges once.
+    """
+
+    week_ranges: Tuple[WeekRange, ...] = attr.ib(converter=tuple)
+    max_workers: Optional[int] = attr.ib(default=None, eq=False)
+    # Below this many lookups, ranges times datetimes, everything runs in-process
+    parallel_threshold: int = attr.ib(default=1_000_000, eq=False)
+    _compiled: List[CompiledWeekRange] = attr.ib(init=False, eq=False, repr=False)
+    _executor: Optional["ProcessPoolExecutor"] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+
+    def __attrs_post_init__(self) -> None:
+        self._compiled = [week_range.compile() for week_range in self.week_ranges]
+
+    def __len__(self) -> int:
+        return len(self.week_ranges)
+
+    def close(self) -> None:
+        """Shut the process pool down, if it was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "WeekRangeSet":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def _keys(self, datetimes: Any, /) -> Tuple["np.ndarray", "np.ndarray"]:
+        np = import_numpy()
+        nat = not_a_time(datetimes)
+        if nat.ndim != 1:
+            raise ValueError("Datetimes must be a one-dimensional array")
+        return np.where(nat, 0, as_epoch_keys(datetimes)), nat
+
+    def _parallel(self, lookups: int, /) -> bool:
+        return (
+            bool(self.week_ranges)
+            and self.max_workers != 1
+            and lookups >= self.parallel_threshold
+        )
+
+    def _get_executor(self) -> "ProcessPoolExecutor":
+        executor = self._executor
+        if executor is None:
+            # Only imported when needed, it's slow to import
+            from concurrent.futures import ProcessPoolExecutor
+
+            executor = ProcessPoolExecutor(
+                self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.week_ranges,),
+            )
+            self._executor = executor
+        return executor
+
+    def _shards(self) -> Iterable[Tuple[int, int]]:
+        workers = self.max_workers or os.cpu_count() or 1
+        size = -(-len(self.week_ranges) // (workers * _SHARDS_PER_WORKER))
+        for start in range(0, len(self.week_ranges), size):
+            yield start, min(start + size, len(self.week_ranges))
+
+    def contains_many(self, datetimes: Any, /) -> "np.ndarray":
+        """Boolean matrix of which datetimes each week range contains.
+
+        Takes the same arrays as `WeekRange.contains_many`, and returns one row per
+        week range and one column per datetime.
+        """
+        np = import_numpy()
+        keys, nat = self._keys(datetimes)
+        if not self._parallel(len(self.week_ranges) * len(keys)):
+            return _matrix(self._compiled, keys, nat)
+
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_matrix_shard, start, stop, keys, nat)
+            for start, stop in self._shards()
+        ]
+        return np.vstack(
+            [
+                np.unpackbits(future.result(), axis=1, count=len(keys)).astype(bool)
+                for future in futures
+            ]
+        )
+
+    def hits(self, datetimes: Any, /) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Indices of week ranges and datetimes they contain, like `nonzero`.
+
+        Only the hits are sent back from workers, which is cheaper than the matrix
+        when they're sparse.
+        """
+        np = import_numpy()
+        keys, nat = self._keys(datetimes)
+        if not self._parallel(len(self.week_ranges) * len(keys)):
+            rows, columns = _matrix(self._compiled, keys, nat).nonzero()
+            return rows, columns
+
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_hits_shard, start, stop, keys, nat)
+            for start, stop in self._shards()
+        ]
+        results = [future.result() for future in futures]
+        return (
+            np.concatenate([rows for rows, _ in results], dtype=np.intp),
+            np.concatenate([columns for _, columns in results], dtype=np.intp),
+        )
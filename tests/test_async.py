@@ -0,0 +1,113 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, timezone
+
+from pytest import importorskip
+from timematic.enums import Weekday
+
+import timeranges._async
+from timeranges import (
+    AsyncSchedule,
+    DatetimeRange,
+    DatetimeRanges,
+    TimeRange,
+    TimeRanges,
+    WeekRange,
+)
+
+
+def utc(*args, **kwargs) -> datetime:
+    kwargs["tzinfo"] = timezone.utc
+    return datetime(*args, **kwargs)
+
+
+def test_async_schedule(monkeypatch):
+    importorskip("numpy")
+    week_range = WeekRange(
+        {Weekday.MONDAY: TimeRanges([TimeRange(time(8), time(12))])},
+        timezone=timezone.utc,
+    )
+    datetimes = [utc(2022, 1, 3) + timedelta(minutes=7 * i) for i in range(300)]
+
+    batches = []
+    contains_batch = timeranges._async._contains_batch
+
+    def counting_contains_batch(snapshot, pending):
+        batches.append(len(pending))
+        return contains_batch(snapshot, pending)
+
+    monkeypatch.setattr(timeranges._async, "_contains_batch", counting_contains_batch)
+
+    async def main():
+        schedule = AsyncSchedule(week_range, max_batch_size=128)
+        results = await asyncio.gather(*map(schedule.contains, datetimes))
+        assert results == [dt in week_range for dt in datetimes]
+        # Coalesced, instead of one lookup per query
+        assert batches == [128, 128, 44]
+
+        # Naive datetimes are looked up directly
+        assert await schedule.contains(datetime(2022, 1, 3, 9))
+        assert len(batches) == 3
+
+        with ThreadPoolExecutor(1) as executor:
+            schedule.executor = executor
+            ranges = DatetimeRanges([DatetimeRange(utc(2022, 1, 4), utc(2022, 1, 5))])
+            reload = asyncio.ensure_future(
+                schedule.reload(WeekRange.from_datetime_ranges, ranges)
+            )
+            # The previous snapshot is used until the new one is ready
+            assert await schedule.contains(utc(2022, 1, 3, 9))
+            await reload
+        assert schedule.schedule == WeekRange.from_datetime_ranges(ranges)
+        assert not await schedule.contains(utc(2022, 1, 3, 9))
+        assert await schedule.contains(utc(2022, 1, 4, 9))
+
+    asyncio.run(main())
+
+
+def test_async_schedule_reload_before_flush():
+    importorskip("numpy")
+    tz = timezone(timedelta(hours=5))
+    monday = TimeRanges([TimeRange(time(8), time(9))])
+    dt = datetime(2022, 1, 3, 8, 30, tzinfo=tz)
+
+    async def main():
+        schedule = AsyncSchedule(
+            WeekRange({Weekday.MONDAY: monday}, timezone=tz), batch_delay=60
+        )
+        query = asyncio.ensure_future(schedule.contains(dt))
+        # Queued against the first snapshot, not flushed yet
+        await asyncio.sleep(0)
+        assert len(schedule._pending) == 1
+
+        # Without a timezone, aware datetimes can't be looked up by epoch keys
+        naive = WeekRange({Weekday.MONDAY: monday})
+        await schedule.reload(lambda: naive)
+        schedule._flush()
+        assert await query
+        assert await schedule.contains(dt) is naive.contains(dt)
+
+    asyncio.run(main())
+
+
+def test_async_schedule_datetime_ranges():
+    importorskip("numpy")
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 2)),
+            DatetimeRange(utc(2022, 1, 1, 12), utc(2022, 1, 3)),
+        ]
+    )
+    datetimes = [utc(2021, 12, 31) + timedelta(hours=5 * i) for i in range(30)]
+
+    async def main():
+        schedule = AsyncSchedule(datetime_ranges, batch_delay=0.001)
+        # The schedule itself isn't changed, it's merged into a copy
+        assert len(datetime_ranges.datetime_ranges) == 2
+        results = await asyncio.gather(*map(schedule.contains, datetimes))
+        assert results == [dt in datetime_ranges for dt in datetimes]
+
+        await schedule.reload(DatetimeRanges)
+        assert not await schedule.contains(utc(2022, 1, 1))
+
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+import pickle
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from pytest import importorskip, raises
+
+from timeranges import CompactDatetimeRanges, DatetimeRange, DatetimeRanges
+
+
+def utc(*args, **kwargs) -> datetime:
+    kwargs["tzinfo"] = timezone.utc
+    return datetime(*args, **kwargs)
+
+
+def _datetime_ranges(*days: int) -> DatetimeRanges:
+    it = iter(days)
+    return DatetimeRanges(
+        [DatetimeRange(utc(2022, 1, s), utc(2022, 1, e)) for s, e in zip(it, it)]
+    )
+
+
+def test_compact_datetime_ranges_invalid():
+    with raises(ValueError):
+        CompactDatetimeRanges([2], [1])
+    with raises(ValueError):
+        CompactDatetimeRanges([1, 2], [3])
+    with raises(TypeError):
+        CompactDatetimeRanges(array("i", [1]), array("i", [2]))
+
+
+def test_compact_datetime_ranges_roundtrip():
+    datetime_ranges = _datetime_ranges(10, 12, 1, 3, 2, 5)
+    compact = CompactDatetimeRanges.from_datetime_ranges(datetime_ranges)
+
+    assert len(compact) == 2
+    assert list(compact) == datetime_ranges.merged().datetime_ranges
+    assert compact.to_datetime_ranges() == datetime_ranges.merged()
+    assert compact.starts.itemsize == compact.ends.itemsize == 8
+
+    # Unsorted keys are normalized on construction
+    assert CompactDatetimeRanges([5, 0, 2], [6, 3, 4]) == CompactDatetimeRanges(
+        [0, 5], [4, 6]
+    )
+
+    tz = timezone(timedelta(hours=-3))
+    local = CompactDatetimeRanges.from_datetime_ranges(datetime_ranges, timezone=tz)
+    assert next(iter(local)).start.tzinfo is tz
+    assert local == compact
+
+
+def test_compact_datetime_ranges_contains():
+    compact = CompactDatetimeRanges.from_datetime_ranges(_datetime_ranges(1, 3, 5, 7))
+
+    yes = [
+        utc(2022, 1, 1),
+        utc(2022, 1, 6),
+        DatetimeRange(utc(2022, 1, 5), utc(2022, 1, 6)),
+    ]
+    no = [utc(2022, 1, 4), DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 6))]
+    for item in yes:
+        assert item in compact
+    for item in no:
+        assert item not in compact
+    assert _datetime_ranges(1, 2, 5, 6) in compact
+    assert CompactDatetimeRanges.from_datetime_ranges(_datetime_ranges(2, 6)) not in (
+        compact
+    )
+    with raises(TypeError):
+        1 in compact
+
+
+def test_compact_datetime_ranges_set_operations():
+    a = CompactDatetimeRanges.from_datetime_ranges(_datetime_ranges(1, 10, 12, 16))
+    b = CompactDatetimeRanges.from_datetime_ranges(_datetime_ranges(2, 4, 8, 13))
+
+    assert (a & b).to_datetime_ranges() == _datetime_ranges(2, 4, 8, 10, 12, 13)
+    assert (a | b).to_datetime_ranges() == _datetime_ranges(1, 16)
+    assert utc(2022, 1, 3) not in a - b
+    assert utc(2022, 1, 11) in a ^ b
+    assert utc(2022, 1, 9) not in a ^ b
+    assert a.merged(timedelta(days=2)) == CompactDatetimeRanges(
+        a.starts[:1], a.ends[1:]
+    )
+
+
+def test_compact_datetime_ranges_contains_many():
+    np = importorskip("numpy")
+
+    compact = CompactDatetimeRanges.from_datetime_ranges(_datetime_ranges(1, 3, 5, 7))
+    datetimes = [utc(2021, 1, 1), utc(2022, 1, 2), utc(2022, 1, 4), utc(2022, 1, 7)]
+    array = np.array([dt.replace(tzinfo=None) for dt in datetimes], "datetime64[us]")
+    assert compact.contains_many(array).tolist() == [dt in compact for dt in datetimes]
+    assert not CompactDatetimeRanges([], []).contains_many(array).any()
+
+
+def test_compact_datetime_ranges_bytes():
+    compact = CompactDatetimeRanges.from_datetime_ranges(
+        _datetime_ranges(1, 3, 5, 8), timezone=timezone(timedelta(hours=-2))
+    )
+    data = bytearray(compact.to_bytes())
+    loaded = CompactDatetimeRanges.from_bytes(data)
+    assert loaded == compact
+    assert loaded.timezone == compact.timezone
+    assert list(loaded) == list(compact)
+    assert pickle.loads(pickle.dumps(compact)) == compact
+    named = CompactDatetimeRanges.from_datetime_ranges(
+        _datetime_ranges(1, 3), timezone=timezone(timedelta(hours=2), "CEST")
+    )
+    named_loaded = pickle.loads(pickle.dumps(named))
+    assert named_loaded == named
+    assert named_loaded.timezone.tzname(None) == "CEST"
+
+    # Views over the same memory
+    data[-8:] = array("q", [compact.ends[-1] + 1]).tobytes()
+    assert loaded.ends[-1] == compact.ends[-1] + 1
+
+    with raises(ValueError):
+        CompactDatetimeRanges.from_bytes(data[:-4])
+    with raises(ValueError):
+        CompactDatetimeRanges.from_bytes(_datetime_ranges(1, 3).to_bytes())
@@ -1,6 +1,9 @@
-from datetime import datetime, timezone
+import pickle
+from copy import copy, deepcopy
+from datetime import datetime, timedelta, timezone, tzinfo
+from random import Random
 
-from pytest import raises
+from pytest import importorskip, raises
 
 from timeranges import DatetimeRange, DatetimeRanges
 
@@ -57,3 +60,292 @@ def test_datetime_range_contains_datetime_range():
     for dt in no:
         assert dt not in datetime_range
         assert not datetime_range.contains(dt)
+
+
+def test_datetime_ranges_contains():
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 3, 1), utc(2022, 4, 1)),
+            DatetimeRange(utc(2022, 1, 1), utc(2022, 2, 1)),
+        ]
+    )
+    yes = [
+        utc(2022, 1, 1),
+        utc(2022, 3, 15),
+        DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 3)),
+    ]
+    no = [
+        utc(2022, 2, 15),
+        utc(2022, 4, 1, 0, 0, 0, 1),
+        DatetimeRange(utc(2022, 1, 15), utc(2022, 3, 15)),
+    ]
+
+    for item in yes:
+        assert item in datetime_ranges
+    for item in no:
+        assert item not in datetime_ranges
+
+    datetime_ranges.datetime_ranges.append(
+        DatetimeRange(utc(2022, 2, 10), utc(2022, 2, 20))
+    )
+    assert utc(2022, 2, 15) in datetime_ranges
+
+
+def test_datetime_ranges_contains_many():
+    np = importorskip("numpy")
+
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 1, 1), utc(2022, 2, 1)),
+            DatetimeRange(utc(2022, 3, 1), utc(2022, 4, 1)),
+        ]
+    )
+    datetimes = [utc(2021, 1, 1), utc(2022, 1, 1), utc(2022, 2, 15), utc(2022, 4, 1)]
+    array = np.array(
+        [dt.replace(tzinfo=None) for dt in datetimes] + [None], "datetime64[us]"
+    )
+    expected = [dt in datetime_ranges for dt in datetimes] + [False]
+
+    assert datetime_ranges.contains_many(array).tolist() == expected
+    assert datetime_ranges.datetime_ranges[0].contains_many(array).tolist() == [
+        False,
+        True,
+        False,
+        False,
+        False,
+    ]
+
+
+def test_datetime_ranges_merge():
+    tz = timezone(timedelta(hours=-3))
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 3, 1), utc(2022, 4, 1)),
+            DatetimeRange(utc(2022, 1, 1), utc(2022, 2, 1)),
+            DatetimeRange(utc(2022, 1, 15), datetime(2022, 2, 15, tzinfo=tz)),
+        ]
+    )
+    merged = datetime_ranges.merged()
+    assert merged == DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 1, 1), datetime(2022, 2, 15, tzinfo=tz)),
+            DatetimeRange(utc(2022, 3, 1), utc(2022, 4, 1)),
+        ]
+    )
+    assert merged.datetime_ranges[0].end.tzinfo is tz
+    assert len(datetime_ranges.datetime_ranges) == 3
+
+    datetime_ranges.merge(interpolate=timedelta(days=14))
+    assert datetime_ranges == DatetimeRanges(
+        [DatetimeRange(utc(2022, 1, 1), utc(2022, 4, 1))]
+    )
+
+
+def test_datetime_range_trusted():
+    trusted = DatetimeRange._trusted(utc(2022, 1, 1), utc(2022, 2, 2))
+    assert trusted == DatetimeRange(utc(2022, 1, 1), utc(2022, 2, 2))
+    assert not hasattr(trusted, "__dict__")
+    with raises(ValueError):
+        trusted.end = utc(2021, 1, 1)
+
+
+def test_datetime_ranges_bytes():
+    tz = timezone(timedelta(hours=3))
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 1, 3), utc(2022, 1, 5)),
+            DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 4)),
+        ]
+    )
+    for target in [datetime_ranges, datetime_ranges.merged(), DatetimeRanges()]:
+        loaded = DatetimeRanges.from_bytes(target.to_bytes())
+        assert loaded == target
+        assert loaded.is_normalized is target.is_normalized
+        assert pickle.loads(pickle.dumps(target)) == target
+
+    # Timezones are kept
+    local = DatetimeRanges(
+        [DatetimeRange(utc(2022, 1, 1).astimezone(tz), utc(2022, 1, 2).astimezone(tz))]
+    )
+    loaded = DatetimeRanges.from_bytes(local.to_bytes())
+    assert loaded.datetime_ranges[0].start.tzinfo == tz
+
+    with raises(ValueError):
+        DatetimeRanges.from_bytes(b"nope")
+
+
+class _Timezone(tzinfo):
+    # Without a key, so it can't be serialized
+    def utcoffset(self, dt):
+        return timedelta(hours=1)
+
+    def dst(self, dt):
+        return timedelta(0)
+
+    def tzname(self, dt):
+        return "Custom"
+
+
+def test_datetime_ranges_pickle():
+    custom = _Timezone()
+    named = timezone(timedelta(hours=2), "CEST")
+    for tzinfos in [(custom, custom), (named, named), (timezone.utc, named)]:
+        target = DatetimeRanges(
+            [
+                DatetimeRange(
+                    datetime(2022, 1, 1, tzinfo=tz), datetime(2022, 1, 2, tzinfo=tz)
+                )
+                for tz in tzinfos
+            ]
+        )
+        for loaded in [
+            pickle.loads(pickle.dumps(target)),
+            copy(target),
+            deepcopy(target),
+        ]:
+            assert loaded == target
+            assert [r.start.tzname() for r in loaded.datetime_ranges] == [
+                r.start.tzname() for r in target.datetime_ranges
+            ]
+    with raises(ValueError):
+        DatetimeRanges(
+            [
+                DatetimeRange(
+                    datetime(2022, 1, 1, tzinfo=custom),
+                    datetime(2022, 1, 2, tzinfo=custom),
+                )
+            ]
+        ).to_bytes()
+
+
+def test_datetime_ranges_index_element_edits():
+    datetime_ranges = DatetimeRanges([DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 2))])
+    datetime_ranges.normalize()
+
+    datetime_ranges.datetime_ranges[0] = DatetimeRange(utc(2022, 1, 3), utc(2022, 1, 4))
+    assert utc(2022, 1, 3) in datetime_ranges
+    assert utc(2022, 1, 1) not in datetime_ranges
+
+    # Ranges edited in place need normalizing again
+    datetime_ranges.datetime_ranges[0].end = utc(2022, 1, 5)
+    datetime_ranges.normalize()
+    assert utc(2022, 1, 5) in datetime_ranges
+
+    datetime_ranges.merge()
+    datetime_ranges.datetime_ranges[0].start = utc(2022, 1, 4)
+    datetime_ranges.normalize()
+    assert utc(2022, 1, 3) not in datetime_ranges
+    assert DatetimeRange(utc(2022, 1, 4), utc(2022, 1, 5)) in datetime_ranges
+
+
+def test_datetime_ranges_add_discard():
+    tz = timezone(timedelta(hours=-4))
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 1, 5), utc(2022, 1, 6)),
+            DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 3)),
+        ]
+    )
+    datetime_ranges.add(DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 4)))
+    assert datetime_ranges.datetime_ranges == [
+        DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 4)),
+        DatetimeRange(utc(2022, 1, 5), utc(2022, 1, 6)),
+    ]
+    datetime_ranges.add(DatetimeRange(utc(2022, 1, 4), utc(2022, 1, 8).astimezone(tz)))
+    assert datetime_ranges.datetime_ranges == [
+        DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 8))
+    ]
+    assert datetime_ranges.datetime_ranges[0].end.tzinfo == tz
+
+    datetime_ranges.discard(DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 3)))
+    us = timedelta(microseconds=1)
+    assert datetime_ranges.datetime_ranges == [
+        DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 2) - us),
+        DatetimeRange(utc(2022, 1, 3) + us, utc(2022, 1, 8)),
+    ]
+    assert utc(2022, 1, 2) not in datetime_ranges
+    assert utc(2022, 1, 3) + us in datetime_ranges
+    datetime_ranges.discard(DatetimeRange(utc(2021, 1, 1), utc(2023, 1, 1)))
+    assert not datetime_ranges
+    assert datetime_ranges.is_normalized
+
+
+def test_datetime_ranges_measures():
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 1, 5), utc(2022, 1, 6)),
+            DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 3)),
+            DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 4)),
+        ]
+    )
+    us = timedelta(microseconds=1)
+    assert datetime_ranges.duration() == timedelta(days=4)
+    assert datetime_ranges.gaps().datetime_ranges == [
+        DatetimeRange(utc(2022, 1, 4) + us, utc(2022, 1, 5) - us)
+    ]
+    window = DatetimeRange(utc(2021, 12, 31), utc(2022, 1, 10))
+    assert len(datetime_ranges.gaps(window).datetime_ranges) == 3
+    assert datetime_ranges.coverage(window) == 0.4
+    assert (
+        datetime_ranges.coverage(DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 2))) == 1
+    )
+    assert not DatetimeRanges().gaps()
+    assert DatetimeRanges().coverage(window) == 0
+
+
+def test_datetime_ranges_coverage_many():
+    np = importorskip("numpy")
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(utc(2022, 1, 5), utc(2022, 1, 6)),
+            DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 3)),
+        ]
+    )
+    windows = [
+        DatetimeRange(utc(2021, 12, 31) + timedelta(hours=7 * i), utc(2022, 1, 4))
+        for i in range(12)
+    ] + [
+        DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 2)),
+        DatetimeRange(utc(2022, 1, 4), utc(2022, 1, 4)),
+        DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 9)),
+    ]
+    starts = np.array([w.start.replace(tzinfo=None) for w in windows], "M8[us]")
+    ends = np.array([w.end.replace(tzinfo=None) for w in windows], "M8[us]")
+    expected = [datetime_ranges.coverage(w) for w in windows]
+    assert np.allclose(datetime_ranges.coverage_many(starts, ends), expected)
+    assert not DatetimeRanges().coverage_many(starts, ends).any()
+    with raises(ValueError):
+        datetime_ranges.coverage_many(ends, starts)
+
+
+def test_datetime_ranges_union_intersection_all():
+    rng = Random(0)
+    start = utc(2022, 1, 1)
+    sources = []
+    for _ in range(10):
+        datetime_ranges = []
+        for _ in range(5):
+            s = start + timedelta(minutes=rng.randrange(1_000))
+            datetime_ranges.append(
+                DatetimeRange(s, s + timedelta(minutes=rng.randrange(200)))
+            )
+        sources.append(DatetimeRanges(datetime_ranges))
+    datetimes = [start + timedelta(minutes=minute) for minute in range(1_200)]
+
+    union = DatetimeRanges.union_all(sources)
+    assert union.is_normalized
+    assert [dt in union for dt in datetimes] == [
+        any(dt in source for source in sources) for dt in datetimes
+    ]
+    intersection = DatetimeRanges.intersection_all(sources[:2])
+    assert [dt in intersection for dt in datetimes] == [
+        dt in sources[0] and dt in sources[1] for dt in datetimes
+    ]
+    at_least = DatetimeRanges.at_least(sources, k=4)
+    assert [dt in at_least for dt in datetimes] == [
+        sum(dt in source for source in sources) >= 4 for dt in datetimes
+    ]
+
+    assert DatetimeRanges.union_all([]) == DatetimeRanges()
+    with raises(ValueError):
+        DatetimeRanges.intersection_all([])
@@ -0,0 +1,80 @@
+import pickle
+from datetime import datetime, time, timedelta, timezone
+
+from pytest import raises
+from timematic.enums import Weekday
+
+from timeranges import (
+    DatetimeRange,
+    FrozenTimeRanges,
+    FrozenWeekRange,
+    TimeRange,
+    TimeRanges,
+    WeekRange,
+)
+
+
+def _time_ranges(*hours) -> TimeRanges:
+    return TimeRanges([TimeRange(time(start), time(end)) for start, end in hours])
+
+
+def test_frozen_time_ranges():
+    a = FrozenTimeRanges.from_time_ranges(_time_ranges((8, 10), (9, 12)))
+    b = FrozenTimeRanges.from_time_ranges(_time_ranges((11, 14)))
+
+    # Interned by content, after merging
+    assert a is FrozenTimeRanges.from_time_ranges(_time_ranges((8, 12)))
+    assert hash(a) == hash(FrozenTimeRanges(a.pairs))
+    assert pickle.loads(pickle.dumps(a)) is a
+    assert a.to_time_ranges() == _time_ranges((8, 12))
+    with raises(AttributeError):
+        a.pairs = ()
+
+    assert time(9) in a
+    assert time(13) not in a
+    assert TimeRange(time(8), time(12)) in a
+    assert FrozenTimeRanges.from_time_ranges(_time_ranges((9, 10))) in a
+    with raises(TypeError):
+        1 in a
+
+    assert (a | b).to_time_ranges() == _time_ranges((8, 12)) | _time_ranges((11, 14))
+    assert (a & b).to_time_ranges() == _time_ranges((8, 12)) & _time_ranges((11, 14))
+    # Memoized
+    assert a | b is a | b
+
+
+def test_frozen_week_range():
+    tz = timezone.utc
+    week_range = WeekRange(
+        {
+            Weekday.MONDAY: _time_ranges((8, 12)),
+            Weekday.FRIDAY: _time_ranges((14, 18)),
+        },
+        timezone=tz,
+    )
+    other = WeekRange({Weekday.MONDAY: _time_ranges((10, 20))}, timezone=tz)
+    a = FrozenWeekRange.from_week_range(week_range)
+    b = FrozenWeekRange.from_week_range(other)
+
+    assert a is FrozenWeekRange.from_week_range(week_range)
+    assert pickle.loads(pickle.dumps(a)) is a
+    # Equal days are shared between week ranges
+    assert a.days[Weekday.TUESDAY.value] is b.days[Weekday.TUESDAY.value]
+    assert a.to_week_range() == week_range
+
+    monday = datetime(2022, 1, 3, tzinfo=tz)
+    assert monday + timedelta(hours=9) in a
+    assert monday + timedelta(hours=13) not in a
+    assert DatetimeRange(monday + timedelta(hours=8), monday + timedelta(hours=9)) in a
+    assert b not in a
+    assert a & b in a
+
+    assert (a | b).compile() == (week_range | other).compile()
+    assert (a & b).compile() == (week_range & other).compile()
+    assert a | b is a | b
+    assert a.has_transition(b) == week_range.has_transition(other)
+    window = DatetimeRange(monday + timedelta(hours=11), monday + timedelta(hours=13))
+    assert a.has_transition(window) == week_range.has_transition(window)
+
+    with raises(ValueError):
+        a | FrozenWeekRange.from_week_range(WeekRange())
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from typing import Set
+
+from pytest import raises
+
+import timeranges
+
+
+def _imported(statement: str) -> Set[str]:
+    """Every module `statement` loads, as reported by `-X importtime`."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    modules: Set[str] = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            # Skip the header
+            if cumulative.strip().isdigit():
+                modules.add(name.strip())
+    return modules
+
+
+def test_import_lazy():
+    modules = _imported("import timeranges")
+    assert "timeranges" in modules
+    assert not {"attr", "timematic", "numpy", "zoneinfo"} & modules
+    assert not any(name.startswith("timeranges._") for name in modules)
+
+
+def test_import_week_range():
+    modules = _imported("from timeranges import WeekRange")
+    assert "attr" in modules
+    assert not {"numpy", "zoneinfo", "concurrent.futures"} & modules
+
+
+def test_lazy_attributes():
+    assert set(timeranges.__all__) <= set(dir(timeranges))
+    for name in timeranges.__all__:
+        assert getattr(timeranges, name).__name__ == name
+    with raises(AttributeError):
+        timeranges.Nope  # type: ignore[attr-defined]
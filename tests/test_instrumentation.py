@@ -0,0 +1,51 @@
+from datetime import datetime, time, timedelta, timezone
+
+from pytest import raises
+from timematic.enums import Weekday
+
+from timeranges import DatetimeRange, Instrumentation, TimeRange, TimeRanges, WeekRange
+
+
+def test_instrumentation():
+    time_ranges = TimeRanges(
+        [TimeRange(time(8), time(12)), TimeRange(time(10), time(14))]
+    )
+    week_range = WeekRange({Weekday.MONDAY: time_ranges}, timezone=timezone.utc)
+    dt = datetime(2022, 1, 3, 9, tzinfo=timezone.utc)  # Monday
+    original = TimeRanges.merge
+
+    with Instrumentation() as instrumentation:
+        assert instrumentation.enabled
+        assert TimeRanges.merge is not original
+        with raises(RuntimeError):
+            Instrumentation().enable()
+
+        time_ranges.merge()
+        assert time(9) in time_ranges
+        assert dt in week_range
+        assert dt in week_range
+        assert week_range.has_transition(DatetimeRange(dt, dt + timedelta(hours=7)))
+        WeekRange.from_datetime_range(DatetimeRange(dt, dt + timedelta(hours=1)))
+
+    assert not instrumentation.enabled
+    assert TimeRanges.merge is original
+
+    stats = instrumentation.as_dict()
+    assert stats["TimeRanges.merge"]["calls"] == 1
+    assert stats["TimeRanges.merge"]["elements"] == 2
+    assert stats["TimeRanges.contains"]["calls"] >= 1
+    # Nested calls are counted too, `has_transition` goes through both
+    assert stats["WeekRange.contains"]["calls"] == 3
+    assert stats["WeekRange.has_transition"]["calls"] == 1
+    assert stats["WeekRange.from_datetime_range"]["calls"] == 2
+    # Compiled once, then cached
+    assert stats["CompiledWeekRange.from_pairs"]["calls"] == 1
+    assert stats["WeekRange.compile"]["calls"] >= 2
+    assert all(counters["time_ns"] >= 0 for counters in stats.values())
+
+    # Not counted anymore
+    time_ranges.merge()
+    assert instrumentation.as_dict()["TimeRanges.merge"]["calls"] == 1
+
+    instrumentation.reset()
+    assert instrumentation.as_dict() == {}
@@ -0,0 +1,82 @@
+from datetime import datetime, time, timedelta, timezone
+from threading import Event, Thread
+
+from timematic.enums import Weekday
+
+from timeranges import SharedWeekRange, TimeRange, TimeRanges, WeekRange
+
+_MONDAY = datetime(2022, 1, 3, tzinfo=timezone.utc)
+_MORNING = _MONDAY + timedelta(hours=9)
+_AFTERNOON = _MONDAY + timedelta(hours=15)
+
+
+def _week_range(start: int, end: int) -> WeekRange:
+    return WeekRange(
+        {Weekday.MONDAY: TimeRanges([TimeRange(time(start), time(end))])},
+        timezone=timezone.utc,
+    )
+
+
+def test_shared_week_range():
+    shared = SharedWeekRange(_week_range(8, 12))
+    assert _MORNING in shared
+    assert _AFTERNOON not in shared
+
+    snapshot = shared.snapshot
+    shared.publish(_week_range(14, 18))
+    assert _AFTERNOON in shared
+    # Snapshots don't change
+    assert _MORNING in snapshot
+
+    def edit(week_range: WeekRange) -> None:
+        week_range.day_ranges[Weekday.MONDAY].time_ranges.append(
+            TimeRange(time(8), time(12))
+        )
+        week_range.merge()
+
+    shared.update(edit)
+    assert _MORNING in shared and _AFTERNOON in shared
+    shared.update(lambda week_range: WeekRange(timezone=timezone.utc))
+    assert _MORNING not in shared
+    assert shared.to_week_range() == WeekRange(timezone=timezone.utc)
+
+
+def test_shared_week_range_threads():
+    shared = SharedWeekRange(_week_range(8, 12))
+    stop = Event()
+    errors = []
+    reads = []
+
+    morning = TimeRange(time(8), time(12))
+    afternoon = TimeRange(time(14), time(18))
+
+    def edit(week_range: WeekRange) -> None:
+        day_ranges = week_range.day_ranges[Weekday.MONDAY]
+        is_morning = morning in day_ranges
+        # Empty in between, which readers must never see
+        day_ranges.time_ranges = []
+        day_ranges.add(afternoon if is_morning else morning)
+
+    def write() -> None:
+        while not stop.is_set():
+            shared.update(edit)
+
+    def read() -> None:
+        count = 0
+        while not stop.is_set():
+            snapshot = shared.snapshot
+            if (_MORNING in snapshot) == (_AFTERNOON in snapshot):
+                errors.append(snapshot)
+            count += 1
+        reads.append(count)
+
+    threads = [Thread(target=write)] + [Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    stop.wait(0.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(reads) == 4 and all(reads)
@@ -0,0 +1,93 @@
+from datetime import datetime, time, timedelta, timezone
+from itertools import count, islice
+from random import Random
+
+from pytest import raises
+
+from timeranges import (
+    CompactDatetimeRanges,
+    DatetimeRange,
+    DatetimeRanges,
+    TimeRange,
+    intersection_iter,
+    merge_iter,
+    union_iter,
+)
+
+
+def utc(*args, **kwargs) -> datetime:
+    kwargs["tzinfo"] = timezone.utc
+    return datetime(*args, **kwargs)
+
+
+def _random_ranges(seed: int, size: int = 200):
+    rng = Random(seed)
+    start = utc(2022, 1, 1)
+    ranges = []
+    for _ in range(size):
+        s = start + timedelta(minutes=rng.randrange(10_000))
+        ranges.append(DatetimeRange(s, s + timedelta(minutes=rng.randrange(60))))
+    return sorted(ranges)
+
+
+def test_merge_iter():
+    ranges = _random_ranges(0)
+    expected = DatetimeRanges(ranges).merged().datetime_ranges
+    assert list(merge_iter(ranges)) == expected
+
+    interpolate = timedelta(minutes=30)
+    expected = DatetimeRanges(ranges).merged(interpolate).datetime_ranges
+    assert list(merge_iter(ranges, interpolate=interpolate)) == expected
+
+
+def test_merge_iter_time_ranges():
+    ranges = [TimeRange(time(1), time(2)), TimeRange(time(2), time(3))]
+    assert list(merge_iter(ranges)) == [TimeRange(time(1), time(3))]
+    ranges.append(TimeRange(time(23), time(23, 50)))
+    assert list(merge_iter(ranges, interpolate=timedelta(minutes=30)))[-1] == (
+        TimeRange(time(23), time.max)
+    )
+
+
+def test_merge_iter_lazy():
+    # Unbounded, disjoint ranges
+    start = utc(2022, 1, 1)
+    ranges = (
+        DatetimeRange(
+            start + timedelta(hours=2 * i), start + timedelta(hours=2 * i + 1)
+        )
+        for i in count()
+    )
+    merged = list(islice(merge_iter(ranges), 3))
+    assert merged[-1] == DatetimeRange(
+        start + timedelta(hours=4), start + timedelta(hours=5)
+    )
+
+
+def test_merge_iter_invalid():
+    ranges = [
+        DatetimeRange(utc(2022, 1, 2), utc(2022, 1, 3)),
+        DatetimeRange(utc(2022, 1, 1), utc(2022, 1, 3)),
+    ]
+    with raises(ValueError):
+        list(merge_iter(ranges))
+    with raises(TypeError):
+        list(merge_iter([ranges[0], TimeRange()]))
+
+
+def test_union_iter():
+    a, b = _random_ranges(1), _random_ranges(2)
+    assert list(union_iter(a, b)) == DatetimeRanges(a + b).merged().datetime_ranges
+    assert list(union_iter()) == []
+
+
+def test_intersection_iter():
+    a, b, c = _random_ranges(1), _random_ranges(2), _random_ranges(3)
+    a_, b_, c_ = (
+        CompactDatetimeRanges.from_datetime_ranges(DatetimeRanges(r)) for r in (a, b, c)
+    )
+    expected = list(a_ & b_ & c_)
+    assert list(intersection_iter(a, b, c)) == expected
+    assert list(intersection_iter(a)) == DatetimeRanges(a).merged().datetime_ranges
+    with raises(ValueError):
+        intersection_iter()
@@ -1,10 +1,24 @@
+import pickle
+from copy import deepcopy
 from datetime import datetime, time, timedelta, timezone
+from functools import reduce
+from operator import and_, or_
+from random import Random
 from typing import Tuple
 
-from pytest import raises
+from pytest import importorskip, raises, skip
 from timematic.enums import Weekday
 
-from timeranges import TimeRange, TimeRanges, WeekRange
+from timeranges import (
+    DatetimeRange,
+    DatetimeRanges,
+    TimeRange,
+    TimeRanges,
+    WeekRange,
+    set_offset_table_cache_size,
+)
+from timeranges._keys import datetime_to_key
+from timeranges._tz import OFFSET_TABLE_CACHE_SIZE, OffsetTable, offset_table
 
 
 def test_timerange_invalid():
@@ -114,3 +128,771 @@ def test_has_transition():
 
     for wr in no:
         assert not target.has_transition(wr)
+
+
+def test_timeranges_contains_timerange():
+    timeranges = TimeRanges(
+        [
+            TimeRange(time(5), time(7)),
+            TimeRange(time(1), time(9)),
+            TimeRange(time(12), time(14)),
+        ]
+    )
+    assert not timeranges.is_normalized
+    yes = [TimeRange(time(2), time(8)), TimeRange(time(12), time(14))]
+    no = [TimeRange(time(8), time(13)), TimeRange(time(0), time(2))]
+
+    for tr in yes:
+        assert tr in timeranges
+    for tr in no:
+        assert tr not in timeranges
+
+    timeranges.normalize()
+    assert timeranges.is_normalized
+    assert timeranges.time_ranges == [
+        TimeRange(time(1), time(9)),
+        TimeRange(time(12), time(14)),
+    ]
+
+
+def test_timeranges_index_invalidation():
+    timeranges = TimeRanges([TimeRange(time(2), time(4))])
+    assert time(10) not in timeranges
+
+    timeranges.time_ranges.append(TimeRange(time(9), time(11)))
+    assert time(10) in timeranges
+
+    timeranges.time_ranges = [TimeRange(time(0), time(1))]
+    assert time(10) not in timeranges
+    assert time(0, 30) in timeranges
+
+    with raises(TypeError):
+        time(0, 30, tzinfo=timezone.utc) in timeranges
+
+
+def test_timeranges_index_element_edits():
+    timeranges = TimeRanges([TimeRange(time(1), time(2))])
+    timeranges.normalize()
+
+    # Same length, different ranges
+    timeranges.time_ranges[0] = TimeRange(time(3), time(4))
+    assert time(3) in timeranges
+    assert time(1) not in timeranges
+
+    # Ranges edited in place need normalizing again
+    timeranges.time_ranges[0].end = time(5)
+    timeranges.normalize()
+    assert time(4, 30) in timeranges
+    timeranges.time_ranges[0].start = time(4)
+    timeranges.normalize()
+    assert time(3) not in timeranges
+
+    timeranges.merge()
+    timeranges.time_ranges[0].end = time(6)
+    timeranges.time_ranges.append(TimeRange(time(5), time(7)))
+    timeranges.normalize()
+    assert time(6, 30) in timeranges
+    assert timeranges.time_ranges == [TimeRange(time(4), time(7))]
+
+
+def _time_ranges(*intervals: Tuple[int, int]) -> TimeRanges:
+    return TimeRanges([TimeRange(time(s), time(e)) for s, e in intervals])
+
+
+def test_timeranges_set_operations():
+    a = _time_ranges((0, 10), (12, 16))
+    b = _time_ranges((2, 4), (8, 13), (15, 20))
+    us = timedelta(microseconds=1)
+
+    def shift(t: time, delta: timedelta) -> time:
+        return (datetime.combine(datetime.min, t) + delta).time()
+
+    assert a & b == _time_ranges((2, 4), (8, 10), (12, 13), (15, 16))
+    assert a | b == _time_ranges((0, 20))
+    assert a - b == TimeRanges(
+        [
+            TimeRange(time(0), shift(time(2), -us)),
+            TimeRange(shift(time(4), us), shift(time(8), -us)),
+            TimeRange(shift(time(13), us), shift(time(15), -us)),
+        ]
+    )
+    assert a ^ b == TimeRanges(
+        [
+            TimeRange(time(0), shift(time(2), -us)),
+            TimeRange(shift(time(4), us), shift(time(8), -us)),
+            TimeRange(shift(time(10), us), shift(time(12), -us)),
+            TimeRange(shift(time(13), us), shift(time(15), -us)),
+            TimeRange(shift(time(16), us), time(20)),
+        ]
+    )
+    assert a - TimeRanges() == a
+    assert TimeRanges() & a == TimeRanges()
+
+
+def test_timeranges_set_operations_membership():
+    rng = Random(0)
+
+    def random_time_ranges() -> TimeRanges:
+        intervals = []
+        for _ in range(rng.randint(0, 8)):
+            s = rng.randint(0, 22)
+            intervals.append((s, rng.randint(s, 23)))
+        return _time_ranges(*intervals)
+
+    probes = [time(h, m) for h in range(24) for m in (0, 30)]
+    for _ in range(50):
+        a, b = random_time_ranges(), random_time_ranges()
+        for t in probes:
+            assert (t in a & b) == (t in a and t in b)
+            assert (t in a | b) == (t in a or t in b)
+            assert (t in a - b) == (t in a and t not in b)
+            assert (t in a ^ b) == ((t in a) != (t in b))
+
+
+def test_week_range_set_operations():
+    a = WeekRange(
+        {
+            Weekday.MONDAY: _time_ranges((2, 6)),
+            Weekday.TUESDAY: _time_ranges((0, 23)),
+        }
+    )
+    b = WeekRange({Weekday.MONDAY: _time_ranges((4, 8))})
+
+    assert (a & b).day_ranges[Weekday.MONDAY] == _time_ranges((4, 6))
+    assert not (a & b).day_ranges[Weekday.TUESDAY]
+    assert Weekday.TUESDAY not in b.day_ranges
+
+    diff = a - b
+    assert datetime(2021, 12, 6, 3) in diff
+    assert datetime(2021, 12, 6, 5) not in diff
+    assert datetime(2021, 12, 7, 12) in diff
+
+    sym = a ^ b
+    assert datetime(2021, 12, 6, 3) in sym
+    assert datetime(2021, 12, 6, 5) not in sym
+    assert datetime(2021, 12, 6, 7) in sym
+    assert datetime(2021, 12, 7, 12) in sym
+
+
+def test_contains_many():
+    np = importorskip("numpy")
+
+    timeranges = _time_ranges((2, 4), (6, 8))
+    times = [time(1), time(2), time(3), time(5), time(8), time(9)]
+    expected = [t in timeranges for t in times]
+    deltas = np.array(
+        [datetime.combine(datetime.min, t) - datetime.min for t in times],
+        dtype="timedelta64[us]",
+    )
+    assert timeranges.contains_many(deltas).tolist() == expected
+    assert timeranges.time_ranges[0].contains_many(deltas).tolist() == [
+        t in timeranges.time_ranges[0] for t in times
+    ]
+
+    week_range = WeekRange(
+        {
+            Weekday.MONDAY: _time_ranges((22, 23)),
+            Weekday.SUNDAY: _time_ranges((0, 1)),
+        },
+        timezone=timezone(timedelta(hours=-3)),
+    )
+    datetimes = [
+        datetime(2021, 12, 7, 1, 30, tzinfo=timezone.utc),  # Monday 22:30 local
+        datetime(2021, 12, 7, 3, 30, tzinfo=timezone.utc),  # Tuesday 00:30 local
+        datetime(2021, 12, 12, 3, 30, tzinfo=timezone.utc),  # Sunday 00:30 local
+        datetime(2021, 12, 12, 5, 30, tzinfo=timezone.utc),  # Sunday 02:30 local
+    ]
+    array = np.array([dt.replace(tzinfo=None) for dt in datetimes], "datetime64[us]")
+    expected = [dt in week_range for dt in datetimes]
+    assert expected == [True, False, True, False]
+    assert week_range.contains_many(array).tolist() == expected
+    assert week_range.contains_many(array.view(np.int64)).tolist() == expected
+    assert not week_range.contains_many(np.array(["NaT"], "datetime64[us]"))[0]
+
+
+def test_timeranges_merge():
+    timeranges = _time_ranges((5, 6), (1, 2), (2, 3), (7, 9), (8, 8))
+    merged = timeranges.merged()
+    assert merged == _time_ranges((1, 3), (5, 6), (7, 9))
+    assert merged.is_normalized
+    assert len(timeranges.time_ranges) == 5
+
+    interpolated = timeranges.merged(interpolate=timedelta(hours=1))
+    assert interpolated == _time_ranges((1, 3), (5, 9))
+    interpolated = timeranges.merged(interpolate=timedelta(hours=15))
+    assert interpolated == TimeRanges([TimeRange(time(1), time.max)])
+
+    timeranges.merge()
+    assert timeranges == merged
+    assert timeranges.time_ranges[0] is not merged.time_ranges[0]
+
+    empty = TimeRanges()
+    empty.merge(interpolate=timedelta(hours=1))
+    assert empty == TimeRanges()
+
+
+def test_timerange_trusted():
+    trusted = TimeRange._trusted(time(1), time(2))
+    assert trusted == TimeRange(time(1), time(2))
+    assert not hasattr(trusted, "__dict__")
+    with raises(ValueError):
+        trusted.end = time(0)
+
+
+def test_week_range_from_datetime_range():
+    utc = timezone.utc
+
+    # Monday 12:00 -> Tuesday 08:00
+    week_range = WeekRange.from_datetime_range(
+        DatetimeRange(
+            datetime(2021, 12, 6, 12, tzinfo=utc), datetime(2021, 12, 7, 8, tzinfo=utc)
+        )
+    )
+    assert week_range == WeekRange(
+        {
+            Weekday.MONDAY: TimeRanges([TimeRange(time(12), time.max)]),
+            Weekday.TUESDAY: TimeRanges([TimeRange(time(0), time(8))]),
+        },
+        timezone=utc,
+    )
+
+    # Monday 12:00 -> Thursday 08:00 of the following week, every weekday is full
+    week_range = WeekRange.from_datetime_range(
+        DatetimeRange(
+            datetime(2021, 12, 6, 12, tzinfo=utc), datetime(2021, 12, 16, 8, tzinfo=utc)
+        )
+    )
+    assert week_range == WeekRange(
+        {weekday: TimeRanges([TimeRange()]) for weekday in Weekday}, timezone=utc
+    )
+
+    # Exactly a week apart, the first weekday is covered twice
+    week_range = WeekRange.from_datetime_range(
+        DatetimeRange(
+            datetime(2021, 12, 6, 12, tzinfo=utc), datetime(2021, 12, 13, 8, tzinfo=utc)
+        )
+    )
+    assert week_range.day_ranges[Weekday.MONDAY] == _time_ranges((0, 8)) | TimeRanges(
+        [TimeRange(time(12), time.max)]
+    )
+
+    # Multi-year ranges are converted in constant time
+    week_range = WeekRange.from_datetime_range(
+        DatetimeRange(datetime(1, 1, 1, tzinfo=utc), datetime(9999, 1, 1, tzinfo=utc))
+    )
+    assert all(
+        week_range.day_ranges[weekday] == TimeRanges([TimeRange()])
+        for weekday in Weekday
+    )
+
+
+def test_week_range_from_datetime_ranges():
+    utc = timezone.utc
+    tz = timezone(timedelta(hours=-3))
+
+    datetime_ranges = DatetimeRanges(
+        [
+            DatetimeRange(
+                datetime(2021, 12, 6, 1, tzinfo=utc),
+                datetime(2021, 12, 6, 2, tzinfo=utc),
+            ),
+            DatetimeRange(
+                datetime(2021, 12, 13, 1, 30, tzinfo=utc),
+                datetime(2021, 12, 13, 4, tzinfo=utc),
+            ),
+        ]
+    )
+    week_range = WeekRange.from_datetime_ranges(datetime_ranges, replace_timezone=tz)
+    assert week_range == WeekRange(
+        {
+            Weekday.SUNDAY: TimeRanges([TimeRange(time(22), time.max)]),
+            Weekday.MONDAY: _time_ranges((0, 1)),
+        },
+        timezone=tz,
+    )
+
+    mixed = DatetimeRanges(
+        [
+            DatetimeRange(
+                datetime(2021, 12, 6, tzinfo=utc), datetime(2021, 12, 7, tzinfo=utc)
+            ),
+            DatetimeRange(
+                datetime(2021, 12, 6, tzinfo=tz), datetime(2021, 12, 7, tzinfo=tz)
+            ),
+        ]
+    )
+    with raises(ValueError):
+        WeekRange.from_datetime_ranges(mixed)
+
+
+def test_week_range_compile():
+    week_range = WeekRange(
+        {
+            Weekday.MONDAY: _time_ranges((0, 2)),
+            Weekday.SUNDAY: TimeRanges([TimeRange(time(22), time.max)]),
+        },
+        timezone=timezone.utc,
+    )
+    compiled = week_range.compile()
+    assert week_range.compile() is compiled
+
+    monday = datetime(2021, 12, 6, 1, tzinfo=timezone.utc)
+    assert monday in compiled
+    assert monday + timedelta(days=1) not in compiled
+
+    # Ranges wrapping around from Sunday into Monday
+    wrapping = DatetimeRange(monday - timedelta(hours=2), monday)
+    assert wrapping in compiled
+    assert wrapping in week_range
+    assert DatetimeRange(monday - timedelta(hours=4), monday) not in week_range
+    assert DatetimeRange(monday, monday + timedelta(days=7)) not in week_range
+
+    # Modifying the days invalidates the compiled form
+    week_range.day_ranges[Weekday.TUESDAY] = _time_ranges((0, 2))
+    assert week_range.compile() is not compiled
+    assert monday + timedelta(days=1) in week_range
+
+    week_range.day_ranges[Weekday.TUESDAY].time_ranges = []
+    assert monday + timedelta(days=1) not in week_range
+
+    assert monday + timedelta(minutes=30) in week_range
+    week_range.timezone = timezone(timedelta(hours=1))
+    assert monday + timedelta(minutes=30) not in week_range
+    assert monday - timedelta(hours=1) in week_range
+
+
+def test_week_range_reads_keep_days():
+    week_range = WeekRange(
+        {Weekday.MONDAY: _time_ranges((9, 17))}, timezone=timezone.utc
+    )
+    same = WeekRange({Weekday.MONDAY: _time_ranges((9, 17))}, timezone=timezone.utc)
+    compiled = week_range.compile()
+    tuesday = datetime(2021, 12, 7, 8, tzinfo=timezone.utc)
+
+    assert not week_range.has_transition(
+        DatetimeRange(tuesday, tuesday + timedelta(hours=2))
+    )
+    assert week_range not in WeekRange(
+        {Weekday.TUESDAY: _time_ranges((0, 2))}, timezone=timezone.utc
+    )
+    assert WeekRange({Weekday.TUESDAY: TimeRanges()}, timezone=timezone.utc) in (
+        week_range
+    )
+    assert list(week_range.day_ranges) == [Weekday.MONDAY]
+    assert week_range == same
+    assert week_range.compile() is compiled
+
+
+def test_week_range_compile_cache():
+    week_range = WeekRange(
+        {Weekday.MONDAY: _time_ranges((9, 17))}, timezone=timezone.utc
+    )
+    monday = datetime(2021, 12, 6, tzinfo=timezone.utc)
+    compiled = week_range.compile()
+
+    # Changes to other ranges keep the compiled form
+    other = _time_ranges((1, 3), (2, 4))
+    other.merge()
+    other.add(TimeRange(time(5), time(6)))
+    other.time_ranges[0].end = time(5)
+    assert week_range.has_transition(
+        DatetimeRange(monday.replace(hour=8), monday.replace(hour=10))
+    )
+    assert week_range.compile() is compiled
+
+    # Changes to the days in place don't
+    week_range.day_ranges[Weekday.MONDAY].time_ranges.append(
+        TimeRange(time(18), time(19))
+    )
+    assert monday.replace(hour=18, minute=30) in week_range
+    week_range.day_ranges[Weekday.MONDAY].time_ranges[0].end = time(10)
+    week_range.day_ranges[Weekday.MONDAY].normalize()
+    assert monday.replace(hour=12) not in week_range
+    week_range.day_ranges[Weekday.MONDAY].add(TimeRange(time(12), time(13)))
+    assert monday.replace(hour=12) in week_range
+
+
+def test_week_range_offset_table():
+    zoneinfo = importorskip("zoneinfo")
+    try:
+        tz = zoneinfo.ZoneInfo("Europe/Paris")
+    except zoneinfo.ZoneInfoNotFoundError:  # pragma: no cover
+        skip("No timezone data")
+    week_range = WeekRange(
+        {weekday: _time_ranges((1, 3)) for weekday in Weekday}, timezone=tz
+    )
+    # Around both DST transitions of 2021, and outside of the horizon
+    starts = [datetime(2021, 3, 27), datetime(2021, 10, 30), datetime(1990, 3, 24)]
+    for horizon in [(2000, 2050), (2021, 2022)]:
+        compiled = week_range.compile(horizon)
+        for start in starts:
+            for minutes in range(0, 3 * 24 * 60, 15):
+                dt = start.replace(tzinfo=timezone.utc) + timedelta(minutes=minutes)
+                assert (dt in compiled) is (
+                    time(1) <= dt.astimezone(tz).time() <= time(3)
+                )
+                hour = WeekRange.from_datetime_range(
+                    DatetimeRange(dt, dt + timedelta(hours=1)), replace_timezone=tz
+                )
+                for local in [
+                    dt.astimezone(tz),
+                    (dt + timedelta(hours=1)).astimezone(tz),
+                ]:
+                    assert local.time() in hour.day_ranges[Weekday(local.weekday())]
+
+
+def test_offset_table_lazy():
+    zoneinfo = importorskip("zoneinfo")
+    try:
+        tz = zoneinfo.ZoneInfo("Europe/Paris")
+    except zoneinfo.ZoneInfoNotFoundError:  # pragma: no cover
+        skip("No timezone data")
+
+    def year(y: int) -> int:
+        return datetime_to_key(datetime(y, 1, 1, tzinfo=timezone.utc))
+
+    table = OffsetTable.build(tz, horizon=(2000, 2050))
+    assert table._loaded is None
+    summer = datetime(2021, 7, 1, tzinfo=timezone.utc)
+    assert table.local_key(summer) == datetime_to_key(summer) + 2 * 3600 * 10**6
+    # Only the years looked up, and those in between
+    assert (table._loaded.low, table._loaded.high) == (year(2021), year(2022))
+    assert table.offset(year(2030) + 1) == 3600 * 10**6
+    assert (table._loaded.low, table._loaded.high) == (year(2021), year(2031))
+    assert table.offset(year(2005)) == 3600 * 10**6
+    assert (table._loaded.low, table._loaded.high) == (year(2005), year(2031))
+    assert table.constant_offset(year(2020), year(2020) + 10**6) == 3600 * 10**6
+    assert table.constant_offset(year(2020), year(2021)) is None
+    # Outside of the horizon
+    assert table.offset(year(2060)) == 3600 * 10**6
+    assert table._loaded.high == year(2031)
+
+    compiled = WeekRange({Weekday.MONDAY: _time_ranges((1, 3))}, timezone=tz).compile(
+        (2000, 2100)
+    )
+    compiled.warm_up()
+    assert compiled._offsets._loaded is not None
+
+
+def test_offset_table_cache_size():
+    tz = timezone(timedelta(hours=2))
+    set_offset_table_cache_size(1)
+    try:
+        table = offset_table(tz)
+        assert offset_table(tz) is table
+        offset_table(timezone.utc)
+        assert offset_table(tz) is not table
+    finally:
+        set_offset_table_cache_size(OFFSET_TABLE_CACHE_SIZE)
+
+
+def test_week_range_to_datetime_ranges():
+    week_range = WeekRange(
+        {
+            Weekday.MONDAY: _time_ranges((0, 2)),
+            Weekday.WEDNESDAY: _time_ranges((10, 12), (11, 14)),
+            Weekday.SUNDAY: TimeRanges([TimeRange(time(22), time.max)]),
+        },
+        timezone=timezone(timedelta(hours=-3)),
+    )
+    start = datetime(2021, 12, 6, 1, tzinfo=timezone.utc)
+    end = start + timedelta(weeks=3)
+    datetime_ranges = week_range.to_datetime_ranges(start, end)
+    assert list(week_range.iter_datetime_ranges(start, end)) == (
+        datetime_ranges.datetime_ranges
+    )
+    # Sunday wraps around into Monday, and the first one is clipped to `start`
+    assert datetime_ranges.datetime_ranges[:2] == [
+        DatetimeRange(start, datetime(2021, 12, 6, 5, tzinfo=timezone.utc)),
+        DatetimeRange(
+            datetime(2021, 12, 8, 13, tzinfo=timezone.utc),
+            datetime(2021, 12, 8, 17, tzinfo=timezone.utc),
+        ),
+    ]
+    assert len(datetime_ranges.datetime_ranges) == 7
+    assert datetime_ranges.is_normalized
+
+    with raises(ValueError):
+        week_range.to_datetime_ranges(end, start)
+    assert not WeekRange(timezone=timezone.utc).to_datetime_ranges(start, end)
+
+
+def test_week_range_to_datetime_ranges_dst():
+    zoneinfo = importorskip("zoneinfo")
+    try:
+        tz = zoneinfo.ZoneInfo("America/New_York")
+    except zoneinfo.ZoneInfoNotFoundError:  # pragma: no cover
+        skip("No timezone data")
+    week_range = WeekRange(
+        {
+            Weekday.SUNDAY: _time_ranges((1, 3)),
+            Weekday.MONDAY: _time_ranges((9, 17)),
+        },
+        timezone=tz,
+    )
+    # Spring forward and fall back, inside and outside of the horizon
+    for start in [datetime(2021, 3, 1), datetime(2021, 10, 25), datetime(1990, 3, 25)]:
+        start = start.replace(tzinfo=timezone.utc)
+        end = start + timedelta(weeks=3)
+        datetime_ranges = week_range.to_datetime_ranges(start, end)
+        for minutes in range(0, 3 * 7 * 24 * 60, 30):
+            dt = start + timedelta(minutes=minutes)
+            assert (dt in datetime_ranges) is (dt in week_range)
+
+
+def test_week_range_transitions():
+    week_range = WeekRange(
+        {
+            Weekday.MONDAY: _time_ranges((0, 2)),
+            Weekday.SUNDAY: TimeRanges([TimeRange(time(22), time.max)]),
+        },
+        timezone=timezone(timedelta(hours=1)),
+    )
+    monday = datetime(2021, 12, 6, tzinfo=timezone(timedelta(hours=1)))
+    # Sunday wraps around into Monday without a transition in between
+    assert week_range.next_transition(monday - timedelta(hours=3)) == (
+        monday - timedelta(hours=2)
+    )
+    assert week_range.next_transition(monday - timedelta(hours=2)) == (
+        monday + timedelta(hours=2, microseconds=1)
+    )
+    assert week_range.previous_transition(monday) == monday - timedelta(hours=2)
+    assert week_range.previous_transition(monday - timedelta(hours=2)) == (
+        monday - timedelta(hours=2)
+    )
+    # In the timezone of the datetime
+    utc = week_range.next_transition(monday.astimezone(timezone.utc))
+    assert utc is not None and utc.tzinfo is timezone.utc
+
+    assert WeekRange().next_transition(monday) is None
+    full = WeekRange({weekday: TimeRanges([TimeRange()]) for weekday in Weekday})
+    assert full.previous_transition(monday) is None
+
+
+def test_week_range_transitions_dst():
+    zoneinfo = importorskip("zoneinfo")
+    np = importorskip("numpy")
+    try:
+        tz = zoneinfo.ZoneInfo("America/New_York")
+    except zoneinfo.ZoneInfoNotFoundError:  # pragma: no cover
+        skip("No timezone data")
+    week_range = WeekRange(
+        {
+            Weekday.SUNDAY: _time_ranges((1, 3)),
+            Weekday.MONDAY: _time_ranges((9, 17)),
+        },
+        timezone=tz,
+    )
+    us = timedelta(microseconds=1)
+    datetimes = [
+        datetime(2021, 3, 14, tzinfo=timezone.utc) + timedelta(minutes=37 * i)
+        for i in range(100)
+    ] + [
+        datetime(2021, 11, 7, tzinfo=timezone.utc) + timedelta(minutes=37 * i)
+        for i in range(100)
+    ]
+    for dt in datetimes:
+        contained = dt in week_range
+        after = week_range.next_transition(dt)
+        before = week_range.previous_transition(dt)
+        assert after is not None and before is not None
+        assert before <= dt < after
+        assert (after in week_range) is not contained
+        assert (after - us in week_range) is contained
+        assert (before in week_range) is contained
+        assert (before - us in week_range) is not contained
+
+    array = np.array([dt.replace(tzinfo=None) for dt in datetimes], "datetime64[us]")
+    expected = [week_range.next_transition(dt) for dt in datetimes]
+    assert week_range.next_transition_many(array).tolist() == [
+        dt.astimezone(timezone.utc).replace(tzinfo=None) for dt in expected
+    ]
+    expected = [week_range.previous_transition(dt) for dt in datetimes]
+    assert week_range.previous_transition_many(array).tolist() == [
+        dt.astimezone(timezone.utc).replace(tzinfo=None) for dt in expected
+    ]
+    assert np.isnat(week_range.next_transition_many(np.array(["NaT"], "M8[us]")))[0]
+
+
+def test_time_ranges_bytes():
+    time_ranges = _time_ranges((3, 5), (1, 4))
+    for target in [time_ranges, time_ranges.merged(), TimeRanges()]:
+        loaded = TimeRanges.from_bytes(target.to_bytes())
+        assert loaded == target
+        assert loaded.is_normalized is target.is_normalized
+        assert pickle.loads(pickle.dumps(target)) == target
+
+
+def test_week_range_bytes():
+    week_range = WeekRange(
+        {
+            Weekday.SUNDAY: _time_ranges((1, 3)),
+            Weekday.MONDAY: _time_ranges((9, 17), (8, 10)),
+            Weekday.FRIDAY: TimeRanges(),
+        },
+        timezone=timezone(timedelta(hours=-5)),
+    )
+    for target in [week_range, WeekRange()]:
+        loaded = WeekRange.from_bytes(target.to_bytes())
+        assert loaded == target
+        assert loaded.timezone == target.timezone
+        assert pickle.loads(pickle.dumps(target)) == target
+
+    zoneinfo = importorskip("zoneinfo")
+    try:
+        tz = zoneinfo.ZoneInfo("Europe/Paris")
+    except zoneinfo.ZoneInfoNotFoundError:  # pragma: no cover
+        skip("No timezone data")
+    week_range.timezone = tz
+    assert WeekRange.from_bytes(week_range.to_bytes()).timezone is tz
+
+    with raises(ValueError):
+        TimeRanges.from_bytes(week_range.to_bytes())
+
+
+def test_week_range_pickle():
+    tz = timezone(timedelta(hours=2), "CEST")
+    week_range = WeekRange({Weekday.MONDAY: _time_ranges((9, 17))}, timezone=tz)
+    for loaded in [pickle.loads(pickle.dumps(week_range)), deepcopy(week_range)]:
+        assert loaded == week_range
+        assert loaded.timezone.tzname(None) == "CEST"
+
+
+def test_time_ranges_add_discard():
+    rng = Random(0)
+    time_ranges = _time_ranges((5, 6), (1, 3))
+    expected = time_ranges.merged()
+    for _ in range(200):
+        start = rng.randrange(24 * 60 * 60)
+        end = min(24 * 60 * 60 - 1, start + rng.randrange(3 * 60 * 60))
+        time_range = TimeRange(
+            time(start // 3600, start // 60 % 60, start % 60),
+            time(end // 3600, end // 60 % 60, end % 60),
+        )
+        if rng.random() < 0.6:
+            time_ranges.add(time_range)
+            expected = expected | TimeRanges([time_range])
+        else:
+            time_ranges.discard(time_range)
+            expected = expected - TimeRanges([time_range])
+        assert time_ranges == expected
+        assert time_ranges.is_normalized
+
+    with raises(TypeError):
+        time_ranges.add(time(1))
+
+
+def test_time_ranges_add_week_range():
+    week_range = WeekRange(
+        {Weekday.MONDAY: _time_ranges((1, 3))}, timezone=timezone.utc
+    )
+    monday = datetime(2021, 12, 6, 5, tzinfo=timezone.utc)
+    assert monday not in week_range
+    week_range.day_ranges[Weekday.MONDAY].add(TimeRange(time(3), time(6)))
+    assert monday in week_range
+    week_range.day_ranges[Weekday.MONDAY].discard(TimeRange(time(4), time(6)))
+    assert monday not in week_range
+
+
+def test_time_ranges_measures():
+    time_ranges = _time_ranges((1, 3), (2, 4), (20, 22))
+    assert time_ranges.duration() == timedelta(hours=5)
+    assert time_ranges.gaps() == TimeRanges(
+        [
+            TimeRange(time(0), time(0, 59, 59, 999999)),
+            TimeRange(time(4, 0, 0, 1), time(19, 59, 59, 999999)),
+            TimeRange(time(22, 0, 0, 1), time.max),
+        ]
+    )
+    assert time_ranges.coverage() == 5 / 24
+    assert time_ranges.coverage(TimeRange(time(2), time(6))) == 0.5
+    assert time_ranges.coverage(TimeRange(time(2), time(2))) == 1.0
+    assert TimeRanges([TimeRange()]).duration() == timedelta(days=1)
+    assert not TimeRanges([TimeRange()]).gaps()
+
+
+def test_week_range_measures():
+    week_range = WeekRange(
+        {Weekday.MONDAY: _time_ranges((1, 3)), Weekday.SUNDAY: _time_ranges((0, 12))},
+        timezone=timezone.utc,
+    )
+    assert week_range.duration() == timedelta(hours=14)
+    # Gaps exclude the bounds of the ranges, a microsecond each
+    gaps_duration = week_range.gaps().duration()
+    assert gaps_duration == timedelta(weeks=1, hours=-14, microseconds=-3)
+    assert (week_range.gaps() | week_range).duration() == timedelta(
+        weeks=1, microseconds=-3
+    )
+    monday = datetime(2021, 12, 6, tzinfo=timezone.utc)
+    window = DatetimeRange(monday, monday + timedelta(weeks=2))
+    assert week_range.coverage(window) == 14 / (7 * 24)
+
+
+def _random_time_ranges(rng: Random, size: int) -> TimeRanges:
+    time_ranges = []
+    for _ in range(size):
+        start = rng.randrange(24 * 60)
+        end = min(start + rng.randrange(180), 24 * 60 - 1)
+        time_ranges.append(TimeRange(time(*divmod(start, 60)), time(*divmod(end, 60))))
+    return TimeRanges(time_ranges)
+
+
+def test_time_ranges_union_intersection_all():
+    rng = Random(0)
+    sources = [_random_time_ranges(rng, 4) for _ in range(20)]
+    times = [time(*divmod(minute, 60)) for minute in range(24 * 60)]
+
+    union = TimeRanges.union_all(sources)
+    assert union == reduce(or_, sources)
+    intersection = TimeRanges.intersection_all(sources[:3])
+    expected = reduce(and_, sources[:3])
+    assert [t in intersection for t in times] == [t in expected for t in times]
+    assert TimeRanges.union_all([]) == TimeRanges()
+    with raises(ValueError):
+        TimeRanges.intersection_all([])
+
+    at_least = TimeRanges.at_least(sources, k=3)
+    assert at_least.is_normalized
+    assert [t in at_least for t in times] == [
+        sum(t in source for source in sources) >= 3 for t in times
+    ]
+
+
+def test_week_range_union_intersection_all():
+    rng = Random(1)
+    sources = [
+        WeekRange(
+            {
+                Weekday(weekday): _random_time_ranges(rng, 3)
+                for weekday in rng.sample(range(7), 4)
+            },
+            timezone=timezone.utc,
+        )
+        for _ in range(10)
+    ]
+
+    assert WeekRange.union_all(sources).compile() == reduce(or_, sources).compile()
+    assert (
+        WeekRange.intersection_all(sources[:2]).compile()
+        == (sources[0] & sources[1]).compile()
+    )
+    at_least = WeekRange.at_least(sources, k=2)
+    start = datetime(2022, 1, 3, tzinfo=timezone.utc)  # Monday
+    for minute in range(0, 7 * 24 * 60, 7):
+        dt = start + timedelta(minutes=minute)
+        assert (dt in at_least) == (sum(dt in source for source in sources) >= 2)
+
+    with raises(ValueError):
+        WeekRange.union_all([WeekRange(timezone=timezone.utc), WeekRange()])
+
+
+def test_compiled_week_range_warm_up():
+    tz = timezone(timedelta(hours=2))
+    week_range = WeekRange(
+        {Weekday.MONDAY: TimeRanges([TimeRange(time(8), time(12))])}, timezone=tz
+    )
+    compiled = week_range.compile()
+    compiled.warm_up()
+    assert compiled._offsets is not None
+    assert compiled._boundaries == [8 * 3600 * 10**6, 12 * 3600 * 10**6 + 1]
+    assert datetime(2022, 1, 3, 9, tzinfo=tz) in compiled
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+from random import Random
+
+from timeranges import DatetimeRange, DatetimeRanges, DatetimeRangesTree
+
+_START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+def _random_ranges(rng: Random, count: int) -> DatetimeRanges:
+    datetime_ranges = []
+    for _ in range(count):
+        start = _START + timedelta(hours=rng.randint(0, 200))
+        end = start + timedelta(hours=rng.randint(0, 30))
+        datetime_ranges.append(DatetimeRange(start, end))
+    return DatetimeRanges(datetime_ranges)
+
+
+def test_datetime_ranges_tree_queries():
+    rng = Random(0)
+    datetime_ranges = _random_ranges(rng, 300)
+    ranges = datetime_ranges.datetime_ranges
+    tree = DatetimeRangesTree.from_datetime_ranges(datetime_ranges)
+    assert len(tree) == len(ranges)
+
+    for _ in range(100):
+        dt = _START + timedelta(hours=rng.randint(-10, 240))
+        expected = [i for i, r in enumerate(ranges) if dt in r]
+        assert sorted(tree.covering(dt)) == expected
+        assert tree.count(dt) == len(expected)
+
+        window = DatetimeRange(dt, dt + timedelta(hours=rng.randint(0, 20)))
+        expected = [
+            i
+            for i, r in enumerate(ranges)
+            if r.start <= window.end and window.start <= r.end
+        ]
+        assert sorted(tree.overlapping(window)) == expected
+
+
+def test_datetime_ranges_tree_insert_remove():
+    tree = DatetimeRangesTree()
+    assert tree.covering(_START) == []
+    assert tree.count(_START) == 0
+
+    day = timedelta(days=1)
+    first, second, third = tree.insert(
+        [
+            DatetimeRange(_START, _START + day),
+            DatetimeRange(_START, _START + 2 * day),
+            DatetimeRange(_START + day, _START + 3 * day),
+        ]
+    )
+    assert sorted(tree.covering(_START + day)) == [first, second, third]
+    assert tree.count(_START + day) == 3
+    assert tree[third] == DatetimeRange(_START + day, _START + 3 * day)
+
+    tree.remove([second])
+    assert sorted(tree.covering(_START + day)) == [first, third]
+    assert sorted(tree.overlapping(DatetimeRange(_START, _START))) == [first]
+    assert tree.count(_START + 2 * day) == 1
+
+    (fourth,) = tree.insert([DatetimeRange(_START, _START + 5 * day)])
+    assert fourth not in (first, second, third)
+    assert sorted(tree) == [first, third, fourth]
@@ -0,0 +1,60 @@
+from datetime import time, timedelta, timezone
+
+from pytest import importorskip, raises
+from timematic.enums import Weekday
+
+from timeranges import TimeRange, TimeRanges, WeekRange, WeekRangeSet
+
+
+def _week_ranges():
+    week_ranges = []
+    for i in range(20):
+        tz = timezone(timedelta(hours=i % 5 - 2))
+        week_ranges.append(
+            WeekRange(
+                {
+                    Weekday(i % 7): TimeRanges([TimeRange(time(i), time(i + 3))]),
+                    Weekday.SUNDAY: TimeRanges([TimeRange(time(22), time.max)]),
+                },
+                timezone=tz if i % 3 else None,
+            )
+        )
+    return week_ranges
+
+
+def test_week_range_set_contains_many():
+    np = importorskip("numpy")
+    week_ranges = _week_ranges()
+    datetimes = np.arange(
+        np.datetime64("2022-01-01T00:00"), np.datetime64("2022-01-15T00:00"), 17
+    ).astype("datetime64[us]")
+    datetimes[3] = np.datetime64("NaT")
+    expected = np.array([w.contains_many(datetimes) for w in week_ranges])
+
+    week_range_set = WeekRangeSet(week_ranges)
+    assert len(week_range_set) == 20
+    matrix = week_range_set.contains_many(datetimes)
+    assert (matrix == expected).all()
+    rows, columns = week_range_set.hits(datetimes)
+    assert (rows == expected.nonzero()[0]).all()
+    assert (columns == expected.nonzero()[1]).all()
+
+    with raises(ValueError):
+        week_range_set.contains_many(datetimes.reshape(-1, 1))
+    assert WeekRangeSet([]).contains_many(datetimes).shape == (0, len(datetimes))
+
+
+def test_week_range_set_parallel():
+    np = importorskip("numpy")
+    week_ranges = _week_ranges()
+    datetimes = np.arange(
+        np.datetime64("2022-01-01T00:00"), np.datetime64("2022-01-08T00:00"), 13
+    ).astype("datetime64[us]")
+    expected = np.array([w.contains_many(datetimes) for w in week_ranges])
+
+    with WeekRangeSet(week_ranges, max_workers=2, parallel_threshold=0) as parallel:
+        assert (parallel.contains_many(datetimes) == expected).all()
+        rows, columns = parallel.hits(datetimes)
+        assert (rows == expected.nonzero()[0]).all()
+        assert (columns == expected.nonzero()[1]).all()
+    assert parallel._executor is None